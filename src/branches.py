@@ -0,0 +1,269 @@
+"""
+Ramas de una simulación.
+
+Simula un script hasta un tiempo dado y desde ahí continúa varias ramas,
+cada una con sus propias instrucciones (por ejemplo distintas fallas de
+cables o cambios de rutas), en paralelo::
+
+    python net_sim.py branch script.txt --at 50000 \\
+        -b cable_1=cable_1.txt -b cable_2=cable_2.txt
+
+La parte común se simula una sola vez. Donde existe ``os.fork`` cada rama
+es un proceso hijo que comparte la memoria de la simulación hasta que la
+modifica, por lo que no hace falta copiarla; en otro caso las ramas se
+copian con ``Simulation.fork`` y se ejecutan una tras otra. Todas las
+ramas parten del mismo estado del generador de números aleatorios.
+"""
+
+import contextlib
+import csv
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import traceback
+from collections import deque
+from multiprocessing.connection import wait
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import Config
+from instruction_parser import iter_instructions, load_instructions
+from instructions import Instruction
+from simulation import Simulation
+from sweep import RESULT_COLUMNS, simulation_results
+
+BRANCHES_FILE_NAME = "branches.csv"
+
+
+def parse_branches(params: Iterable[str]) -> Dict[str, List[Instruction]]:
+    """
+    Lee las instrucciones de cada rama.
+
+    Parameters
+    ----------
+    params : Iterable[str]
+        Ramas con la forma ``nombre=script``.
+
+    Returns
+    -------
+    Dict[str, List[Instruction]]
+        Instrucciones de cada rama.
+
+    Raises
+    ------
+    ValueError
+        Si una rama no tiene la forma esperada o se repite su nombre.
+    """
+
+    branches = {}
+    for param in params:
+        name, sep, script_path = param.partition("=")
+        if not sep or not name or not script_path:
+            raise ValueError(f"Invalid branch '{param}'")
+        if name in branches:
+            raise ValueError(f"Repeated branch '{name}'")
+        branches[name] = load_instructions(script_path)
+    return branches
+
+
+def _start_branch(
+    simulation: Simulation,
+    instructions: List[Instruction],
+    output_path: str,
+) -> Dict[str, Any]:
+    stdout_path = Path(output_path, "stdout.txt")
+    start = perf_counter()
+    with open(stdout_path, "w") as out, contextlib.redirect_stdout(out):
+        for instr in instructions:
+            simulation.schedule(instr)
+        simulation.resume()
+    return simulation_results(simulation, perf_counter() - start)
+
+
+def _run_branch(
+    connection,
+    simulation: Simulation,
+    logs: dict,
+    random_state: tuple,
+    instructions: List[Instruction],
+    output_path: str,
+):
+    """
+    Proceso de una rama, creado con ``os.fork`` a partir del proceso que
+    tiene la simulación. Responde con los resultados de la rama.
+    """
+
+    try:
+        # ``random`` cambia la semilla de los procesos creados con
+        # ``os.fork``, se restaura la del proceso de la simulación
+        random.setstate(random_state)
+        simulation.branch(output_path, logs)
+        connection.send(_start_branch(simulation, instructions, output_path))
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+
+
+def run_branches(
+    simulation: Simulation,
+    branches: Dict[str, Iterable[Instruction]],
+    output_path: str = "output/branches",
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Continúa una simulación detenida (ver ``until`` en
+    ``Simulation.start``) con cada rama en paralelo y guarda la tabla de
+    resultados en ``branches.csv`` dentro de ``output_path``.
+
+    Los logs y lo que imprime cada rama se guardan en una carpeta con su
+    nombre dentro de ``output_path``. La simulación dada no cambia.
+
+    Parameters
+    ----------
+    simulation : Simulation
+        Simulación detenida.
+    branches : Dict[str, Iterable[Instruction]]
+        Instrucciones de cada rama, a partir del tiempo de la simulación.
+    output_path : str, optional
+        Carpeta de las ramas, por defecto ``output/branches``.
+    workers : int, optional
+        Ramas que se ejecutan a la vez, por defecto una por núcleo.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Nombre de cada rama (``branch``) y sus resultados (ver
+        ``sweep.simulation_results``) en el orden dado.
+
+    Raises
+    ------
+    ValueError
+        Si la simulación ya terminó o una rama tiene instrucciones
+        anteriores a su tiempo.
+    RuntimeError
+        Si falla el proceso de una rama.
+    """
+
+    if simulation.end_delay <= 0:
+        raise ValueError(
+            f"The simulation ended at {simulation.time}, stop it with "
+            "'until' to branch it."
+        )
+    branches = {name: list(instrs) for name, instrs in branches.items()}
+    for name, instructions in branches.items():
+        early = [i for i in instructions if i.time < simulation.time]
+        if early:
+            raise ValueError(
+                f"Branch {name} has an instruction at {early[0].time}, "
+                f"before the branch time {simulation.time}."
+            )
+
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    paths = {name: str(Path(output_path, name)) for name in branches}
+    results = {}
+    random_state = random.getstate()
+    if "fork" not in multiprocessing.get_all_start_methods():
+        for name, instructions in branches.items():
+            random.setstate(random_state)
+            branch = simulation.fork(paths[name])
+            results[name] = _start_branch(branch, instructions, paths[name])
+            print(f"[{len(results)}/{len(branches)}] {paths[name]}")
+    else:
+        # Los procesos hijos heredan los logs ya escritos y lo que falta
+        # imprimir, se escriben antes de crearlos
+        logs = simulation.log_sink.checkpoint(simulation.devices.values())
+        sys.stdout.flush()
+        context = multiprocessing.get_context("fork")
+        workers = workers or os.cpu_count() or 1
+        pending = deque(branches.items())
+        running = {}
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    name, instructions = pending.popleft()
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(
+                        target=_run_branch,
+                        args=(
+                            sender,
+                            simulation,
+                            logs,
+                            random_state,
+                            instructions,
+                            paths[name],
+                        ),
+                    )
+                    process.start()
+                    sender.close()
+                    running[receiver] = (name, process)
+                for receiver in wait(list(running)):
+                    name, process = running.pop(receiver)
+                    try:
+                        result = receiver.recv()
+                    except EOFError:
+                        result = ("error", f"exit code {process.exitcode}")
+                    process.join()
+                    if isinstance(result, tuple) and result[:1] == ("error",):
+                        raise RuntimeError(
+                            f"Branch {name} failed:\n{result[1]}"
+                        )
+                    results[name] = result
+                    print(f"[{len(results)}/{len(branches)}] {paths[name]}")
+        finally:
+            for _, process in running.values():
+                process.terminate()
+
+    rows = [{"branch": name, **results[name]} for name in branches]
+    with open(Path(output_path, BRANCHES_FILE_NAME), "w", newline="") as file:
+        writer = csv.DictWriter(file, ["branch", *RESULT_COLUMNS])
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def run_branch_script(
+    script_path: str,
+    time: int,
+    branches: Dict[str, Iterable[Instruction]],
+    output_path: str = "output/branches",
+    config: Config = None,
+    workers: Optional[int] = None,
+    window: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Simula un script hasta un tiempo dado y continúa cada rama en paralelo
+    (ver ``run_branches``).
+
+    Parameters
+    ----------
+    script_path : str
+        Script con las instrucciones comunes a todas las ramas.
+    time : int
+        Tiempo en que comienzan las ramas.
+    branches : Dict[str, Iterable[Instruction]]
+        Instrucciones de cada rama.
+    output_path : str, optional
+        Carpeta de las ramas, por defecto ``output/branches``.
+    config : Config, optional
+        Configuración, por defecto se lee ``config.txt``.
+    workers : int, optional
+        Ramas que se ejecutan a la vez, por defecto una por núcleo.
+    window : int, optional
+        Lee el script de forma perezosa (ver ``iter_instructions``).
+    """
+
+    if window is None:
+        instructions = load_instructions(script_path)
+    else:
+        instructions = iter_instructions(script_path, window)
+
+    # Los logs de la parte común solo se copian a las ramas
+    with tempfile.TemporaryDirectory() as common_path:
+        simulation = Simulation(output_path=common_path, config=config)
+        stdout_path = Path(output_path, "stdout.txt")
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        with open(stdout_path, "w") as out, contextlib.redirect_stdout(out):
+            simulation.start(instructions, until=time)
+        return run_branches(simulation, branches, output_path, workers)
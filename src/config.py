@@ -1,35 +1,149 @@
 from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
 
-CONFIG = {
-    "signal_time": 10,
-    "error_detection": "simple_hash",
-    "error_prob": 0.001,
-}
+from constants import SIGNAL_TIME
 
 _CONFIG_FILE_NAME = "config.txt"
 
 
-def _set_config_val(key: str, value):
-    if key == "signal_time":
-        CONFIG[key] = int(value)
-    if key in ("error_detection", "error_prob"):
-        CONFIG[key] = value
-
-
-def check_config():
-    path = Path(_CONFIG_FILE_NAME)
-    if path.exists():
-        with open(_CONFIG_FILE_NAME, "r") as file:
-            lines = file.readlines()
-            for line in lines:
-                key, value = line.split()
-                _set_config_val(key, value)
-    else:
-        with open(_CONFIG_FILE_NAME, "w+") as file:
-            file.writelines(
-                [
-                    "signal_time 10\n",
-                    "error_detection simple_hash",
-                    "error_prob 0.0001",
-                ]
-            )
+def _names(value: str) -> Tuple[str, ...]:
+    return tuple(value.split(","))
+
+
+# Tipo de cada valor que puede aparecer en el archivo de configuración
+_PARSERS = {
+    "signal_time": int,
+    "error_detection": str,
+    "error_prob": float,
+    "engine": str,
+    "transmission_mode": str,
+    "log_buffer_size": int,
+    "port_log": str,
+    "capture_devices": _names,
+    "capture_start": int,
+    "capture_end": int,
+    "forwarding_cache_size": int,
+    "arp_cache_size": int,
+    "arp_ttl": int,
+    "arp_retry_time": int,
+    "arp_retries": int,
+    "arp_queue_size": int,
+    "mac_table_size": int,
+    "mac_aging_time": int,
+    "routing": str,
+    "hello_time": int,
+    "dead_time": int,
+    "lsa_refresh_time": int,
+    "lsa_min_interval": int,
+    "checkpoint_interval": int,
+    "checkpoint_file": str,
+}
+
+
+def parse_value(key: str, value: str):
+    """
+    Convierte el valor de una clave de la configuración escrito como texto.
+
+    Raises
+    ------
+    ValueError
+        Si la clave no existe o el valor no es válido.
+    """
+
+    if key not in _PARSERS:
+        raise ValueError(f"Unknown config key {key}")
+    return _PARSERS[key](value)
+
+
+class Config(NamedTuple):
+    """
+    Configuración inmutable de una simulación.
+
+    Se lee una sola vez con ``Config.load`` y se pasa a los dispositivos,
+    cables y capas físicas que la usan, por lo que varias simulaciones con
+    configuraciones distintas pueden ejecutarse en el mismo proceso.
+    """
+
+    signal_time: int = SIGNAL_TIME
+    error_detection: str = "simple_hash"
+    error_prob: float = 0.001
+    engine: str = "tick"
+    transmission_mode: str = "bit"
+    log_buffer_size: int = 1024
+    port_log: str = "text"
+    capture_devices: Optional[Tuple[str, ...]] = None
+    capture_start: Optional[int] = None
+    capture_end: Optional[int] = None
+    forwarding_cache_size: int = 1024
+    arp_cache_size: int = 1024
+    arp_ttl: int = 300000
+    arp_retry_time: int = 20000
+    arp_retries: int = 3
+    arp_queue_size: int = 64
+    mac_table_size: int = 8192
+    mac_aging_time: int = 300000
+    routing: str = "static"
+    hello_time: int = 10000
+    dead_time: int = 40000
+    lsa_refresh_time: int = 1800000
+    lsa_min_interval: int = 5000
+    checkpoint_interval: int = 0
+    checkpoint_file: str = "checkpoint.bin"
+    path: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str = _CONFIG_FILE_NAME) -> "Config":
+        """
+        Lee la configuración de un archivo con un par ``clave valor`` por
+        línea. Las claves que no aparecen toman su valor por defecto.
+
+        Si el archivo no existe se crea con los valores por defecto.
+
+        Parameters
+        ----------
+        path : str, optional
+            Ruta del archivo, por defecto ``config.txt``.
+
+        Returns
+        -------
+        Config
+            Configuración leída.
+        """
+
+        values = {}
+        if Path(path).exists():
+            with open(path, "r") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    key, value = line.split()
+                    if key in _PARSERS:
+                        values[key] = parse_value(key, value)
+        else:
+            with open(path, "w+") as file:
+                file.writelines(
+                    [
+                        "signal_time 10\n",
+                        "error_detection simple_hash\n",
+                        "error_prob 0.001\n",
+                    ]
+                )
+        return cls(path=str(path), **values)
+
+    def reload(self) -> "Config":
+        """
+        Vuelve a leer el archivo del que se cargó la configuración.
+
+        Returns
+        -------
+        Config
+            Nueva configuración. Si no se cargó de un archivo se devuelve la
+            misma.
+        """
+
+        if self.path is None:
+            return self
+        return Config.load(self.path)
+
+
+DEFAULT_CONFIG = Config()
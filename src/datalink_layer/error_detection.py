@@ -1,44 +1,176 @@
-from typing import List, Tuple
+import argparse
+import binascii
+import struct
+import zlib
+from os import urandom
+from time import perf_counter
+from typing import Callable, Dict, Tuple
 
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 from utils import from_bit_data_to_number
 
+# Función de cada algoritmo que calcula los bytes de corrección de los bytes
+# de datos de un frame
+ALGORITHMS: Dict[str, Callable[[bytes], bytes]] = {}
 
-def _simple_hash(frame: List[VD]) -> Tuple[List[VD], bool]:
+
+def register_error_detection(
+    name: str, checksum: Callable[[bytes], bytes]
+) -> None:
+    """
+    Registra un algoritmo de detección de errores para poder seleccionarlo
+    con ``error_detection`` en la configuración.
+
+    Parameters
+    ----------
+    name : str
+        Nombre del algoritmo.
+    checksum : Callable[[bytes], bytes]
+        Función que calcula los bytes de corrección (a lo sumo 255) de los
+        datos de un frame.
+    """
+
+    ALGORITHMS[name] = checksum
+
+
+def _get_algorithm(error_det_algorithm: str) -> Callable[[bytes], bytes]:
+    checksum = ALGORITHMS.get(error_det_algorithm)
+    if checksum is None:
+        raise ValueError("Invalid error detection algorithm")
+    return checksum
+
+
+def _simple_hash(data: bytes) -> bytes:
+    data_sum = bin(int.from_bytes(data, "big")).count("1")
+    return data_sum.to_bytes(max(1, (data_sum.bit_length() + 7) // 8), "big")
+
+
+def _crc32(data: bytes) -> bytes:
+    return zlib.crc32(data).to_bytes(4, "big")
+
+
+def _crc16(data: bytes) -> bytes:
+    # CRC-16/CCITT-FALSE: polinomio 0x1021 y valor inicial 0xFFFF
+    return binascii.crc_hqx(data, 0xFFFF).to_bytes(2, "big")
+
+
+def _internet_checksum(data: bytes) -> bytes:
+    # Suma en complemento a uno de palabras de 16 bits (RFC 1071)
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f">{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return (~total & 0xFFFF).to_bytes(2, "big")
+
+
+register_error_detection("simple_hash", _simple_hash)
+register_error_detection("crc32", _crc32)
+register_error_detection("crc16", _crc16)
+register_error_detection("internet_checksum", _internet_checksum)
+
+
+def check_frame_correction(
+    frame: BitBuffer, error_det_algorithm: str
+) -> Tuple[BitBuffer, bool]:
+    """
+    Comprueba los datos de corrección de un frame.
+
+    Parameters
+    ----------
+    frame : BitBuffer
+        Frame recibido.
+    error_det_algorithm : str
+        Nombre del algoritmo de detección de errores.
+
+    Returns
+    -------
+    Tuple[BitBuffer, bool]
+        El frame y si tiene errores.
+    """
+
+    checksum = _get_algorithm(error_det_algorithm)
     correction_size = from_bit_data_to_number(frame[40:48])
     data = frame[48 : len(frame) - 8 * correction_size]
     correction_data = frame[-8 * correction_size :]
-    return frame, sum(i.value for i in data) != from_bit_data_to_number(
-        correction_data
+    expected = int.from_bytes(checksum(data.to_bytes()), "big")
+    return frame, expected != from_bit_data_to_number(correction_data)
+
+
+def get_error_detection_data(
+    data: BitBuffer, error_det_algorithm: str
+) -> Tuple[BitBuffer, BitBuffer]:
+    """
+    Calcula los datos de corrección de los datos de un frame.
+
+    Parameters
+    ----------
+    data : BitBuffer
+        Datos del frame.
+    error_det_algorithm : str
+        Nombre del algoritmo de detección de errores.
+
+    Returns
+    -------
+    Tuple[BitBuffer, BitBuffer]
+        Cantidad de bytes de corrección (8 bits) y los bytes de corrección.
+    """
+
+    correction = _get_algorithm(error_det_algorithm)(data.to_bytes())
+    return (
+        BitBuffer.from_int(len(correction), 8),
+        BitBuffer.from_bytes(correction),
     )
 
 
-def check_frame_correction(
-    frame: List[int], error_det_algorithm: str
-) -> Tuple[List[int], bool]:
-    if error_det_algorithm == "simple_hash":
-        return _simple_hash(frame)
-    else:
-        raise ValueError("Invalid error detection algorithm")
+def benchmark(
+    data_size: int = 255, frames: int = 10000
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Mide el costo por frame de cada algoritmo registrado.
 
+    Parameters
+    ----------
+    data_size : int, optional
+        Bytes de datos de cada frame, por defecto 255.
+    frames : int, optional
+        Cantidad de frames a medir, por defecto 10000.
 
-def _get_simple_hash(data: List[List[VD]]) -> Tuple[List[VD], List[VD]]:
-    data_sum = sum([i.value for i in data])
-    bit_data_sum = f"{data_sum:b}"
-    if len(bit_data_sum) % 8 != 0:
-        rest = 8 - len(bit_data_sum) % 8
-        bit_data_sum = "0" * rest + bit_data_sum
-    error_correction = [VD(int(b)) for b in bit_data_sum]
-    error_correction_size = [
-        VD(int(b)) for b in f"{len(bit_data_sum) // 8:08b}"
-    ]
-    return error_correction_size, error_correction
+    Returns
+    -------
+    Dict[str, Tuple[float, float]]
+        Microsegundos por frame al calcular y al comprobar los datos de
+        corrección de cada algoritmo.
+    """
 
+    header = BitBuffer(0, 48)
+    data = [BitBuffer.from_bytes(urandom(data_size)) for _ in range(frames)]
+    results = {}
+    for name in ALGORITHMS:
+        start = perf_counter()
+        built = []
+        for frame_data in data:
+            e_size, e_data = get_error_detection_data(frame_data, name)
+            built.append(header[:40] + e_size + frame_data + e_data)
+        encode = perf_counter() - start
 
-def get_error_detection_data(
-    data: List[VD], error_det_algorithm: str
-) -> Tuple[List[VD], List[VD]]:
-    if error_det_algorithm == "simple_hash":
-        return _get_simple_hash(data)
-    else:
-        raise ValueError("Invalid error detection algorithm")
+        start = perf_counter()
+        for frame in built:
+            check_frame_correction(frame, name)
+        check = perf_counter() - start
+        results[name] = (1e6 * encode / frames, 1e6 * check / frames)
+    return results
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Per-frame cost of the error detection algorithms."
+    )
+    parser.add_argument("--size", type=int, default=255, help="Data bytes.")
+    parser.add_argument("--frames", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'algorithm': <18} {'build (us)': >10} {'check (us)': >10}")
+    for name, (encode, check) in benchmark(args.size, args.frames).items():
+        print(f"{name: <18} {encode: >10.2f} {check: >10.2f}")
@@ -1,22 +1,26 @@
 from __future__ import annotations
-from typing import List
 from random import randint, random
-from config import CONFIG
+from typing import List
+from config import Config, DEFAULT_CONFIG
 from datalink_layer.error_detection import get_error_detection_data
 from network_layer.ip import IPPacket, IP
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer, VoltageDecodification as VD
 from utils import (
     data_size,
     extend_to_byte_divisor,
     from_bit_data_to_hex,
     from_bit_data_to_number,
     from_number_to_bit_data,
-    from_str_to_bin,
+    from_str_to_bit_data,
 )
 
+ARPQ_DATA = from_str_to_bit_data("ARPQ")
+BROADCAST_MAC = 0xFFFF
+HEADER_SIZE = 48
+
 
 class Frame:
-    def __init__(self, bit_data: List[int]) -> None:
+    def __init__(self, bit_data: BitBuffer) -> None:
         self.is_valid = False
 
         if len(bit_data) < 48:
@@ -41,13 +45,10 @@ class Frame:
         self.additional_info = ""
 
         if self.frame_data_size / 8 == 8:
-            arpq = from_str_to_bin("ARPQ")
-            ip = "".join(map(str, self.data[32:64]))
-            mac_dest_str = "".join(map(str, bit_data[:16]))
-            arpq_data = "".join(map(str, self.data[:32]))
-            if arpq_data.endswith(arpq):
-                if mac_dest_str == "1" * 16:
-                    self.additional_info = f"(ARPQ) Who is {IP.from_bin(ip)} ?"
+            if self.data[:32] == ARPQ_DATA:
+                if self.to_mac == BROADCAST_MAC:
+                    ip = IP.from_bit_data(self.data[32:64])
+                    self.additional_info = f"(ARPQ) Who is {ip} ?"
                 else:
                     self.additional_info = "(ARPQ) response"
 
@@ -69,21 +70,109 @@ class Frame:
 
     @staticmethod
     def build(
-        dest_mac: List[int], orig_mac: List[int], data: List[int]
+        dest_mac: BitBuffer,
+        orig_mac: BitBuffer,
+        data: BitBuffer,
+        config: Config = DEFAULT_CONFIG,
     ) -> Frame:
         data = extend_to_byte_divisor(data)
 
-        e_size, e_data = get_error_detection_data(
-            data, CONFIG["error_detection"]
-        )
+        e_size, e_data = get_error_detection_data(data, config.error_detection)
 
         rand = random()
-        if rand < CONFIG["error_prob"]:
+        if rand < config.error_prob:
             ind = randint(0, len(data) - 1)
-            data[ind] = VD((data[ind].value + 1) % 2)
+            data = data.flip(ind)
 
         size = data_size(data)
         final_data = dest_mac + orig_mac + size + e_size + data + e_data
 
         frame = Frame(final_data)
         return frame
+
+
+class FrameParser:
+    """
+    Reconstruye un frame a partir de los bits que llegan por un puerto.
+
+    Los bits se acumulan en bytes. Los tamaños de los datos y del código de
+    detección de errores se leen una sola vez, al completarse la cabecera,
+    y a partir de ahí solo se cuenta hasta el final del frame, por lo que
+    procesar cada bit tiene costo constante.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Descarta los bits recibidos."""
+        self._bytes = bytearray()
+        self._byte = 0
+        self._length = 0
+        self._frame_length = None
+
+    def push(self, bit: VD) -> Frame:
+        """
+        Añade un bit al frame en construcción.
+
+        Parameters
+        ----------
+        bit : VD
+            Bit recibido.
+
+        Returns
+        -------
+        Union[Frame, None]
+            El frame si el bit lo completa, ``None`` en otro caso.
+        """
+
+        self._byte = self._byte << 1 | bit.value
+        self._length += 1
+        if self._length % 8 == 0:
+            self._bytes.append(self._byte)
+            self._byte = 0
+
+        if self._length == HEADER_SIZE:
+            data_size, error_size = self._bytes[4], self._bytes[5]
+            self._frame_length = HEADER_SIZE + 8 * (data_size + error_size)
+
+        if self._length != self._frame_length:
+            return None
+
+        frame = Frame(BitBuffer.from_bytes(self._bytes))
+        self.reset()
+        return frame
+
+    def extend(self, bits: BitBuffer) -> List[Frame]:
+        """
+        Añade varios bits al frame en construcción.
+
+        Los frames que llegan completos a un parser vacío se separan
+        directamente de ``bits`` sin procesarlos bit a bit.
+
+        Parameters
+        ----------
+        bits : BitBuffer
+            Bits recibidos.
+
+        Returns
+        -------
+        List[Frame]
+            Frames completados.
+        """
+
+        frames = []
+        while self._length == 0 and len(bits) >= HEADER_SIZE:
+            data_size = int(bits[32:40])
+            error_size = int(bits[40:48])
+            frame_length = HEADER_SIZE + 8 * (data_size + error_size)
+            if len(bits) < frame_length:
+                break
+            frames.append(Frame(bits[:frame_length]))
+            bits = bits[frame_length:]
+
+        for bit in bits:
+            frame = self.push(bit)
+            if frame is not None:
+                frames.append(frame)
+        return frames
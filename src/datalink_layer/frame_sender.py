@@ -1,6 +1,7 @@
+from config import Config, DEFAULT_CONFIG
 from device.port_device import PortDevice
-from physical_layer.bit import VoltageDecodification as VD
-from typing import Dict, List
+from physical_layer.bit import BitBuffer
+from typing import Dict
 from .frame import Frame
 
 
@@ -14,17 +15,19 @@ class FrameSender(PortDevice):
         Tabla que contiene la dirección MAC de cada puerto.
     """
 
-    def __init__(self, name: str, ports_num: int):
-        self.mac_addrs: Dict[str, List[int]] = {}
-        super().__init__(name, ports_num)
+    def __init__(
+        self, name: str, ports_num: int, config: Config = DEFAULT_CONFIG
+    ):
+        self.mac_addrs: Dict[str, BitBuffer] = {}
+        super().__init__(name, ports_num, config)
 
-    def send(self, data: List[VD], package_size, port: str):
+    def send(self, data: BitBuffer, package_size, port: str):
         """
         Agrega nuevos datos para ser enviados a la lista de datos.
 
         Parameters
         ----------
-        data : List[List[int]]
+        data : BitBuffer
             Datos a ser enviados.
         """
 
@@ -39,7 +42,7 @@ class FrameSender(PortDevice):
         physical_layer = self.physical_layers[self.port_name(port)]
         physical_layer.send(packages)
 
-    def send_frame(self, mac: List[VD], data: List[VD], port: str):
+    def send_frame(self, mac: BitBuffer, data: BitBuffer, port: str):
         """
         Ordena a un host a enviar un frame determinado a una dirección mac
         determinada.
@@ -48,13 +51,13 @@ class FrameSender(PortDevice):
         ----------
         host_name : str
             Nombre del host que envía la información.
-        mac : List[int]
+        mac : BitBuffer
             Mac destino.
-        data : List[int]
+        data : BitBuffer
             Frame a enviar.
         """
 
-        frame = Frame.build(mac, self.mac_addrs[port], data)
+        frame = Frame.build(mac, self.mac_addrs[port], data, self.config)
         print(
             f'[{self.simulation_time:>6}] {self.name + " - " + str(port):>18}      send: {frame}'
         )
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class MacTable:
+    """
+    Tabla de los puertos por los que se llega a cada mac.
+
+    Cada entrada expira ``aging_time`` milisegundos después de la última vez
+    que se vio un frame de su mac. Si la tabla está llena al aprender una
+    mac nueva se descarta la usada hace más tiempo.
+
+    Parameters
+    ----------
+    size : int
+        Cantidad máxima de entradas.
+    aging_time : int
+        Tiempo de vida de las entradas en milisegundos. Con ``0`` no
+        expiran.
+
+    Attributes
+    ----------
+    learned : int
+        Cantidad de entradas nuevas aprendidas.
+    evictions : int
+        Cantidad de entradas descartadas por falta de espacio.
+    expired : int
+        Cantidad de entradas descartadas por expirar.
+    """
+
+    def __init__(self, size: int, aging_time: int) -> None:
+        self.size = size
+        self.aging_time = aging_time
+        self.learned = 0
+        self.evictions = 0
+        self.expired = 0
+        self._entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, mac: int) -> bool:
+        return mac in self._entries
+
+    def get(self, mac: int, time: int) -> Optional[str]:
+        """
+        Busca el puerto de una mac.
+
+        Parameters
+        ----------
+        mac : int
+            Mac buscada.
+        time : int
+            Tiempo actual de la simulación.
+
+        Returns
+        -------
+        Optional[str]
+            Puerto por el que se llega a la mac, o ``None`` si no se conoce.
+        """
+
+        entry = self._entries.get(mac)
+        if entry is None:
+            return None
+        if entry[1] <= time:
+            del self._entries[mac]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(mac)
+        return entry[0]
+
+    def learn(self, mac: int, port: str, time: int) -> None:
+        """
+        Guarda el puerto por el que llegó un frame de una mac.
+
+        Parameters
+        ----------
+        mac : int
+            Mac de origen del frame.
+        port : str
+            Puerto por el que llegó.
+        time : int
+            Tiempo actual de la simulación.
+        """
+
+        if mac not in self._entries:
+            self.learned += 1
+        expires = (
+            time + self.aging_time if self.aging_time > 0 else float("inf")
+        )
+        self._entries[mac] = (port, expires)
+        self._entries.move_to_end(mac)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+
+        self._entries.clear()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import logging
 from typing import Dict
-from pathlib import Path
+
+from config import Config, DEFAULT_CONFIG
+from log_sink import LogSink
 
 
 class Device:
@@ -17,13 +19,25 @@ class Device:
 
         Each port could be connected to a Wire
         If the port Wire is None, port is disconnected
+    config: Config, optional
+        Simulation configuration
     """
 
-    def __init__(self, name: str, ports: Dict[str, "Port"]) -> None:
+    def __init__(
+        self,
+        name: str,
+        ports: Dict[str, "Port"],
+        config: Config = DEFAULT_CONFIG,
+    ) -> None:
         self.name = name
         self.ports = ports
+        self.config = config
         self.logs = []
+        self.log_sink = LogSink()
         self.simulation_time = 0
+        # Devuelve el ciclo actual de la simulación, incluso fuera del turno
+        # del dispositivo. Lo asigna la simulación al añadir el dispositivo.
+        self.clock = None
 
     @property
     def is_active(self):
@@ -63,6 +77,38 @@ class Device:
         """
         self.simulation_time = time
 
+    def next_update(self):
+        """
+        Cantidad de ciclos hasta la próxima actualización que no sea trivial.
+
+        Una actualización es trivial si solo avanza contadores internos y
+        puede ser aplicada en bloque con ``skip``.
+
+        Returns
+        -------
+        Union[int, None]
+            Número de ciclos (``1`` es el próximo) o ``None`` si el
+            dispositivo permanece inactivo hasta que algo lo modifique.
+        """
+
+        return None
+
+    def skip(self, ticks: int, time: int):
+        """
+        Aplica de una vez ``ticks`` actualizaciones triviales.
+
+        Parameters
+        ----------
+        ticks : int
+            Cantidad de ciclos a saltar. Debe ser menor que el valor
+            devuelto por ``next_update``.
+        time : int
+            Tiempo del último ciclo saltado.
+        """
+
+        if ticks > 0:
+            self.simulation_time = time
+
     def connect(self, wire, port_name: str):
         """
         Conecta un cable dado a un puerto determinado.
@@ -107,9 +153,21 @@ class Device:
         log_msg = (
             f"| {time: ^10} | {self.name: ^12} | {msg: ^14} | {info: ^30} |"
         )
-        self.logs.append(log_msg)
+        self.log_sink.write(self, log_msg)
         logging.info(log_msg)
 
+    def log_header(self) -> str:
+        """
+        Encabezado de la tabla de logs del dispositivo.
+
+        Returns
+        -------
+        str
+            Encabezado, puede tener varias líneas.
+        """
+
+        return f'| {"Time (ms)": ^10} | {"Device":^12} | {"Action" :^14} | {"Info": ^30} |'
+
     def save_log(self, path: str = ""):
         """
         Guarda los logs del dispositivo en una ruta dada.
@@ -120,13 +178,4 @@ class Device:
             Ruta donde se guardarán los logs. (Por defecto en la raíz)
         """
 
-        output_folder = Path(path)
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / Path(f"{self.name}.txt")
-        with open(str(output_path), "w+") as file:
-            header = f'| {"Time (ms)": ^10} | {"Device":^12} | {"Action" :^14} | {"Info": ^30} |'
-            file.write(f'{"-" * len(header)}\n')
-            file.write(f"{header}\n")
-            file.write(f'{"-" * len(header)}\n')
-            file.write("\n".join(self.logs))
-            file.write(f'\n{"-" * len(header)}\n')
+        self.log_sink.close(self, path)
@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import Tuple
 from pathlib import Path
 
 from .router import Router
@@ -9,18 +9,20 @@ from utils import (
     from_bit_data_to_number,
     from_number_to_bit_data,
 )
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 from datalink_layer.error_detection import check_frame_correction
-from config import CONFIG, check_config
+from config import Config, DEFAULT_CONFIG
 
 
 class Host(Router):
     """Represents a Host"""
 
-    def __init__(self, name: str) -> None:
+    runs_routing_protocol = False
+
+    def __init__(self, name: str, config: Config = DEFAULT_CONFIG) -> None:
         self.received_data = []
         self.received_payload = []
-        super().__init__(name, 1)
+        super().__init__(name, 1, config)
 
     def send_ping_to(self, to_ip: IP) -> None:
         """
@@ -105,9 +107,7 @@ class Host(Router):
     def str_mac(self):
         """str : Dirección mac del host."""
         if self.mac is not None:
-            return "".join(map(str, self.mac))
+            return str(self.mac)
 
-    def check_errors(self, frame) -> Tuple[List[VD], bool]:
-        check_config()
-        error_det_algorith = CONFIG["error_detection"]
-        return check_frame_correction(frame, error_det_algorith)
+    def check_errors(self, frame: BitBuffer) -> Tuple[BitBuffer, bool]:
+        return check_frame_correction(frame, self.config.error_detection)
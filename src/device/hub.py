@@ -1,9 +1,11 @@
-from functools import reduce
+from functools import partial, reduce
 from typing import List
-from pathlib import Path
 
 from physical_layer.bit import VoltageDecodification as VD
-from constants import SIGNAL_TIME
+from physical_layer.frame_layer import Transmission
+from physical_layer.wire import Wire
+from config import Config, DEFAULT_CONFIG
+from log_sink import format_port_row, port_table_header
 from .device import Device
 from physical_layer.port import Port
 
@@ -12,22 +14,65 @@ class Hub(Device):
     """A Hub connects multiple ports.
 
     When a signal is written at a port this signal
-    is retransmitted for the rest of the ports
+    is retransmitted for the rest of the ports.
+
+    In the ``frame`` transmission mode whole frames are repeated as soon as
+    they start arriving, and two frames arriving at the same time collide.
+    No logs are written in this mode.
+
+    The logs show the values of the ports at the last write. Instead of
+    reading every port on each write, the hub keeps the state of each wire
+    when it was last written and rebuilds the values only when a log line
+    is emitted.
     """
 
-    def __init__(self, name: str, ports_count: int):
+    def __init__(
+        self, name: str, ports_count: int, config: Config = DEFAULT_CONFIG
+    ):
         self.current_transmitting_port = None
         self.read_time = 0
         self._received, self._sent = [], []
+        self.transmission_mode = config.transmission_mode
+        self._forwards = {}
+        # Hilos (recibido, enviado) de cada puerto y su estado
+        # (valor, time_to_reset, ciclo) cuando fueron escritos por última vez
+        self._wires = [None] * ports_count
+        self._received_states = [None] * ports_count
+        self._sent_states = [None] * ports_count
+        # Ciclo de la última escritura cuyos valores aún no se han calculado
+        self._snapshot_time = None
         ports = {}
+        self._port_list = []
         for i in range(ports_count):
             port = Port(f"{name}_{i+1}")
-            port.write_callback = self.port_written(port)
+            port.write_callback = self.port_written(port, i)
+            port.transmission_callback = self.port_transmitted(port)
+            port.connection_callback = self.port_connection_changed(port, i)
             ports[f"{name}_{i+1}"] = port
+            self._port_list.append(port)
 
-        super().__init__(name, ports)
+        super().__init__(name, ports, config)
 
-    def special_log(self, time: int, received: List[int], sent: List[int]):
+    def special_log(self, time: int, received: List[VD], sent: List[VD]):
+        """
+        Registra los valores de los puertos en un tiempo dado.
+
+        Parameters
+        ----------
+        time : int
+            Timepo de ejecución de la simulación.
+        received : List[VD]
+            Lista de bits recibidos por cada puerto (``None`` si el puerto
+            está desconectado).
+        sent : List[VD]
+            Lista de bits enviados por cada puerto.
+        """
+
+        self.log_sink.write_ports(self, time, received, sent)
+
+    def format_port_log(
+        self, time: int, received: List[VD], sent: List[VD]
+    ) -> str:
         """
         Representación especial para los logs de los hubs.
 
@@ -35,44 +80,26 @@ class Hub(Device):
         ----------
         time : int
             Timepo de ejecución de la simulación.
-        received : List[int]
+        received : List[VD]
             Lista de bits recibidos por cada puerto.
-        sent : List[int]
+        sent : List[VD]
             Lista de bits enviados por cada puerto.
+
+        Returns
+        -------
+        str
+            Fila de la tabla de logs.
         """
 
-        log_msg = f"| {time: ^10} |"
-        for re, se in zip(received, sent):
-            if re == "-":
-                log_msg += f' {"---" : ^11} |'
-            else:
-                log_msg += f" {re :>4} . {se: <4} |"
-
-        self.logs.append(log_msg)
-
-    def save_log(self, path=""):
-
-        output_folder = Path(path)
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / Path(f"{self.name}.txt")
-        with open(str(output_path), "w+") as file:
-            header = f'| {"Time (ms)": ^10} |'
-            for port in self.ports.keys():
-                header += f" {port: ^11} |"
-            header_len = len(header)
-            header += f'\n| {"": ^10} |'
-            for port in self.ports.keys():
-                header += f' {"Rece . Sent": ^11} |'
-            file.write(f'{"-" * header_len}\n')
-            file.write(f"{header}\n")
-            file.write(f'{"-" * header_len}\n')
-            file.write("\n".join(self.logs))
-            file.write(f'\n{"-" * header_len}\n')
+        return format_port_row(time, received, sent, hub=True)
+
+    def log_header(self) -> str:
+        return port_table_header(self.ports)
 
     def get_port_value(self, port_name: str, received=True):
         """
         Devuelve el valor del cable conectado a un puerto dado. En caso de no
-        tener un cable conectado devuelve ``'-'``.
+        tener un cable conectado devuelve ``None``.
 
         Parameters
         ----------
@@ -80,33 +107,143 @@ class Hub(Device):
             Nombre del puerto.
         """
         port = self.ports[port_name]
-        return str(port.read(received)) if port.cable is not None else "-"
+        return port.read(received) if port.cable is not None else None
 
     def update(self, time):
         super().update(time)
 
+        if self.transmission_mode == "frame":
+            return
+
         if self.read_time > 0:
             self.read_time -= 1
 
         if self.read_time == 0:
-            self.special_log(time, self._received, self._sent)
-            self.read_time = SIGNAL_TIME
-
-    def port_written(self, port: Port):
-        def port_write_callback():
-            if self.read_time == 0:
-                self.read_time = SIGNAL_TIME
-            if port.cable is not None:
-                value = port.read()
-                self._received = [
-                    self.get_port_value(p) for p in self.ports.keys()
-                ]
-
-                for p in self.ports.values():
-                    if p != port and p.cable is not None:
-                        p.write(value)
-                self._sent = [
-                    self.get_port_value(p, False) for p in self.ports.keys()
-                ]
-
-        return port_write_callback
+            if self.log_sink.captures(self, time):
+                self._take_snapshot()
+                self.special_log(time, self._received, self._sent)
+            self.read_time = self.config.signal_time
+
+    def next_update(self):
+        if self.transmission_mode == "frame":
+            return None
+        return self.read_time if self.read_time > 0 else 1
+
+    def skip(self, ticks: int, time: int):
+        super().skip(ticks, time)
+        self.read_time -= ticks
+
+    def _current_time(self) -> int:
+        return self.simulation_time if self.clock is None else self.clock()
+
+    def _take_snapshot(self):
+        """Calcula los valores de los puertos en la última escritura."""
+
+        time = self._snapshot_time
+        if time is None:
+            return
+        self._snapshot_time = None
+        value_after = Wire.value_after
+        self._received, self._sent = [], []
+        for wires, received, sent in zip(
+            self._wires, self._received_states, self._sent_states
+        ):
+            if wires is None:
+                self._received.append(None)
+                self._sent.append(None)
+            else:
+                self._received.append(
+                    value_after(received[0], received[1], time - received[2])
+                )
+                self._sent.append(
+                    value_after(sent[0], sent[1], time - sent[2])
+                )
+
+    def port_written(self, port: Port, index: int):
+        return partial(self._port_written, port, index)
+
+    def _port_written(self, port: Port, index: int):
+        if self.read_time == 0:
+            self.read_time = self.config.signal_time
+        if port.cable is not None:
+            time = self._current_time()
+            value = port.read()
+            wire = self._wires[index][0]
+            self._received_states[index] = (
+                wire.value,
+                wire.time_to_reset,
+                time,
+            )
+
+            for i, p in enumerate(self._port_list):
+                if i != index and p.cable is not None:
+                    p.write(value)
+                    wire = self._wires[i][1]
+                    self._sent_states[i] = (
+                        wire.value,
+                        wire.time_to_reset,
+                        time,
+                    )
+            self._snapshot_time = time
+
+    def port_connection_changed(self, port: Port, index: int):
+        return partial(self._port_connection_changed, port, index)
+
+    def _port_connection_changed(self, port: Port, index: int):
+        # Los valores de la última escritura no incluyen el cambio
+        self._take_snapshot()
+        if port.cable is None:
+            self._wires[index] = None
+            # Los frames que llegaban por el puerto no terminarán, los que
+            # se repetían por los demás puertos terminan con colisión
+            cut = [s for s in self._forwards if s.target is port]
+            for source in cut:
+                for forward, p, cable in self._forwards.pop(source):
+                    forward.collided = True
+                    cable.finish(p, forward)
+            return
+        time = self._current_time()
+        received, sent = self._wires[index] = port.cable.wires(port)
+        self._received_states[index] = (
+            received.value,
+            received.time_to_reset,
+            time,
+        )
+        self._sent_states[index] = (sent.value, sent.time_to_reset, time)
+
+    def port_transmitted(self, port: Port):
+        return partial(self._port_transmitted, port)
+
+    def _port_transmitted(
+        self, port: Port, transmission: Transmission, started: bool
+    ):
+        if not started:
+            forwards = self._forwards.pop(transmission, [])
+            for forward, p, cable in forwards:
+                if transmission.collided:
+                    forward.collided = True
+                cable.finish(p, forward)
+            return
+
+        if transmission in self._forwards:
+            # The incoming frame collided after it started
+            for forward, _, _ in self._forwards[transmission]:
+                forward.collide()
+            return
+
+        collided = bool(self._forwards)
+        if collided:
+            transmission.collided = True
+            for source, forwards in self._forwards.items():
+                source.collided = True
+                for forward, _, _ in forwards:
+                    forward.collide()
+
+        forwards = []
+        for p in self.ports.values():
+            if p != port and p.cable is not None:
+                forward = Transmission(transmission.bits, transmission)
+                forward.collided = collided
+                p.cable.transmit(p, forward)
+                forwards.append((forward, p, p.cable))
+        self._forwards[transmission] = forwards
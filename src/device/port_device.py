@@ -1,10 +1,14 @@
+from functools import partial
 from typing import Dict, List
-from pathlib import Path
 from physical_layer.port import Port
 from physical_layer.physical_layer import PhysicalLayer
+from physical_layer.frame_layer import FramePhysicalLayer
 from physical_layer.wire import Duplex
-from physical_layer.bit import VoltageDecodification as VD
-from datalink_layer.frame import Frame
+from physical_layer.bit import BitBuffer, VoltageDecodification as VD
+from config import Config, DEFAULT_CONFIG
+from log_sink import format_port_row, port_table_header
+from datalink_layer.frame import Frame, FrameParser
+from datalink_layer.mac_table import MacTable
 from .device import Device
 
 
@@ -17,48 +21,60 @@ class PortDevice(Device):
         Nombre del dispositivo
     ports_count : int
         Cantidad de puertos
-    signal_time : int
-        ``Signal time`` de la simulación
+    config : Config, optional
+        Configuración de la simulación.
+
+    Con ``transmission_mode`` igual a ``frame`` en la configuración, los
+    puertos transmiten frames completos con ``FramePhysicalLayer`` y no se
+    registran logs por bit.
     """
 
-    def __init__(self, name: str, ports_count: int):
+    def __init__(
+        self, name: str, ports_count: int, config: Config = DEFAULT_CONFIG
+    ):
         ports = {}
+        self.config = config
+        self.transmission_mode = config.transmission_mode
         self.physical_layers = {}
-        self.ports_buffer = {}
+        self.frame_parsers: Dict[str, FrameParser] = {}
         for i in range(ports_count):
             port = Port(f"{name}_{i+1}")
             ports[f"{name}_{i+1}"] = port
             self.physical_layers[f"{name}_{i+1}"] = self.create_physical_layer(
                 port
             )
-            self.ports_buffer[f"{name}_{i+1}"] = []
-        self.mac_table: Dict[int, str] = {}
-        super().__init__(name, ports)
+            self.frame_parsers[f"{name}_{i+1}"] = FrameParser()
+        self.mac_table = MacTable(config.mac_table_size, config.mac_aging_time)
+        super().__init__(name, ports, config)
 
     @property
     def is_active(self):
         """bool : Estado del switch"""
         return any([pl.is_active for pl in self.physical_layers.values()])
 
-    def save_log(self, path=""):
-        output_folder = Path(path)
-        output_folder.mkdir(parents=True, exist_ok=True)
-        output_path = output_folder / Path(f"{self.name}.txt")
-        with open(str(output_path), "w+") as file:
-            header = f'| {"Time (ms)": ^10} |'
-            for port in self.ports.keys():
-                header += f" {port: ^11} |"
-            header_len = len(header)
-            header += f'\n| {"": ^10} |'
-            for port in self.ports.keys():
-                header += f' {"Rece . Sent": ^11} |'
-            file.write(f'{"-" * header_len}\n')
-            file.write(f"{header}\n")
-            file.write(f'{"-" * header_len}\n')
-            file.write("\n".join(self.logs))
-            file.write(f'\n{"-" * header_len}\n')
+    def log_header(self) -> str:
+        return port_table_header(self.ports)
 
     def special_log(self, time: int, received: List[VD], sent: List[VD]):
+        """
+        Registra los valores de los puertos en un tiempo dado.
+
+        Parameters
+        ----------
+        time : int
+            Timepo de ejecución de la simulación.
+        received : List[VD]
+            Lista de bits recibidos por cada puerto (``None`` si el puerto
+            está desconectado).
+        sent : List[VD]
+            Lista de bits enviados por cada puerto.
+        """
+
+        self.log_sink.write_ports(self, time, received, sent)
+
+    def format_port_log(
+        self, time: int, received: List[VD], sent: List[VD]
+    ) -> str:
         """
         Representación especial para los logs de los switch.
 
@@ -66,19 +82,18 @@ class PortDevice(Device):
         ----------
         time : int
             Timepo de ejecución de la simulación.
-        received : List[int]
+        received : List[VD]
             Lista de bits recibidos por cada puerto.
-        sent : List[int]
+        sent : List[VD]
             Lista de bits enviados por cada puerto.
+
+        Returns
+        -------
+        str
+            Fila de la tabla de logs.
         """
 
-        log_msg = f"| {time: ^10} |"
-        for bit_re, bit_se in zip(received, sent):
-            if bit_re == "-" and bit_se == "-":
-                log_msg += f' {"---" : ^11} |'
-            else:
-                log_msg += f" {bit_re :>4} . {bit_se: <4} |"
-        self.logs.append(log_msg)
+        return format_port_row(time, received, sent)
 
     def broadcast(self, from_port, data):
         """Envia un frame por todos los puertos.
@@ -87,7 +102,7 @@ class PortDevice(Device):
         ----------
         from_port : str
             Puerto del cual se transmite la información.
-        data : List[List[int]]
+        data : List[BitBuffer]
             Frame a ser enviado.
         """
 
@@ -103,6 +118,16 @@ class PortDevice(Device):
         for pl in self.physical_layers.values():
             pl.update()
 
+    def next_update(self):
+        ticks = [pl.next_update() for pl in self.physical_layers.values()]
+        ticks = [t for t in ticks if t is not None]
+        return min(ticks) if ticks else None
+
+    def skip(self, ticks: int, time: int):
+        super().skip(ticks, time)
+        for pl in self.physical_layers.values():
+            pl.skip(ticks)
+
     def on_frame_received(self, frame: Frame, port: str) -> None:
         """Este método se ejecuta cada vez que se recibe un frame en
         uno de los puertos.
@@ -115,27 +140,26 @@ class PortDevice(Device):
             Puerto por el cual llegó el frame.
         """
 
-    def handle_buffer_data(self, port: str) -> None:
-        """Se encarga de procesar los datos en el buffer de un puerto.
+    def handle_buffer_data(self, port: str, bit: VD) -> None:
+        """Añade un bit al frame en construcción de un puerto y lo procesa
+        si queda completo.
 
         Parameters
         ----------
         port : str
             Nombre del puerto
+        bit : VD
+            Bit recibido
         """
-        data = self.ports_buffer[port]
 
-        frame = Frame(data)
-        if not frame.is_valid:
-            return
-
-        self.on_frame_received(frame, port)
-        self.ports_buffer[port] = []
+        frame = self.frame_parsers[port].push(bit)
+        if frame is not None:
+            self.on_frame_received(frame, port)
 
     def get_port_value(self, port_name: str, received: bool = True):
         """
         Devuelve el valor del cable conectado a un puerto dado. En caso de no
-        tener un cable conectado devuelve ``'-'``.
+        tener un cable conectado devuelve ``None``.
 
         Parameters
         ----------
@@ -144,11 +168,9 @@ class PortDevice(Device):
         """
 
         port = self.ports[port_name]
-        bit = None
-        if port.cable is not None:
-            bit = port.read(received)
-
-        return str(bit) if bit is not None else "-"
+        if port.cable is None:
+            return None
+        return port.read(received)
 
     def receive_on_port(self, port: str, bit: VD):
         """Guarda el bit recibido en un puerto y procesa los datos del mismo.
@@ -161,21 +183,37 @@ class PortDevice(Device):
             Bit recibido
         """
 
-        received = [self.get_port_value(p) for p in self.ports]
-        sent = [self.get_port_value(p, False) for p in self.ports]
-        self.special_log(self.simulation_time, received, sent)
+        if self.log_sink.captures(self, self.simulation_time):
+            received = [self.get_port_value(p) for p in self.ports]
+            sent = [self.get_port_value(p, False) for p in self.ports]
+            self.special_log(self.simulation_time, received, sent)
 
         if bit == VD.NULL or bit == VD.COLLISION:
             return
 
-        self.ports_buffer[port].append(bit)
-        self.handle_buffer_data(port)
+        self.handle_buffer_data(port, bit)
+
+    def receive_frame_on_port(self, port: str, bits: BitBuffer):
+        """Procesa un paquete completo recibido en un puerto en el modo de
+        transmisión ``frame``.
+
+        Parameters
+        ----------
+        port : str
+            Nombre del puerto.
+        bits : BitBuffer
+            Bits recibidos
+        """
+
+        for frame in self.frame_parsers[port].extend(bits):
+            self.on_frame_received(frame, port)
 
     def sent_on_port(self, port: str, bit: VD):
         """Just log when sent"""
-        received = [self.get_port_value(p) for p in self.ports]
-        sent = [self.get_port_value(p, False) for p in self.ports]
-        self.special_log(self.simulation_time, received, sent)
+        if self.log_sink.captures(self, self.simulation_time):
+            received = [self.get_port_value(p) for p in self.ports]
+            sent = [self.get_port_value(p, False) for p in self.ports]
+            self.special_log(self.simulation_time, received, sent)
 
     def create_physical_layer(self, port):
         """Crea un ``PhysicalLayer``.
@@ -191,13 +229,18 @@ class PortDevice(Device):
             ``PhysicalLayer`` creado.
         """
 
-        pl = PhysicalLayer(port)
+        if self.transmission_mode == "frame":
+            pl = FramePhysicalLayer(port, self.config)
+            pl.on_receive_callbacks.append(
+                partial(self.receive_frame_on_port, port.name)
+            )
+            return pl
+
+        pl = PhysicalLayer(port, self.config)
         pl.on_receive_callbacks.append(
-            lambda bit: self.receive_on_port(port.name, bit)
-        )
-        pl.on_send_callbacks.append(
-            lambda bit: self.sent_on_port(port.name, bit)
+            partial(self.receive_on_port, port.name)
         )
+        pl.on_send_callbacks.append(partial(self.sent_on_port, port.name))
         return pl
 
     def connect(self, cable: Duplex, port_name: str):
@@ -207,6 +250,24 @@ class PortDevice(Device):
 
         port.connect(cable)
 
+    def seed_backoff(self, seed: int):
+        """
+        Inicializa los generadores de las esperas tras una colisión de los
+        puertos en el modo ``frame`` (ver ``FramePhysicalLayer.seed``).
+
+        Parameters
+        ----------
+        seed : int
+            Semilla común a toda la red.
+        """
+
+        for pl in self.physical_layers.values():
+            if isinstance(pl, FramePhysicalLayer):
+                pl.seed(seed)
+
     def disconnect(self, port_name: str):
-        self.ports_buffer[list(self.ports.keys()).index(port_name)] = []
-        self.ports[port_name].disconnect()
+        self.frame_parsers[port_name].reset()
+        if self.transmission_mode == "frame":
+            self.physical_layers[port_name].disconnect()
+        else:
+            self.ports[port_name].disconnect()
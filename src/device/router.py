@@ -1,11 +1,17 @@
+from config import Config, DEFAULT_CONFIG
 from network_layer.ip_sender import IPPacketSender
 from datalink_layer.frame import Frame
 from network_layer.ip import IPPacket, IP
+from network_layer.link_state import LINK_STATE_PROTOCOL, LinkStateRouting
+from physical_layer.bit import BitBuffer
+from network_layer.route_trie import PrefixTrie, prefix_length
 from utils import (
     from_number_to_bit_data,
-    from_str_to_bin,
+    from_str_to_bit_data,
 )
-from typing import List, Union
+from bisect import bisect_right
+from itertools import count
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 
 class Route:
@@ -36,15 +42,50 @@ class Route:
 
 
 class RouteTable:
-    """Tabla de rutas"""
+    """
+    Tabla de rutas.
+
+    Las rutas se guardan en un ``PrefixTrie`` según el prefijo que define su
+    máscara, por lo que añadir, eliminar y buscar una ruta recorre a lo sumo
+    32 nodos. Tiene prioridad la ruta de mayor máscara y, a igual máscara,
+    la primera añadida. Las rutas cuya máscara no es un prefijo contiguo se
+    guardan aparte y se revisan de forma lineal.
+    """
 
     def __init__(self) -> None:
-        self.routes: List[Route] = []
+        self._route_trie = PrefixTrie()
+        # (-máscara, orden, ruta) de las rutas que no están en el trie
+        self._other_routes: List[Tuple[int, int, Route]] = []
+        self._route_order = count()
+
+    @property
+    def routes(self) -> List[Route]:
+        """List[Route] : Rutas de la tabla ordenadas por prioridad."""
+
+        entries = [
+            (-route.mask.raw_value, order, route)
+            for _, _, (order, route) in self._route_trie
+        ]
+        entries += self._other_routes
+        entries.sort(key=lambda e: e[:2])
+        return [route for _, _, route in entries]
 
     def reset_routes(self) -> None:
         """Limpia la tabla de rutas."""
 
-        self.routes.clear()
+        self._route_trie.clear()
+        self._other_routes.clear()
+
+    @staticmethod
+    def _route_prefix(route: Route) -> int:
+        """Longitud del prefijo de una ruta o -1 si no puede guardarse en
+        el trie."""
+
+        mask = route.mask.raw_value
+        if route.destination_ip.raw_value & ~mask:
+            # Nunca coincide con ningún IP
+            return -1
+        return prefix_length(mask)
 
     def add_route(self, route: Route) -> None:
         """
@@ -56,8 +97,18 @@ class RouteTable:
             Ruta a añadir.
         """
 
-        self.routes.append(route)
-        self.routes.sort(key=lambda x: x.mask.raw_value, reverse=True)
+        order = next(self._route_order)
+        length = self._route_prefix(route)
+        if length >= 0:
+            self._route_trie.insert(
+                route.destination_ip.raw_value, length, (order, route)
+            )
+        else:
+            entry = (-route.mask.raw_value, order, route)
+            index = bisect_right(
+                [e[:2] for e in self._other_routes], entry[:2]
+            )
+            self._other_routes.insert(index, entry)
 
     def remove_route(self, route: Route) -> None:
         """
@@ -69,8 +120,19 @@ class RouteTable:
             Ruta a eliminar.
         """
 
-        if route in self.routes:
-            self.routes.remove(route)
+        length = self._route_prefix(route)
+        if length >= 0:
+            self._route_trie.remove(
+                route.destination_ip.raw_value,
+                length,
+                lambda entry: entry[1] == route,
+            )
+            return
+
+        for i, (_, _, other) in enumerate(self._other_routes):
+            if other == route:
+                del self._other_routes[i]
+                return
 
     def get_enrouting(self, ip: IP) -> Union[Route, None]:
         """
@@ -87,18 +149,183 @@ class RouteTable:
             Ruta obtenida. None en caso de no existir ninguna ruta.
         """
 
-        for route in self.routes:
-            if route.enroute(ip):
-                return route
-        return None
+        _, entries = self._route_trie.longest_match(ip.raw_value)
+        best = entries[0][1] if entries else None
+
+        if self._other_routes:
+            best_mask = best.mask.raw_value if best is not None else -1
+            for neg_mask, _, route in self._other_routes:
+                if -neg_mask <= best_mask:
+                    break
+                if route.enroute(ip):
+                    return route
+        return best
+
+
+class ForwardingCache:
+    """
+    Decisiones de enrutamiento recientes de un router.
+
+    Guarda para cada IP destino la ruta elegida, el puerto de salida, el IP
+    del próximo salto, su mac (``None`` si aún no se conoce) y el tiempo en
+    el que expira la mac. Cuando se llena se descarta la entrada más
+    antigua.
+
+    Parameters
+    ----------
+    size : int
+        Cantidad máxima de entradas. Con ``0`` no se guarda ninguna.
+
+    Attributes
+    ----------
+    hits : int
+        Cantidad de búsquedas que encontraron una entrada.
+    misses : int
+        Cantidad de búsquedas que no encontraron una entrada.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.entries: Dict[int, tuple] = {}
+        # IPs destino de las entradas de cada ruta y de cada próximo salto
+        self._by_route: Dict[tuple, Set[int]] = {}
+        self._by_next_hop: Dict[IP, Set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ip: IP) -> Optional[tuple]:
+        """
+        Devuelve la entrada de un IP destino, ``(ruta, puerto, próximo
+        salto, mac, expira)``, o ``None`` si no está guardada.
+        """
+
+        entry = self.entries.get(ip.raw_value)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, ip: IP, entry: tuple) -> None:
+        """Guarda la entrada de un IP destino."""
+
+        if self.size <= 0:
+            return
+        self._remove(ip.raw_value)
+        if len(self.entries) >= self.size:
+            self._remove(next(iter(self.entries)))
+        self.entries[ip.raw_value] = entry
+        if entry[0] is not None:
+            key = _route_key(entry[0])
+            self._by_route.setdefault(key, set()).add(ip.raw_value)
+        self._by_next_hop.setdefault(entry[2], set()).add(ip.raw_value)
+
+    def _remove(self, ip: int) -> None:
+        entry = self.entries.pop(ip, None)
+        if entry is None:
+            return
+        if entry[0] is not None:
+            _discard(self._by_route, _route_key(entry[0]), ip)
+        _discard(self._by_next_hop, entry[2], ip)
+
+    def invalidate_prefix(self, destination: int, mask: int) -> None:
+        """Descarta las entradas de los IPs que coinciden con una ruta."""
+
+        for ip in [ip for ip in self.entries if ip & mask == destination]:
+            self._remove(ip)
+
+    def invalidate_route(self, route: Route) -> None:
+        """Descarta las entradas que usan una ruta."""
+
+        for ip in list(self._by_route.get(_route_key(route), ())):
+            self._remove(ip)
+
+    def invalidate_next_hop(self, ip: IP) -> None:
+        """Descarta las entradas cuyo próximo salto es un IP dado."""
+
+        for dest in list(self._by_next_hop.get(ip, ())):
+            self._remove(dest)
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+
+        self.entries.clear()
+        self._by_route.clear()
+        self._by_next_hop.clear()
+
+
+def _route_key(route: Route) -> tuple:
+    """Campos que comparan las rutas, ``Route`` no es hashable."""
+
+    return route.destination_ip, route.mask, route.gateway, route.interface
+
+
+def _discard(index: Dict, key, ip: int) -> None:
+    ips = index.get(key)
+    if ips is not None:
+        ips.discard(ip)
+        if not ips:
+            del index[key]
 
 
 class Router(IPPacketSender, RouteTable):
-    """Representa un router en la simulación."""
+    """Representa un router en la simulación.
+
+    Las decisiones de enrutamiento se guardan en ``forwarding_cache``, que
+    se invalida al cambiar las rutas o la mac de un próximo salto.
+
+    Con ``routing`` igual a ``link_state`` en la configuración el router
+    ejecuta el protocolo de estado de enlace en ``link_state``, que añade
+    sus rutas a las de la tabla.
+    """
+
+    # Los hosts no participan en el protocolo de enrutamiento
+    runs_routing_protocol = True
+
+    def __init__(
+        self, name: str, ports_count: int, config: Config = DEFAULT_CONFIG
+    ):
+        RouteTable.__init__(self)
+        self.forwarding_cache = ForwardingCache(config.forwarding_cache_size)
+        super().__init__(name, ports_count, config)
+        self.link_state = None
+        if config.routing == "link_state" and self.runs_routing_protocol:
+            self.link_state = LinkStateRouting(self, config)
+
+    def update(self, time: int) -> None:
+        super().update(time)
+        if self.link_state is not None:
+            self.link_state.update(time)
+
+    def next_update(self):
+        ticks = super().next_update()
+        if self.link_state is None:
+            return ticks
+        wake = self.link_state.next_update(self.simulation_time)
+        if wake is None or ticks is None:
+            return ticks if wake is None else wake
+        return min(ticks, wake)
+
+    def add_route(self, route: Route) -> None:
+        super().add_route(route)
+        self.forwarding_cache.invalidate_prefix(
+            route.destination_ip.raw_value, route.mask.raw_value
+        )
+
+    def remove_route(self, route: Route) -> None:
+        super().remove_route(route)
+        self.forwarding_cache.invalidate_route(route)
+
+    def reset_routes(self) -> None:
+        super().reset_routes()
+        self.forwarding_cache.clear()
 
-    def __init__(self, name: str, ports_count: int):
-        self.routes = []
-        super().__init__(name, ports_count)
+    def update_ip_table(self, ip: IP, mac: BitBuffer) -> None:
+        super().update_ip_table(ip, mac)
+        self.forwarding_cache.invalidate_next_hop(ip)
+
+    def arp_entry_removed(self, ip: IP) -> None:
+        self.forwarding_cache.invalidate_next_hop(ip)
 
     def enroute(self, packet: IPPacket, port: str, frame: Frame = None):
         """
@@ -114,21 +341,51 @@ class Router(IPPacketSender, RouteTable):
             Frame que contiene al paquete, por defecto None.
         """
 
-        route = self.get_enrouting(packet.to_ip)
-
-        if route is None and frame is not None:
-            data = IPPacket.no_dest_host(
-                packet.from_ip, self.ips[port]
-            ).bit_data
-            super().send_frame(
-                from_number_to_bit_data(frame.from_mac, 16), data, port
-            )
+        entry = self.forwarding_cache.get(packet.to_ip)
+        if entry is None:
+            entry = self._forwarding_decision(packet.to_ip)
+            self.forwarding_cache.put(packet.to_ip, entry)
+        route, out_port, to_ip, mac, expires = entry
+
+        if route is None:
+            if frame is not None:
+                data = IPPacket.no_dest_host(
+                    packet.from_ip, self.ips[port]
+                ).bit_data
+                super().send_frame(
+                    from_number_to_bit_data(frame.from_mac, 16), data, port
+                )
             return
 
+        if mac is not None and self.simulation_time < expires:
+            self.send_frame(mac, packet.bit_data, out_port)
+        else:
+            super().send_ip_packet(packet, out_port, to_ip)
+
+    def _forwarding_decision(self, ip: IP) -> tuple:
+        """
+        Busca la ruta de un IP destino.
+
+        Returns
+        -------
+        tuple
+            Ruta, puerto de salida, IP del próximo salto, su mac si se
+            conoce y el tiempo en el que expira. Si no hay ruta los demás
+            valores son ``None``.
+        """
+
+        route = self.get_enrouting(ip)
+        if route is None:
+            return None, None, None, None, None
+
         to_ip = route.gateway
         if route.gateway.raw_value == 0:
-            to_ip = packet.to_ip
-        super().send_ip_packet(packet, f"{self.name}_{route.interface}", to_ip)
+            to_ip = ip
+        mac, expires = self.ip_table.lookup(to_ip, self.simulation_time) or (
+            None,
+            None,
+        )
+        return route, f"{self.name}_{route.interface}", to_ip, mac, expires
 
     def on_ip_packet_received(
         self, packet: IPPacket, port: int = 1, frame: Frame = None
@@ -146,32 +403,33 @@ class Router(IPPacketSender, RouteTable):
             Frame que contiene el paquete, por defecto None.
         """
 
+        if (
+            self.link_state is not None
+            and packet.protocol_number == LINK_STATE_PROTOCOL
+        ):
+            self.link_state.receive(packet, port, frame)
+            return
         self.enroute(packet, port, frame)
 
     def on_frame_received(self, frame: Frame, port: str) -> None:
         print(f"[{self.simulation_time:>6}] {self.name:>18}  received:", frame)
-        mac_dest = from_number_to_bit_data(frame.to_mac, 16)
-        mac_dest_str = "".join(map(str, mac_dest))
         mac_origin = from_number_to_bit_data(frame.from_mac, 16)
         data_s = frame.frame_data_size
         data = frame.data
 
         # ARPQ protocol
         if data_s / 8 == 8:
-            arpq = from_str_to_bin("ARPQ")
-            ip = "".join(map(str, data[32:64]))
-            if mac_dest_str == "1" * 16:
-                arpq_data = "".join(map(str, data[:32]))
-                ip_values = [i.str_binary for i in self.ips.values()]
-                if arpq_data.endswith(arpq) and ip in ip_values:
+            arpq = from_str_to_bit_data("ARPQ")
+            ip = data[32:64]
+            if frame.to_mac == 0xFFFF:
+                ip_values = [i.raw_value for i in self.ips.values()]
+                if data[:32] == arpq and ip.value in ip_values:
                     self.respond_arpq(mac_origin, port)
             else:
-                new_ip = IP.from_bin(ip)
-                self.ip_table[str(new_ip)] = mac_origin
-                if str(new_ip) in self.waiting_for_arpq:
-                    for data in self.waiting_for_arpq[str(new_ip)]:
-                        self.send_frame(mac_origin, data, port)
-                    self.waiting_for_arpq[str(new_ip)] = []
+                new_ip = IP.from_bit_data(ip)
+                self.update_ip_table(new_ip, mac_origin)
+                for data in self.waiting_for_arpq.pop(new_ip, ()):
+                    self.send_frame(mac_origin, data, port)
             return
 
         valid_packet, packet = IPPacket.parse(frame.data)
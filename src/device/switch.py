@@ -1,20 +1,64 @@
+from config import Config, DEFAULT_CONFIG
 from .port_device import PortDevice
 from datalink_layer.frame import Frame
 
 
 class Switch(PortDevice):
-    """Representa un switch en la simulación."""
+    """Representa un switch en la simulación.
+
+    Las entradas de ``mac_table`` expiran luego de ``mac_aging_time`` y se
+    guardan a lo sumo ``mac_table_size``.
+
+    Attributes
+    ----------
+    unicast_forwards : int
+        Cantidad de frames enviados por un solo puerto.
+    floods : int
+        Cantidad de frames enviados por todos los puertos.
+    """
+
+    def __init__(
+        self, name: str, ports_count: int, config: Config = DEFAULT_CONFIG
+    ):
+        self.unicast_forwards = 0
+        self.floods = 0
+        super().__init__(name, ports_count, config)
+
+    def stats(self) -> dict:
+        """
+        Estadísticas de la tabla de macs y del reenvío de frames.
+
+        Returns
+        -------
+        dict
+            Entradas aprendidas, descartadas y expiradas de la tabla, frames
+            enviados por un solo puerto, frames enviados por todos y la
+            proporción de estos últimos.
+        """
+
+        forwarded = self.unicast_forwards + self.floods
+        return {
+            "learned": self.mac_table.learned,
+            "evictions": self.mac_table.evictions,
+            "expired": self.mac_table.expired,
+            "unicast_forwards": self.unicast_forwards,
+            "floods": self.floods,
+            "flood_ratio": self.floods / forwarded if forwarded else 0.0,
+        }
 
     def on_frame_received(self, frame: Frame, port: int) -> None:
         print(
             f'[{self.simulation_time:>6}] {self.name + " - " + str(port):>18}  received: {frame}'
         )
-        self.mac_table[frame.from_mac] = port
+        time = self.simulation_time
+        self.mac_table.learn(frame.from_mac, port, time)
 
-        if frame.to_mac == 65_535 or frame.to_mac not in self.mac_table:
+        out_port = None
+        if frame.to_mac != 65_535:
+            out_port = self.mac_table.get(frame.to_mac, time)
+        if out_port is None:
+            self.floods += 1
             self.broadcast(port, [frame.bit_data])
         else:
-            self.physical_layers[self.mac_table[frame.to_mac]].send(
-                [frame.bit_data]
-            )
-        self.ports_buffer[port] = []
+            self.unicast_forwards += 1
+            self.physical_layers[out_port].send([frame.bit_data])
@@ -1,4 +1,5 @@
-from typing import List
+from heapq import heappop, heappush
+from typing import Iterable, Iterator, List
 from pathlib import Path
 from instructions import (
     CreateHostIns,
@@ -16,7 +17,7 @@ from instructions import (
     PingIns,
     RouteIns,
 )
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 from network_layer.ip import IP
 
 
@@ -66,7 +67,7 @@ def _parse_single_inst(inst_text: str):
 
     elif inst_name == "send":
         host_name = temp_line[2]
-        data = [VD(int(bit)) for bit in temp_line[3]]
+        data = BitBuffer.from_str(temp_line[3])
         return SendIns(inst_time, host_name, data)
 
     elif inst_name == "mac":
@@ -75,7 +76,7 @@ def _parse_single_inst(inst_text: str):
         if ":" in host_name:
             host_name, interface_str = host_name.split(":")
             interface = int(interface_str)
-        address = [VD(int(i)) for i in _to_binary(temp_line[3])]
+        address = BitBuffer.from_str(_to_binary(temp_line[3]))
         return MacIns(inst_time, host_name, interface, address)
 
     elif inst_name == "ip":
@@ -90,25 +91,20 @@ def _parse_single_inst(inst_text: str):
 
     elif inst_name == "send_frame":
         host_name = temp_line[2]
-        mac = [VD(int(i)) for i in _to_binary(temp_line[3])]
-        data = [VD(int(i)) for i in _to_binary(temp_line[4])]
+        mac = BitBuffer.from_str(_to_binary(temp_line[3]))
+        data = BitBuffer.from_str(_to_binary(temp_line[4]))
         return SendFrameIns(inst_time, host_name, mac, data)
 
     elif inst_name == "send_packet":
         host_name = temp_line[2]
         ip = IP.from_str(temp_line[3])
-        data = [VD(int(i)) for i in _to_binary(temp_line[4])]
+        data = BitBuffer.from_str(_to_binary(temp_line[4]))
         return SendIPPackage(inst_time, host_name, ip, data)
 
     elif inst_name == "ping":
         host_name = temp_line[2]
         ip = IP.from_str(temp_line[3])
-        return [
-            PingIns(inst_time, host_name, ip),
-            PingIns(inst_time + 100, host_name, ip),
-            PingIns(inst_time + 200, host_name, ip),
-            PingIns(inst_time + 300, host_name, ip),
-        ]
+        return PingIns(inst_time, host_name, ip, repeat=4)
 
     elif inst_name == "route":
         action = temp_line[2]
@@ -130,6 +126,68 @@ def _parse_single_inst(inst_text: str):
         return DisconnectIns(inst_time, port_name)
 
 
+def _iter_parsed(instr_lines: Iterable[str]) -> Iterator[Instruction]:
+    """
+    Parsea las líneas de un script a medida que se consumen.
+
+    Cada instrucción recibe como ``order`` ``(0, posición)`` en el script,
+    de modo que las instrucciones de un mismo tiempo se ejecutan en ese
+    orden y antes de las programadas de otra forma (ver
+    ``Simulation.schedule``).
+    """
+
+    order = 0
+    for line in instr_lines:
+        if line == "\n" or line.startswith("#") or line.startswith(" "):
+            continue
+        inst = _parse_single_inst(line)
+        insts = inst if isinstance(inst, list) else [inst]
+        for inst in insts:
+            inst.order = (0, order)
+            order += 1
+            yield inst
+
+
+def _sort_by_time(
+    instructions: Iterable[Instruction], window: int
+) -> Iterator[Instruction]:
+    """
+    Ordena por tiempo una secuencia de instrucciones casi ordenada,
+    reteniendo como máximo ``window`` instrucciones.
+
+    Raises
+    ------
+    ValueError
+        Si una instrucción aparece más de ``window`` posiciones después de
+        las que deben ejecutarse tras ella.
+    """
+
+    last_time = None
+
+    def check(inst: Instruction):
+        nonlocal last_time
+        if last_time is not None and inst.time < last_time:
+            raise ValueError(
+                f"Instruction at time {inst.time} is out of order "
+                f"(window of {window} instructions)."
+            )
+        last_time = inst.time
+        return inst
+
+    if window <= 0:
+        for inst in instructions:
+            yield check(inst)
+        return
+
+    heap = []
+    for inst in instructions:
+        heappush(heap, (inst.time, inst.order, inst))
+        if len(heap) > window:
+            yield check(heappop(heap)[2])
+    while heap:
+        yield check(heappop(heap)[2])
+
+
 def parse_instructions(instr_lines: List[str]):
     """
     Parsea una lista de instrucciones.
@@ -142,19 +200,11 @@ def parse_instructions(instr_lines: List[str]):
     Returns
     -------
     List[Instruction]
-        Lista de instrucciones.
+        Lista de instrucciones en el orden del texto. La simulación las
+        ordena por tiempo al programarlas.
     """
-    instructions = []
-    for line in instr_lines:
-        if line == "\n" or line.startswith("#") or line.startswith(" "):
-            continue
-        inst = _parse_single_inst(line)
-        if isinstance(inst, Instruction):
-            instructions.append(inst)
-        elif isinstance(inst, list):
-            instructions += inst
-    instructions.sort(key=lambda inst: inst.time)
-    return instructions
+
+    return list(_iter_parsed(instr_lines))
 
 
 def load_instructions(inst_path: str = "./script.txt"):
@@ -185,3 +235,47 @@ def load_instructions(inst_path: str = "./script.txt"):
         return parse_instructions(raw_inst)
     else:
         raise ValueError(f"Invalid path '{inst_path}'")
+
+
+def iter_instructions(
+    inst_path: str = "./script.txt", window: int = 0
+) -> Iterator[Instruction]:
+    """
+    Carga de forma perezosa las instrucciones de un archivo, en orden de
+    tiempo.
+
+    Las líneas se leen y parsean a medida que se consume el iterador, por
+    lo que la memoria usada depende de ``window`` y no del tamaño del
+    archivo. ``Simulation.start`` consume el iterador a medida que avanza
+    el tiempo simulado.
+
+    Parameters
+    ----------
+    inst_path : str
+        Ruta del archivo que contiene las instrucciones.
+    window : int, optional
+        Cantidad de instrucciones que se retienen para reordenar una entrada
+        casi ordenada. Con ``0`` (por defecto) la entrada debe estar
+        ordenada por tiempo y no se retiene ninguna.
+
+    Returns
+    -------
+    Iterator[Instruction]
+        Instrucciones ordenadas por tiempo.
+
+    Raises
+    ------
+    ValueError
+        Si la ruta del archivo es inválida o, al consumir el iterador, si
+        una instrucción está más desordenada de lo que permite ``window``.
+    """
+
+    path = Path(inst_path)
+    if not path.exists():
+        raise ValueError(f"Invalid path '{inst_path}'")
+
+    def read():
+        with open(str(path), "r") as file:
+            yield from _sort_by_time(_iter_parsed(file), window)
+
+    return read()
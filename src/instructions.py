@@ -1,8 +1,7 @@
 from __future__ import annotations
 import abc
-from typing import List
 
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 from network_layer.ip import IP
 from device import Host, Hub, Switch, Router, Route
 
@@ -16,11 +15,20 @@ class Instruction(metaclass=abc.ABCMeta):
     time : int
         Timepo en milisegundos en el que será ejecutada la instrucción en
         la simulación.
+
+    Attributes
+    ----------
+    order : Tuple[int, int]
+        Orden de la instrucción entre las que se ejecutan en el mismo
+        tiempo: ``(0, posición)`` para las líneas de un script, que asigna
+        el parser, y ``(1, n)`` para las demás, que asigna la simulación
+        al programarlas.
     """
 
     def __init__(self, time: int):
         super().__init__()
         self.time = time
+        self.order = None
 
     @abc.abstractmethod
     def execute(self, sim: "Simulation"):
@@ -52,7 +60,7 @@ class CreateHubIns(Instruction):
 
     def execute(self, sim: Simulation):
         print(f"Creating hub: {self.hub_name}")
-        hub = Hub(self.hub_name, self.ports_count)
+        hub = Hub(self.hub_name, self.ports_count, sim.config)
         sim.add_device(hub)
 
 
@@ -75,7 +83,7 @@ class CreateHostIns(Instruction):
 
     def execute(self, sim: "Simulation"):
         print(f"Creating host: {self.host_name}")
-        host = Host(self.host_name)
+        host = Host(self.host_name, sim.config)
         sim.add_device(host)
 
 
@@ -101,7 +109,7 @@ class CreateRouterIns(Instruction):
         print(
             f'[{self.time:>6}] Creating Router {self.router_name} with {self.ports_count} port{("s" if self.ports_count > 1 else "")}'
         )
-        router = Router(self.router_name, self.ports_count)
+        router = Router(self.router_name, self.ports_count, sim.config)
         sim.add_device(router)
 
 
@@ -139,11 +147,11 @@ class SendIns(Instruction):
         la simulación.
     host_name : str
         Nombre del host que enviará los datos.
-    data : List[int]
+    data : BitBuffer
         Datos a enviar.
     """
 
-    def __init__(self, time: int, host_name: str, data: List[VD]):
+    def __init__(self, time: int, host_name: str, data: BitBuffer):
         super().__init__(time)
         self.host_name = host_name
         self.data = data
@@ -194,13 +202,13 @@ class CreateSwitchIns(Instruction):
         self.ports_count = ports_count
 
     def execute(self, sim: "Simulation"):
-        switch = Switch(self.switch_name, self.ports_count)
+        switch = Switch(self.switch_name, self.ports_count, sim.config)
         sim.add_device(switch)
 
 
 class MacIns(Instruction):
     def __init__(
-        self, time: int, host_name: str, interface: int, address: List[int]
+        self, time: int, host_name: str, interface: int, address: BitBuffer
     ):
         super().__init__(time)
         self.host_name = host_name
@@ -229,7 +237,7 @@ class IPIns(Instruction):
 
 class SendFrameIns(Instruction):
     def __init__(
-        self, time: int, host_name: str, mac: List[VD], data: List[VD]
+        self, time: int, host_name: str, mac: BitBuffer, data: BitBuffer
     ):
         super().__init__(time)
         self.host_name = host_name
@@ -241,7 +249,9 @@ class SendFrameIns(Instruction):
 
 
 class SendIPPackage(Instruction):
-    def __init__(self, time: int, host_name: str, ip_dest: IP, data: List[VD]):
+    def __init__(
+        self, time: int, host_name: str, ip_dest: IP, data: BitBuffer
+    ):
         super().__init__(time)
         self.host_name = host_name
         self.ip = ip_dest
@@ -252,18 +262,51 @@ class SendIPPackage(Instruction):
 
 
 class PingIns(Instruction):
+    """
+    Instrucción para hacer ``ping`` a un IP.
+
+    Parameters
+    ----------
+    time : int
+        Timepo en milisegundos en el que será ejecutada la instrucción en
+        la simulación.
+    host_name : str
+        Nombre del host que hace ``ping``.
+    ip_dest : IP
+        IP destino.
+    repeat : int, optional
+        Cantidad de ``ping`` a enviar, por defecto 1. Cada repetición se
+        programa al ejecutarse la anterior.
+    interval : int, optional
+        Milisegundos entre repeticiones, por defecto 100.
+    """
+
     def __init__(
         self,
         time: int,
         host_name: str,
         ip_dest: IP,
+        repeat: int = 1,
+        interval: int = 100,
     ):
         super().__init__(time)
         self.host_name = host_name
         self.ip = ip_dest
+        self.repeat = repeat
+        self.interval = interval
 
     def execute(self, sim: "Simulation"):
         sim.ping_to(self.host_name, self.ip)
+        if self.repeat > 1:
+            next_ping = PingIns(
+                self.time + self.interval,
+                self.host_name,
+                self.ip,
+                self.repeat - 1,
+                self.interval,
+            )
+            next_ping.order = self.order
+            sim.schedule(next_ping)
 
 
 class RouteIns(Instruction):
@@ -0,0 +1,329 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+class CaptureFilter:
+    """
+    Selecciona qué dispositivos registran logs por bit en sus puertos y en
+    qué intervalo de tiempo.
+
+    Parameters
+    ----------
+    devices : Iterable[str], optional
+        Nombres de los dispositivos a registrar. Por defecto todos.
+    start : int, optional
+        Primer tiempo registrado. Por defecto desde el inicio.
+    end : int, optional
+        Último tiempo registrado. Por defecto hasta el final.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[str] = None,
+        start: int = None,
+        end: int = None,
+    ) -> None:
+        self.devices = None if devices is None else set(devices)
+        self.start = start
+        self.end = end
+
+    def __call__(self, device_name: str, time: int) -> bool:
+        if self.devices is not None and device_name not in self.devices:
+            return False
+        if self.start is not None and time < self.start:
+            return False
+        return self.end is None or time <= self.end
+
+
+class LogSink:
+    """
+    Destino de los logs de los dispositivos.
+
+    Guarda en memoria las líneas de cada dispositivo en ``device.logs`` y
+    las escribe al guardar el log.
+
+    Parameters
+    ----------
+    capture : CaptureFilter, optional
+        Filtro de los logs por bit de los puertos. Por defecto se registran
+        todos.
+    """
+
+    def __init__(self, capture: CaptureFilter = None) -> None:
+        self.capture = capture
+
+    def captures(self, device, time: int) -> bool:
+        """
+        Indica si se registran los logs por bit de los puertos de un
+        dispositivo en un tiempo dado.
+        """
+
+        return self.capture is None or self.capture(device.name, time)
+
+    def write(self, device, line: str):
+        """
+        Añade una línea al log de un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo que escribe el log.
+        line : str
+            Línea a escribir.
+        """
+
+        device.logs.append(line)
+
+    def write_ports(self, device, time: int, received: list, sent: list):
+        """
+        Registra los valores de los puertos de un dispositivo.
+
+        Parameters
+        ----------
+        device : PortDevice
+            Dispositivo que escribe el log.
+        time : int
+            Tiempo de ejecución de la simulación.
+        received : List[VD]
+            Bits recibidos por cada puerto, ``None`` si está desconectado.
+        sent : List[VD]
+            Bits enviados por cada puerto, ``None`` si está desconectado.
+        """
+
+        self.write(device, device.format_port_log(time, received, sent))
+
+    def close(self, device, path: str = ""):
+        """
+        Escribe el archivo de log de un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo cuyo log se guarda.
+        path : str
+            Carpeta donde se guarda el log.
+        """
+
+        output_path = _log_path(path, device)
+        header = device.log_header()
+        with open(str(output_path), "w+") as file:
+            file.write(format_table_start(header))
+            file.write("\n".join(device.logs))
+            file.write(format_table_end(header))
+
+    def finish(self):
+        """Se ejecuta al terminar la simulación, después de guardar los logs
+        de todos los dispositivos."""
+
+    def checkpoint(self, devices: Iterable) -> dict:
+        """
+        Estado de los archivos ya escritos al guardar un punto de control
+        de la simulación. Las líneas en memoria se guardan con el resto del
+        estado.
+
+        Parameters
+        ----------
+        devices : Iterable[Device]
+            Dispositivos de la simulación.
+
+        Returns
+        -------
+        dict
+            Tamaño de cada archivo escrito, ver ``restore``.
+        """
+
+        return {}
+
+    def restore(self, state: dict):
+        """
+        Recorta los archivos escritos después de un punto de control.
+
+        Parameters
+        ----------
+        state : dict
+            Estado devuelto por ``checkpoint``.
+        """
+
+        for path, size in state.items():
+            if os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def branch(self, state: dict, path: str):
+        """
+        Copia los archivos escritos hasta un punto de control a otra
+        carpeta, en la que continúan los logs de una copia de la simulación
+        (ver ``Simulation.fork``).
+
+        Parameters
+        ----------
+        state : dict
+            Estado devuelto por ``checkpoint``.
+        path : str
+            Carpeta de los logs de la copia.
+        """
+
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for file_path, size in state.items():
+            target = Path(path, Path(file_path).name)
+            with open(file_path, "rb") as source, open(target, "wb") as file:
+                file.write(source.read(size))
+
+
+class FileLogSink(LogSink):
+    """
+    Destino de logs que escribe en disco a medida que avanza la simulación.
+
+    Las líneas de cada dispositivo se acumulan hasta ``buffer_size`` y
+    luego se añaden a su archivo, por lo que la memoria usada no crece con
+    la duración de la simulación. Los archivos quedan iguales a los de
+    ``LogSink``.
+
+    Parameters
+    ----------
+    path : str
+        Carpeta donde se guardan los logs.
+    buffer_size : int, optional
+        Cantidad de líneas por dispositivo que se guardan en memoria antes
+        de escribirlas, por defecto ``1024``.
+    capture : CaptureFilter, optional
+        Filtro de los logs por bit de los puertos.
+    """
+
+    def __init__(
+        self,
+        path: str = "output",
+        buffer_size: int = 1024,
+        capture: CaptureFilter = None,
+    ) -> None:
+        super().__init__(capture)
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffers: Dict[str, List[str]] = {}
+        self._started = set()
+
+    def write(self, device, line: str):
+        buffer = self._buffers.setdefault(device.name, [])
+        buffer.append(line)
+        if len(buffer) >= self.buffer_size:
+            self.flush(device)
+
+    def flush(self, device):
+        """Escribe en disco las líneas pendientes de un dispositivo."""
+
+        buffer = self._buffers.pop(device.name, [])
+        started = device.name in self._started
+        if started and not buffer:
+            return
+
+        output_path = _log_path(self.path, device)
+        with open(str(output_path), "a" if started else "w+") as file:
+            if not started:
+                file.write(format_table_start(device.log_header()))
+            elif buffer:
+                file.write("\n")
+            file.write("\n".join(buffer))
+        self._started.add(device.name)
+
+    def close(self, device, path: str = None):
+        """
+        Termina el archivo de log de un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo cuyo log se guarda.
+        path : str, optional
+            Se ignora, los logs se guardan en la carpeta del ``FileLogSink``.
+        """
+
+        self.flush(device)
+        output_path = _log_path(self.path, device)
+        with open(str(output_path), "a") as file:
+            file.write(format_table_end(device.log_header()))
+        self._started.discard(device.name)
+
+    def checkpoint(self, devices: Iterable) -> dict:
+        return {
+            str(path): os.path.getsize(path)
+            for path in (
+                _log_path(self.path, device)
+                for device in devices
+                if device.name in self._started
+            )
+        }
+
+    def branch(self, state: dict, path: str):
+        super().branch(state, path)
+        self.path = path
+
+
+def port_table_header(ports: Iterable[str]) -> str:
+    """
+    Encabezado de la tabla de logs por bit de los puertos.
+
+    Parameters
+    ----------
+    ports : Iterable[str]
+        Nombres de los puertos.
+    """
+
+    ports = list(ports)
+    header = f'| {"Time (ms)": ^10} |'
+    for port in ports:
+        header += f" {port: ^11} |"
+    header += f'\n| {"": ^10} |'
+    for port in ports:
+        header += f' {"Rece . Sent": ^11} |'
+    return header
+
+
+def format_port_row(
+    time: int, received: list, sent: list, hub: bool = False
+) -> str:
+    """
+    Fila de la tabla de logs por bit de los puertos.
+
+    Parameters
+    ----------
+    time : int
+        Tiempo de ejecución de la simulación.
+    received : List[VD]
+        Bits recibidos por cada puerto, ``None`` si está desconectado.
+    sent : List[VD]
+        Bits enviados por cada puerto, ``None`` si está desconectado.
+    hub : bool, optional
+        Los hubs marcan un puerto como desconectado cuando no tiene valor
+        recibido, el resto de los dispositivos cuando no tiene ninguno de
+        los dos valores. Por defecto ``False``.
+    """
+
+    log_msg = f"| {time: ^10} |"
+    for bit_re, bit_se in zip(received, sent):
+        if bit_re is None and (hub or bit_se is None):
+            log_msg += f' {"---" : ^11} |'
+        else:
+            bit_re = "-" if bit_re is None else str(bit_re)
+            bit_se = "-" if bit_se is None else str(bit_se)
+            log_msg += f" {bit_re :>4} . {bit_se: <4} |"
+    return log_msg
+
+
+def _log_path(path: str, device) -> Path:
+    output_folder = Path(path)
+    output_folder.mkdir(parents=True, exist_ok=True)
+    return output_folder / Path(f"{device.name}.txt")
+
+
+def _rule(header: str) -> str:
+    return "-" * len(header.split("\n", 1)[0])
+
+
+def format_table_start(header: str) -> str:
+    """Comienzo de una tabla de logs con el encabezado dado."""
+    return f"{_rule(header)}\n{header}\n{_rule(header)}\n"
+
+
+def format_table_end(header: str) -> str:
+    """Fin de una tabla de logs con el encabezado dado."""
+    return f"\n{_rule(header)}\n"
@@ -1,17 +1,281 @@
 #! /usr/bin/env python3
 
+import argparse
 import sys
 
-from instruction_parser import load_instructions
+from branches import parse_branches, run_branch_script
+from instruction_parser import iter_instructions, load_instructions
+from partition import run_partitioned
+from replication import format_estimates, run_replicas
 from simulation import Simulation
+from sweep import format_summary, parse_grid, run_sweep
+
+
+def _add_window_arg(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help=(
+            "Read the script lazily, reordering up to WINDOW instructions. "
+            "Use 0 for scripts already sorted by time."
+        ),
+    )
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Network simulation.")
+    parser.add_argument(
+        "script_path",
+        nargs="?",
+        default="./script.txt",
+        help="Script with the simulation instructions.",
+    )
+    _add_window_arg(parser)
+    parser.add_argument(
+        "--regions",
+        type=int,
+        default=None,
+        help=(
+            "Split the network in up to REGIONS parts simulated in "
+            "parallel. Needs the frame transmission mode."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        default=None,
+        metavar="CHECKPOINT",
+        help=(
+            "Continue the simulation saved in CHECKPOINT. The script is "
+            "only read if the checkpoint was taken with --window."
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def _parse_sweep_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="net_sim.py sweep",
+        description=(
+            "Run a script once per combination of config values, in "
+            "parallel, and summarize the runs."
+        ),
+    )
+    parser.add_argument(
+        "script_path",
+        nargs="?",
+        default="./script.txt",
+        help="Script with the simulation instructions.",
+    )
+    parser.add_argument(
+        "-p",
+        "--param",
+        action="append",
+        default=[],
+        metavar="KEY=V1,V2",
+        help="Config key and the values to sweep. Can be repeated.",
+    )
+    parser.add_argument(
+        "--output",
+        default="output/sweep",
+        help="Folder for the runs and summary.csv.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes, one per core by default.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed the random numbers of every run.",
+    )
+    _add_window_arg(parser)
+    return parser.parse_args(argv)
+
+
+def _parse_replicate_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="net_sim.py replicate",
+        description=(
+            "Run a script with different seeds, in parallel, and report "
+            "the mean and confidence interval of each metric."
+        ),
+    )
+    parser.add_argument(
+        "script_path",
+        nargs="?",
+        default="./script.txt",
+        help="Script with the simulation instructions.",
+    )
+    parser.add_argument(
+        "-n",
+        "--replicas",
+        type=int,
+        default=30,
+        help="Maximum number of runs.",
+    )
+    parser.add_argument(
+        "--precision",
+        type=float,
+        default=None,
+        help=(
+            "Stop once every interval half-width is below this fraction "
+            "of its mean."
+        ),
+    )
+    parser.add_argument(
+        "-m",
+        "--metric",
+        action="append",
+        default=None,
+        help="Metric that must reach the precision, all by default.",
+    )
+    parser.add_argument(
+        "--min-replicas",
+        type=int,
+        default=5,
+        help="Runs to finish before checking the precision.",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="Confidence level: 0.9, 0.95 or 0.99.",
+    )
+    parser.add_argument(
+        "--output",
+        default="output/replicas",
+        help="Folder for the runs and replicas.csv.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes, one per core by default.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the first run, run i uses SEED + i.",
+    )
+    _add_window_arg(parser)
+    return parser.parse_args(argv)
+
+
+def _parse_branch_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="net_sim.py branch",
+        description=(
+            "Run a script up to a time once, then continue it with each "
+            "branch's instructions in parallel."
+        ),
+    )
+    parser.add_argument(
+        "script_path",
+        nargs="?",
+        default="./script.txt",
+        help="Script with the instructions shared by every branch.",
+    )
+    parser.add_argument(
+        "--at",
+        type=int,
+        required=True,
+        help="Time at which the branches start.",
+    )
+    parser.add_argument(
+        "-b",
+        "--branch",
+        action="append",
+        default=[],
+        metavar="NAME=SCRIPT",
+        help="Branch name and its script. Can be repeated.",
+    )
+    parser.add_argument(
+        "--output",
+        default="output/branches",
+        help="Folder for the branches and branches.csv.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Branches run at once, one per core by default.",
+    )
+    _add_window_arg(parser)
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
 
-    script_path = "./script.txt"
-    if len(sys.argv) > 1:
-        script_path = sys.argv[1]
+    if sys.argv[1:2] == ["sweep"]:
+        args = _parse_sweep_args(sys.argv[2:])
+        rows = run_sweep(
+            args.script_path,
+            parse_grid(args.param),
+            args.output,
+            workers=args.workers,
+            window=args.window,
+            seed=args.seed,
+        )
+        print(format_summary(rows))
+        sys.exit()
+
+    if sys.argv[1:2] == ["replicate"]:
+        args = _parse_replicate_args(sys.argv[2:])
+        estimates = run_replicas(
+            args.script_path,
+            args.replicas,
+            args.output,
+            workers=args.workers,
+            window=args.window,
+            seed=args.seed,
+            precision=args.precision,
+            min_replicas=args.min_replicas,
+            confidence=args.confidence,
+            targets=args.metric,
+        )
+        print(format_estimates(estimates))
+        sys.exit()
+
+    if sys.argv[1:2] == ["branch"]:
+        args = _parse_branch_args(sys.argv[2:])
+        rows = run_branch_script(
+            args.script_path,
+            args.at,
+            parse_branches(args.branch),
+            args.output,
+            workers=args.workers,
+            window=args.window,
+        )
+        print(format_summary(rows))
+        sys.exit()
+
+    args = _parse_args(sys.argv[1:])
+
+    if args.regions is not None:
+        stats = run_partitioned(args.script_path, args.regions)
+        print(
+            f"Simulated {stats['time']} ms in {len(stats['devices'])} "
+            f"regions, {stats['cut_links']} cut links, "
+            f"{stats['windows']} windows"
+        )
+        sys.exit()
+
+    if args.resume is not None:
+        instructions = None
+        if args.window is not None:
+            instructions = iter_instructions(args.script_path, args.window)
+        simulation = Simulation.restore(args.resume, instructions)
+        simulation.resume()
+        sys.exit()
 
-    instructions = load_instructions(script_path)
+    if args.window is None:
+        instructions = load_instructions(args.script_path)
+    else:
+        instructions = iter_instructions(args.script_path, args.window)
     simulation = Simulation()
     simulation.start(instructions)
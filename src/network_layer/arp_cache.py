@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from physical_layer.bit import BitBuffer
+from .ip import IP
+
+
+class ArpCache:
+    """
+    Tabla de las mac conocidas de cada IP.
+
+    Cada entrada expira ``ttl`` milisegundos después de ser guardada. Si la
+    tabla está llena al guardar una entrada nueva se descarta la usada hace
+    más tiempo.
+
+    Parameters
+    ----------
+    size : int
+        Cantidad máxima de entradas.
+    ttl : int
+        Tiempo de vida de las entradas en milisegundos. Con ``0`` no expiran.
+    on_remove : Callable[[IP], None], optional
+        Función que se llama con el IP de cada entrada que expira o se
+        descarta.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        ttl: int,
+        on_remove: Callable[[IP], None] = None,
+    ) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[IP, Tuple[BitBuffer, float]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, ip: IP) -> bool:
+        return ip in self._entries
+
+    def lookup(self, ip: IP, time: int) -> Optional[Tuple[BitBuffer, float]]:
+        """
+        Busca la mac de un IP.
+
+        Parameters
+        ----------
+        ip : IP
+            IP buscado.
+        time : int
+            Tiempo actual de la simulación.
+
+        Returns
+        -------
+        Optional[Tuple[BitBuffer, float]]
+            Mac y tiempo en el que expira, o ``None`` si no se conoce.
+        """
+
+        entry = self._entries.get(ip)
+        if entry is None:
+            return None
+        if entry[1] <= time:
+            self._remove(ip)
+            return None
+        self._entries.move_to_end(ip)
+        return entry
+
+    def get(self, ip: IP, time: int) -> Optional[BitBuffer]:
+        """Mac de un IP o ``None`` si no se conoce."""
+
+        entry = self.lookup(ip, time)
+        return entry[0] if entry is not None else None
+
+    def put(self, ip: IP, mac: BitBuffer, time: int) -> None:
+        """
+        Guarda la mac de un IP.
+
+        Parameters
+        ----------
+        ip : IP
+            IP conocido.
+        mac : BitBuffer
+            Mac del IP.
+        time : int
+            Tiempo actual de la simulación.
+        """
+
+        expires = time + self.ttl if self.ttl > 0 else float("inf")
+        self._entries[ip] = (mac, expires)
+        self._entries.move_to_end(ip)
+        while len(self._entries) > self.size:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Descarta todas las entradas."""
+
+        for ip in list(self._entries):
+            self._remove(ip)
+
+    def _remove(self, ip: IP) -> None:
+        del self._entries[ip]
+        if self.on_remove is not None:
+            self.on_remove(ip)
+
+
+class ArpRequest:
+    """
+    Pedido ARPQ pendiente de respuesta.
+
+    Parameters
+    ----------
+    port : str
+        Puerto por el que se envió.
+    retry_time : int
+        Tiempo en el que se vuelve a enviar si no hay respuesta.
+    """
+
+    __slots__ = ("port", "attempts", "retry_time")
+
+    def __init__(self, port: str, retry_time: int) -> None:
+        self.port = port
+        self.attempts = 1
+        self.retry_time = retry_time
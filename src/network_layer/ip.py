@@ -1,6 +1,7 @@
 from __future__ import annotations
 from io import UnsupportedOperation
-from typing import List, Tuple
+from typing import Tuple
+from weakref import WeakValueDictionary
 from utils import (
     data_size,
     extend_to_byte_divisor,
@@ -8,7 +9,7 @@ from utils import (
     from_bit_data_to_number,
     from_number_to_bit_data,
 )
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 
 
 PAYLOAD_TABLE = {
@@ -22,33 +23,65 @@ PAYLOAD_TABLE = {
 class IP:
     """IP basic class
 
+    IPs are immutable values backed by their 32-bit integer. They are
+    interned: building the same address twice returns the same object,
+    which keeps its bit encoding and string representation cached.
+
     Raises
     ------
     ValueError
         If the given values are not between 0 and 255
     """
 
-    def __init__(self, *numbers):
-        self.raw_value = 0
+    __slots__ = ("raw_value", "_bit_data", "_str", "__weakref__")
+
+    _interned: "WeakValueDictionary[int, IP]" = WeakValueDictionary()
+
+    def __new__(cls, *numbers):
+        raw_value = 0
         for i in range(len(numbers)):
             num = numbers[-(i + 1)]
             if not 0 <= num <= 255:
                 raise ValueError("IP numbers mut be between 0 and 255")
 
-            self.raw_value += num << i * 8
-        self.values = numbers
+            raw_value += num << i * 8
+        return cls.from_int(raw_value)
+
+    @classmethod
+    def from_int(cls, raw_value: int) -> IP:
+        """Get the IP of a 32-bit integer."""
+
+        ip = cls._interned.get(raw_value)
+        if ip is None:
+            ip = object.__new__(cls)
+            ip.raw_value = raw_value
+            ip._bit_data = None
+            ip._str = None
+            cls._interned[raw_value] = ip
+        return ip
 
     @staticmethod
     def from_str(ip_str: str):
         values = [int(e) for e in ip_str.split(".")]
         return IP(*values)
 
+    @staticmethod
+    def from_bit_data(bit_data: BitBuffer):
+        if len(bit_data) == 32:
+            return IP.from_int(bit_data.value)
+        value = bit_data.value
+        count = len(bit_data) // 8
+        return IP(*[(value >> 8 * i) & 255 for i in reversed(range(count))])
+
     @staticmethod
     def from_bin(ip_bin: str):
-        vals = []
-        for i in range(len(ip_bin) // 8):
-            vals.append(int(ip_bin[i * 8 : 8 + i * 8], base=2))
-        return IP(*vals)
+        return IP.from_int(int(ip_bin[: len(ip_bin) // 8 * 8] or "0", 2))
+
+    @property
+    def values(self) -> Tuple[int, int, int, int]:
+        """Tuple[int, int, int, int]: Octets of the IP"""
+        value = self.raw_value
+        return tuple((value >> shift) & 255 for shift in (24, 16, 8, 0))
 
     def check_subnet(self, subnet, mask) -> bool:
         """Check if the IP belongs to a certain subnet using a given mask.
@@ -74,13 +107,17 @@ class IP:
         return f"{self.raw_value:032b}"
 
     @property
-    def bit_data(self):
-        """str: Binary representation of the IP"""
-        return [VD(int(b)) for b in self.str_binary]
+    def bit_data(self) -> BitBuffer:
+        """BitBuffer: Binary representation of the IP"""
+        if self._bit_data is None:
+            self._bit_data = BitBuffer(self.raw_value, 32)
+        return self._bit_data
 
     def __repr__(self):
         """str: Value representation of the IP"""
-        return ".".join([str(v) for v in self.values])
+        if self._str is None:
+            self._str = ".".join([str(v) for v in self.values])
+        return self._str
 
     def __str__(self) -> str:
         return self.__repr__()
@@ -88,13 +125,19 @@ class IP:
     def __eq__(self, o: object) -> bool:
         return self.raw_value == o.raw_value
 
+    def __hash__(self) -> int:
+        return hash(self.raw_value)
+
+    def __reduce__(self):
+        return IP.from_int, (self.raw_value,)
+
     @staticmethod
-    def build_packet(dest_ip: IP, orig_ip: IP, data: List[int]) -> List[int]:
+    def build_packet(dest_ip: IP, orig_ip: IP, data: BitBuffer) -> BitBuffer:
         packet = (
             dest_ip.bit_data
             + orig_ip.bit_data
-            + [0] * 8
-            + [0] * 8
+            + BitBuffer(0, 8)
+            + BitBuffer(0, 8)
             + data_size(data)
             + extend_to_byte_divisor(data)
         )
@@ -111,7 +154,7 @@ class IPPacket:
         Ip destino.
     orig_ip : IP
         Ip origen.
-    payload : List[int]
+    payload : BitBuffer
         Datos a enviar.
     ttl : int, optional
         Time to live, by default 0
@@ -124,7 +167,7 @@ class IPPacket:
         Ip destino.
     orig_ip : IP
         Ip origen.
-    payload : List[int]
+    payload : BitBuffer
         Datos a enviar.
     ttl : int
         Time to live
@@ -132,7 +175,7 @@ class IPPacket:
         Protocolo
     protocol_nmae : str
         Nombre del protocolo.
-    bit_data : List[int]
+    bit_data : BitBuffer
         Paquete en forma de bits.
     """
 
@@ -140,7 +183,7 @@ class IPPacket:
         self,
         dest_ip: IP,
         orig_ip: IP,
-        payload: List[int],
+        payload: BitBuffer,
         ttl: int = 0,
         protocol: int = 0,
     ) -> None:
@@ -160,14 +203,14 @@ class IPPacket:
 
     @property
     def bit_data(self):
-        return (
-            self.to_ip.bit_data
-            + self.from_ip.bit_data
-            + self.ttl
-            + self.protocol
-            + data_size(self.payload)
-            + extend_to_byte_divisor(self.payload)
+        header = (
+            self.to_ip.raw_value << 56
+            | self.from_ip.raw_value << 24
+            | self.ttl.value << 16
+            | self.protocol.value << 8
+            | data_size(self.payload).value
         )
+        return BitBuffer(header, 88) + extend_to_byte_divisor(self.payload)
 
     @property
     def icmp_payload_msg(self) -> str:
@@ -192,12 +235,12 @@ class IPPacket:
         return IPPacket(dest_ip, orig_ip, payload, ttl=0, protocol=1)
 
     @staticmethod
-    def parse(data: List[int]) -> Tuple[bool, IPPacket]:
+    def parse(data: BitBuffer) -> Tuple[bool, IPPacket]:
         """Convierte una serie de bits a un paquete ip si es posible.
 
         Parameters
         ----------
-        data : List[int]
+        data : BitBuffer
             Datos en forma de bits.
 
         Returns
@@ -211,11 +254,12 @@ class IPPacket:
         if len(data) < 88:
             return False, None
 
-        ip_dest = IP.from_bin("".join(map(str, data[:32])))
-        ip_orig = IP.from_bin("".join(map(str, data[32:64])))
-        ttl = from_bit_data_to_number(data[64:72])
-        protocol = from_bit_data_to_number(data[72:80])
-        payload_s = from_bit_data_to_number(data[80:88])
+        header = data.value >> (len(data) - 88)
+        ip_dest = IP.from_int(header >> 56)
+        ip_orig = IP.from_int((header >> 24) & 0xFFFFFFFF)
+        ttl = (header >> 16) & 255
+        protocol = (header >> 8) & 255
+        payload_s = header & 255
 
         total_size = 88 + payload_s * 8
 
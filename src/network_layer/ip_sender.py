@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import List, Dict
+from collections import deque
+from typing import Deque, Dict
+from config import Config, DEFAULT_CONFIG
 from datalink_layer.frame_sender import FrameSender
+from physical_layer.bit import BitBuffer
 from utils import (
     from_str_to_bit_data,
 )
+from .arp_cache import ArpCache, ArpRequest
 from .ip import IP, IPPacket
 
 
@@ -17,20 +21,34 @@ class IPPacketSender(FrameSender):
         Tabla que contiene la dirección IP de cada puerto.
     masks: Dict[int, IP]
         Tabla que contiene la máscara del IP de cada puerto.
-    ip_table: Dict[int, List[int]]
+    ip_table: ArpCache
         Tabla que contiene la dirección MAC de los dispositivos según
-        la dirección IP.
-    waiting_for_arpq: Dict[int, List[List[int]]]
+        la dirección IP. Sus entradas expiran luego de ``arp_ttl`` y guarda a
+        lo sumo ``arp_cache_size``.
+    waiting_for_arpq: Dict[IP, Deque[BitBuffer]]
         Tabla que contiene paquetes que esán en espera de una respuesta del
-        protocolo ARPQ para ser enviados.
+        protocolo ARPQ para ser enviados. Se guardan a lo sumo
+        ``arp_queue_size`` paquetes por IP, descartando los más antiguos.
+    arp_requests: Dict[IP, ArpRequest]
+        Pedidos ARPQ sin responder. Se envía un solo pedido por IP, que se
+        repite ``arp_retries`` veces duplicando cada vez el tiempo de espera
+        a partir de ``arp_retry_time``.
+    arp_dropped : int
+        Cantidad de paquetes descartados en espera de una respuesta ARPQ.
     """
 
-    def __init__(self, name: str, ports_count: int):
+    def __init__(
+        self, name: str, ports_count: int, config: Config = DEFAULT_CONFIG
+    ):
         self.ips: Dict[str, IP] = {}
         self.masks: Dict[int, IP] = {}
-        self.ip_table: Dict[str, List[int]] = {}
-        self.waiting_for_arpq: Dict[str, List[List[int]]] = {}
-        super().__init__(name, ports_count)
+        self.ip_table = ArpCache(
+            config.arp_cache_size, config.arp_ttl, self.arp_entry_removed
+        )
+        self.waiting_for_arpq: Dict[IP, Deque[BitBuffer]] = {}
+        self.arp_requests: Dict[IP, ArpRequest] = {}
+        self.arp_dropped = 0
+        super().__init__(name, ports_count, config)
 
     def make_arpq(self, ip: IP, port: str):
         """
@@ -45,15 +63,15 @@ class IPPacketSender(FrameSender):
 
         arpq = from_str_to_bit_data("ARPQ")
         ip_data = ip.bit_data
-        self.send_frame([1] * 16, arpq + ip_data, port)
+        self.send_frame(BitBuffer.from_int(0xFFFF, 16), arpq + ip_data, port)
 
-    def respond_arpq(self, dest_mac: List[int], port: str) -> None:
+    def respond_arpq(self, dest_mac: BitBuffer, port: str) -> None:
         """
         Envía un frame que responde a un llamado ARPQ.
 
         Parameters
         ----------
-        dest_mac : List[int]
+        dest_mac : BitBuffer
             Mac destino.
         port : int, optional
             Puerto por el cual se envía, por defecto 1
@@ -63,6 +81,87 @@ class IPPacketSender(FrameSender):
         ip_data = self.ips[port].bit_data
         self.send_frame(dest_mac, arpq + ip_data, port)
 
+    def update_ip_table(self, ip: IP, mac: BitBuffer) -> None:
+        """
+        Guarda la mac de un IP y da por respondido su pedido ARPQ.
+
+        Parameters
+        ----------
+        ip : IP
+            IP conocido.
+        mac : BitBuffer
+            Mac del IP.
+        """
+
+        self.ip_table.put(ip, mac, self.simulation_time)
+        self.arp_requests.pop(ip, None)
+
+    def arp_entry_removed(self, ip: IP) -> None:
+        """
+        Se ejecuta cuando una entrada de ``ip_table`` expira o se descarta.
+
+        Parameters
+        ----------
+        ip : IP
+            IP de la entrada.
+        """
+
+    def request_mac(self, ip: IP, port: str) -> None:
+        """
+        Envía un pedido ARPQ para un IP si no hay uno pendiente.
+
+        Parameters
+        ----------
+        ip : IP
+            Ip del cual se quiere obtener la mac.
+        port : str
+            Puerto por el cual se envía.
+        """
+
+        if ip in self.arp_requests:
+            return
+        self.make_arpq(ip, port)
+        self.arp_requests[ip] = ArpRequest(
+            port, self.simulation_time + self.config.arp_retry_time
+        )
+
+    def retry_arp_requests(self, time: int) -> None:
+        """
+        Repite los pedidos ARPQ que no han sido respondidos a tiempo. Los
+        paquetes en espera de un IP que agotó sus intentos se descartan.
+
+        Parameters
+        ----------
+        time : int
+            Tiempo actual de la simulación.
+        """
+
+        for ip, request in list(self.arp_requests.items()):
+            if request.retry_time > time:
+                continue
+            if request.attempts > self.config.arp_retries:
+                del self.arp_requests[ip]
+                self.arp_dropped += len(self.waiting_for_arpq.pop(ip, ()))
+                continue
+            self.make_arpq(ip, request.port)
+            request.retry_time = time + self.config.arp_retry_time * (
+                2**request.attempts
+            )
+            request.attempts += 1
+
+    def update(self, time: int) -> None:
+        super().update(time)
+        if self.arp_requests:
+            self.retry_arp_requests(time)
+
+    def next_update(self):
+        ticks = super().next_update()
+        if not self.arp_requests:
+            return ticks
+        retry = min(r.retry_time for r in self.arp_requests.values())
+        retry = max(retry - self.simulation_time, 1)
+        return retry if ticks is None else min(ticks, retry)
+
     def send_ip_packet(
         self, packet: IPPacket, port: str, ip_dest: IP = None
     ) -> None:
@@ -81,16 +180,20 @@ class IPPacketSender(FrameSender):
 
         if ip_dest is None:
             ip_dest = packet.to_ip
-        ip_dest_str = str(ip_dest)
-        if ip_dest_str not in self.ip_table:
-            if ip_dest_str not in self.waiting_for_arpq:
-                self.waiting_for_arpq[ip_dest_str] = []
-            self.waiting_for_arpq[ip_dest_str].append(packet.bit_data)
-            self.make_arpq(ip_dest, port)
+        mac = self.ip_table.get(ip_dest, self.simulation_time)
+        if mac is None:
+            waiting = self.waiting_for_arpq.get(ip_dest)
+            if waiting is None:
+                waiting = deque(maxlen=self.config.arp_queue_size)
+                self.waiting_for_arpq[ip_dest] = waiting
+            if len(waiting) == waiting.maxlen:
+                self.arp_dropped += 1
+            waiting.append(packet.bit_data)
+            self.request_mac(ip_dest, port)
         else:
-            self.send_frame(self.ip_table[ip_dest_str], packet.bit_data, port)
+            self.send_frame(mac, packet.bit_data, port)
 
-    def send_by_ip(self, ip_dest: IP, data: List[int], port: str) -> None:
+    def send_by_ip(self, ip_dest: IP, data: BitBuffer, port: str) -> None:
         """
         Envía los datos dados a un IP determinado.
 
@@ -98,7 +201,7 @@ class IPPacketSender(FrameSender):
         ----------
         ip_dest : IP
             Ip destino.
-        data : List[int]
+        data : BitBuffer
             Datos a enviar.
         port : int, optional
             Puerto por el cual se envía, por defecto 1
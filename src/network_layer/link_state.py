@@ -0,0 +1,740 @@
+from __future__ import annotations
+import struct
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from config import Config, DEFAULT_CONFIG
+from datalink_layer.error_detection import check_frame_correction
+from physical_layer.bit import BitBuffer
+from .ip import IP, IPPacket
+from .route_trie import prefix_length
+from .spf import EdgeChange, ShortestPathTree
+
+if TYPE_CHECKING:
+    from datalink_layer.frame import Frame
+    from device.router import Route, Router
+
+# Número de protocolo de los paquetes IP del protocolo
+LINK_STATE_PROTOCOL = 89
+# IP destino de los paquetes del protocolo, se envían por broadcast
+ALL_ROUTERS = IP(224, 0, 0, 5)
+
+_BROADCAST_MAC = BitBuffer.from_int(0xFFFF, 16)
+_NO_GATEWAY = IP(0, 0, 0, 0)
+_HELLO = 1
+_LSA = 2
+_LSA_HEADER = struct.Struct(">BIIBB")
+_LINK = struct.Struct(">IB")
+_NETWORK = struct.Struct(">IBB")
+# Datos de un frame menos la cabecera IP
+_MAX_PAYLOAD = 255 - 11
+
+Prefix = Tuple[int, int]
+
+
+class LinkStateAdvertisement(NamedTuple):
+    """
+    Anuncio del estado de los enlaces de un router.
+
+    Attributes
+    ----------
+    origin : int
+        Identificador del router que lo genera.
+    sequence : int
+        Número de secuencia, el mayor es el más reciente.
+    links : Dict[int, int]
+        Costo del enlace con cada router vecino.
+    networks : Dict[Prefix, int]
+        Costo de llegar a cada subred conectada, dada por su dirección y el
+        largo de su prefijo.
+    """
+
+    origin: int
+    sequence: int
+    links: Dict[int, int]
+    networks: Dict[Prefix, int]
+
+    def encode(self) -> bytes:
+        """
+        Datos del anuncio en un paquete IP.
+
+        Raises
+        ------
+        ValueError
+            Si el anuncio no cabe en un paquete.
+        """
+
+        data = [
+            _LSA_HEADER.pack(
+                _LSA,
+                self.origin,
+                self.sequence,
+                len(self.links),
+                len(self.networks),
+            )
+        ]
+        data += [_LINK.pack(*link) for link in sorted(self.links.items())]
+        data += [
+            _NETWORK.pack(network, prefix, cost)
+            for (network, prefix), cost in sorted(self.networks.items())
+        ]
+        data = b"".join(data)
+        if len(data) > _MAX_PAYLOAD:
+            raise ValueError("Link-state advertisement too large")
+        return data
+
+    @staticmethod
+    def decode(data: bytes) -> LinkStateAdvertisement:
+        """Lee un anuncio de los datos de un paquete IP."""
+
+        _, origin, sequence, links_count, networks_count = (
+            _LSA_HEADER.unpack_from(data)
+        )
+        offset = _LSA_HEADER.size
+        links = {}
+        for _ in range(links_count):
+            router_id, cost = _LINK.unpack_from(data, offset)
+            links[router_id] = cost
+            offset += _LINK.size
+        networks = {}
+        for _ in range(networks_count):
+            network, prefix, cost = _NETWORK.unpack_from(data, offset)
+            networks[network, prefix] = cost
+            offset += _NETWORK.size
+        return LinkStateAdvertisement(origin, sequence, links, networks)
+
+
+class Neighbor:
+    """
+    Router vecino descubierto con un ``hello``.
+
+    Parameters
+    ----------
+    router_id : int
+        Identificador del vecino.
+    port : str
+        Puerto por el que se llega al vecino.
+    ip : IP
+        IP del puerto del vecino.
+    expires : int
+        Tiempo en el que se da por caído si no envía otro ``hello``.
+    """
+
+    __slots__ = ("router_id", "port", "ip", "expires")
+
+    def __init__(self, router_id: int, port: str, ip: IP, expires: int):
+        self.router_id = router_id
+        self.port = port
+        self.ip = ip
+        self.expires = expires
+
+
+class LinkStateRouting:
+    """
+    Protocolo de enrutamiento de estado de enlace de un router.
+
+    El router envía un ``hello`` por cada interfaz cada ``hello_time`` ms
+    y da por caído a un vecino del que no recibe nada en ``dead_time`` ms
+    o cuyo cable se desconecta. Los cambios en sus vecinos o interfaces, y
+    cada ``lsa_refresh_time`` ms, generan un nuevo anuncio de sus enlaces
+    (a lo sumo uno cada ``lsa_min_interval`` ms) que se inunda por la red;
+    los anuncios que no se renuevan en dos períodos se descartan. Al
+    conocer un vecino nuevo se le envían todos los anuncios conocidos.
+
+    Las rutas se calculan con un ``ShortestPathTree`` que solo recorre la
+    parte del árbol afectada por cada anuncio y se guardan en la tabla de
+    rutas del router, junto con las de las subredes conectadas. Un enlace
+    se usa solo si ambos extremos lo anuncian.
+
+    El identificador del router es el menor IP de sus interfaces al
+    comenzar el protocolo. Los paquetes del protocolo van por broadcast
+    con el IP destino ``ALL_ROUTERS`` y se descartan si tienen errores.
+
+    Parameters
+    ----------
+    router : Router
+        Router que ejecuta el protocolo.
+    config : Config, optional
+        Configuración de la simulación.
+
+    Attributes
+    ----------
+    router_id : int
+        Identificador del router, ``None`` hasta que tenga algún IP.
+    costs : Dict[str, int]
+        Costo de cada interfaz (de 1 a 255), por defecto 1.
+    neighbors : Dict[Tuple[str, int], Neighbor]
+        Vecinos según el puerto y su identificador.
+    database : Dict[int, LinkStateAdvertisement]
+        Último anuncio de cada router.
+    routes : Dict[Prefix, Route]
+        Rutas instaladas por el protocolo.
+    hellos_sent : int
+        Cantidad de ``hello`` enviados.
+    lsas_sent : int
+        Cantidad de anuncios enviados.
+    lsas_received : int
+        Cantidad de anuncios recibidos.
+    control_bytes : int
+        Bytes de los paquetes IP enviados por el protocolo.
+    errors : int
+        Paquetes del protocolo descartados por errores.
+    spf_runs : int
+        Cantidad de actualizaciones de las rutas.
+    route_changes : int
+        Cantidad de rutas añadidas, cambiadas o eliminadas.
+    last_route_change : int
+        Tiempo del último cambio en las rutas, ``None`` si no hay.
+    """
+
+    def __init__(self, router: Router, config: Config = DEFAULT_CONFIG):
+        self.router = router
+        self.hello_time = config.hello_time
+        self.dead_time = config.dead_time
+        self.refresh_time = config.lsa_refresh_time
+        self.min_interval = config.lsa_min_interval
+        self.router_id: Optional[int] = None
+        self.costs: Dict[str, int] = {}
+        self.neighbors: Dict[Tuple[str, int], Neighbor] = {}
+        self.database: Dict[int, LinkStateAdvertisement] = {}
+        self.routes: Dict[Prefix, Route] = {}
+        self.tree: Optional[ShortestPathTree] = None
+
+        self.hellos_sent = 0
+        self.lsas_sent = 0
+        self.lsas_received = 0
+        self.control_bytes = 0
+        self.errors = 0
+        self.spf_runs = 0
+        self.route_changes = 0
+        self.last_route_change: Optional[int] = None
+
+        # Routers que anuncian cada subred y puerto de las conectadas
+        self._origins: Dict[Prefix, Set[int]] = {}
+        self._local_networks: Dict[Prefix, str] = {}
+        self._installed_at: Dict[int, int] = {}
+        self._sequence = 0
+        self._interfaces: Dict[str, Tuple[IP, IP]] = {}
+        self._up_ports: Set[str] = set()
+        self._changed_neighbors: Set[int] = set()
+        self._ports_changed = True
+        self._links_changed = True
+        self._next_hello = 0
+        self._next_refresh = 0
+        self._next_origination = 0
+
+        for port in router.ports.values():
+            port.connection_callback = self.port_connection_changed
+
+    def stats(self) -> dict:
+        """
+        Estadísticas del protocolo.
+
+        Returns
+        -------
+        dict
+            Paquetes y bytes de control enviados, anuncios recibidos,
+            actualizaciones de las rutas, nodos recorridos en ellas, cambios
+            en las rutas y tiempo del último cambio.
+        """
+
+        return {
+            "hellos_sent": self.hellos_sent,
+            "lsas_sent": self.lsas_sent,
+            "lsas_received": self.lsas_received,
+            "control_bytes": self.control_bytes,
+            "errors": self.errors,
+            "spf_runs": self.spf_runs,
+            "spf_visited": self.tree.visited if self.tree else 0,
+            "route_changes": self.route_changes,
+            "last_route_change": self.last_route_change,
+        }
+
+    def set_cost(self, port: str, cost: int) -> None:
+        """
+        Cambia el costo de una interfaz.
+
+        Parameters
+        ----------
+        port : str
+            Puerto de la interfaz.
+        cost : int
+            Nuevo costo, de 1 a 255.
+        """
+
+        if not 1 <= cost <= 255:
+            raise ValueError("Link cost must be between 1 and 255")
+        self.costs[port] = cost
+        self._links_changed = True
+
+    def port_connection_changed(self) -> None:
+        """Se ejecuta cuando se conecta o desconecta un puerto del
+        router."""
+
+        self._ports_changed = True
+
+    # Ciclo del router
+
+    def update(self, time: int) -> None:
+        """
+        Envía los ``hello``, descarta los vecinos y anuncios vencidos y
+        genera un anuncio nuevo si cambiaron los enlaces del router.
+
+        Parameters
+        ----------
+        time : int
+            Tiempo actual de la simulación.
+        """
+
+        if self.router_id is None:
+            if not self.router.ips:
+                return
+            self._start()
+
+        new_ports = set()
+        if self._ports_changed or (
+            self._interfaces != self._current_interfaces()
+        ):
+            new_ports = self._check_ports()
+
+        if time >= self._next_hello:
+            self._next_hello = time + self.hello_time
+            new_ports = self._up_ports
+            self._age_database(time)
+        for port in sorted(new_ports):
+            self._send_hello(port)
+
+        for key, neighbor in list(self.neighbors.items()):
+            if neighbor.expires <= time:
+                self._remove_neighbor(key)
+        if self._changed_neighbors:
+            # Las rutas por vecinos caídos no esperan al próximo anuncio
+            self._update_routes(set(), set(), time)
+
+        force = time >= self._next_refresh
+        if (force or self._links_changed) and (time >= self._next_origination):
+            self._originate(time, force)
+
+    def next_update(self, time: int) -> Optional[int]:
+        """Ciclos hasta el próximo ``hello``, vecino vencido o anuncio."""
+
+        if self.router_id is None:
+            return 1 if self.router.ips else None
+        if self._ports_changed or (
+            len(self.router.ips) != len(self._interfaces)
+        ):
+            return 1
+        wake = min(self._next_hello, self._next_refresh)
+        if self._links_changed:
+            wake = min(wake, max(self._next_origination, time + 1))
+        for neighbor in self.neighbors.values():
+            wake = min(wake, neighbor.expires)
+        return max(wake - time, 1)
+
+    def receive(self, packet: IPPacket, port: str, frame: Frame = None):
+        """
+        Procesa un paquete del protocolo.
+
+        Parameters
+        ----------
+        packet : IPPacket
+            Paquete recibido.
+        port : str
+            Puerto por el cual llegó.
+        frame : Frame, optional
+            Frame que contiene el paquete.
+        """
+
+        if self.router_id is None:
+            return
+        if frame is not None:
+            _, error = check_frame_correction(
+                frame.bit_data, self.router.config.error_detection
+            )
+            if error:
+                self.errors += 1
+                return
+
+        self._heard_from(port, packet.from_ip)
+        data = packet.payload.to_bytes()
+        kind = data[0] if data else None
+        if kind == _HELLO and len(data) >= 5:
+            router_id = int.from_bytes(data[1:5], "big")
+            self._hello_received(router_id, port, packet.from_ip)
+        elif kind == _LSA:
+            self.lsas_received += 1
+            try:
+                lsa = LinkStateAdvertisement.decode(data)
+            except struct.error:
+                self.errors += 1
+                return
+            self._lsa_received(lsa, port)
+
+    # Vecinos
+
+    def _start(self) -> None:
+        self.router_id = min(ip.raw_value for ip in self.router.ips.values())
+        self.tree = ShortestPathTree(
+            self.router_id, self._out_edges, self._in_edges
+        )
+
+    def _current_interfaces(self) -> Dict[str, Tuple[IP, IP]]:
+        return {
+            port: (ip, self.router.masks.get(port))
+            for port, ip in self.router.ips.items()
+        }
+
+    def _check_ports(self) -> Set[str]:
+        """Olvida los vecinos de los puertos desconectados y devuelve los
+        puertos nuevos."""
+
+        self._ports_changed = False
+        self._links_changed = True
+        self._interfaces = self._current_interfaces()
+        up = {
+            port
+            for port in self._interfaces
+            if port in self.router.mac_addrs
+            and self.router.ports[port].cable is not None
+        }
+        for key in list(self.neighbors):
+            if key[0] not in up:
+                self._remove_neighbor(key)
+        new_ports = up - self._up_ports
+        self._up_ports = up
+        return new_ports
+
+    def _hello_received(self, router_id: int, port: str, ip: IP) -> None:
+        if router_id == self.router_id or port not in self._up_ports:
+            return
+        time = self.router.simulation_time
+        neighbor = self.neighbors.get((port, router_id))
+        if neighbor is not None:
+            neighbor.expires = time + self.dead_time
+            if neighbor.ip != ip:
+                neighbor.ip = ip
+                self._changed_neighbors.add(router_id)
+            return
+
+        self.neighbors[port, router_id] = Neighbor(
+            router_id, port, ip, time + self.dead_time
+        )
+        self._changed_neighbors.add(router_id)
+        self._links_changed = True
+        # El vecino conoce al router y los anuncios sin esperar
+        self._send_hello(port)
+        for lsa in list(self.database.values()):
+            self._send_lsa(lsa, port)
+
+    def _heard_from(self, port: str, ip: IP) -> None:
+        """Cualquier paquete de un vecino lo mantiene vivo, aunque sus
+        ``hello`` esperen detrás de otros paquetes."""
+
+        expires = self.router.simulation_time + self.dead_time
+        for neighbor in self.neighbors.values():
+            if neighbor.port == port and neighbor.ip == ip:
+                neighbor.expires = max(neighbor.expires, expires)
+
+    def _remove_neighbor(self, key: Tuple[str, int]) -> None:
+        del self.neighbors[key]
+        self._changed_neighbors.add(key[1])
+        self._links_changed = True
+
+    def _neighbor(self, router_id: int) -> Optional[Neighbor]:
+        """Vecino por el que se llega a un router adyacente, el del puerto
+        de menor costo."""
+
+        best = None
+        for (port, other), neighbor in self.neighbors.items():
+            if other != router_id:
+                continue
+            key = (self.costs.get(port, 1), port)
+            if best is None or key < best[0]:
+                best = (key, neighbor)
+        return best[1] if best is not None else None
+
+    # Anuncios
+
+    def _originate(self, time: int, force: bool = False) -> None:
+        """Genera un anuncio con los enlaces actuales del router si
+        cambiaron o si ``force``."""
+
+        links: Dict[int, int] = {}
+        for neighbor in self.neighbors.values():
+            cost = self.costs.get(neighbor.port, 1)
+            links[neighbor.router_id] = min(
+                cost, links.get(neighbor.router_id, cost)
+            )
+
+        networks: Dict[Prefix, int] = {}
+        local: Dict[Prefix, str] = {}
+        for port in sorted(self._up_ports):
+            ip, mask = self._interfaces[port]
+            length = -1 if mask is None else prefix_length(mask.raw_value)
+            if length < 0:
+                continue
+            prefix = (ip.raw_value & mask.raw_value, length)
+            cost = self.costs.get(port, 1)
+            if prefix not in networks or cost < networks[prefix]:
+                networks[prefix] = cost
+                local[prefix] = port
+
+        changed_local = {
+            prefix
+            for prefix in set(local) | set(self._local_networks)
+            if local.get(prefix) != self._local_networks.get(prefix)
+        }
+        self._local_networks = local
+        self._links_changed = False
+
+        current = self.database.get(self.router_id)
+        if (
+            not force
+            and current is not None
+            and current.links == links
+            and current.networks == networks
+        ):
+            self._update_routes(set(), changed_local, time)
+            return
+
+        self._sequence += 1
+        lsa = LinkStateAdvertisement(
+            self.router_id, self._sequence, links, networks
+        )
+        lsa.encode()
+        self._install(lsa, time, changed_local)
+        self._flood(lsa)
+        self._next_refresh = time + self.refresh_time
+        self._next_origination = time + self.min_interval
+
+    def _lsa_received(self, lsa: LinkStateAdvertisement, port: str) -> None:
+        if lsa.origin == self.router_id:
+            # Anuncio propio de antes de reiniciar el protocolo
+            if lsa.sequence >= self._sequence:
+                self._sequence = lsa.sequence
+                self._next_refresh = self.router.simulation_time
+            return
+
+        current = self.database.get(lsa.origin)
+        if current is not None and lsa.sequence <= current.sequence:
+            if lsa.sequence < current.sequence:
+                # El vecino tiene una versión vieja
+                self._send_lsa(current, port)
+            return
+
+        self._install(lsa, self.router.simulation_time)
+        self._flood(lsa, exclude=port)
+
+    def _flood(self, lsa: LinkStateAdvertisement, exclude: str = None):
+        ports = {neighbor.port for neighbor in self.neighbors.values()}
+        for port in sorted(ports):
+            if port != exclude:
+                self._send_lsa(lsa, port)
+
+    def _age_database(self, time: int) -> None:
+        max_age = 2 * self.refresh_time
+        for origin, installed in list(self._installed_at.items()):
+            if origin != self.router_id and time - installed >= max_age:
+                self._install(None, time, origin=origin)
+
+    def _install(
+        self,
+        lsa: Optional[LinkStateAdvertisement],
+        time: int,
+        changed_prefixes: Set[Prefix] = None,
+        origin: int = None,
+    ) -> None:
+        """Guarda un anuncio (o descarta el de ``origin`` si es ``None``) y
+        actualiza las rutas afectadas."""
+
+        if lsa is not None:
+            origin = lsa.origin
+        old = self.database.get(origin)
+        if lsa is None:
+            self.database.pop(origin, None)
+            self._installed_at.pop(origin, None)
+        else:
+            self.database[origin] = lsa
+            self._installed_at[origin] = time
+
+        old_networks = old.networks if old is not None else {}
+        new_networks = lsa.networks if lsa is not None else {}
+        prefixes = set(changed_prefixes or ())
+        for prefix in set(old_networks) | set(new_networks):
+            if old_networks.get(prefix) == new_networks.get(prefix):
+                continue
+            prefixes.add(prefix)
+            origins = self._origins.setdefault(prefix, set())
+            if prefix in new_networks:
+                origins.add(origin)
+            else:
+                origins.discard(origin)
+                if not origins:
+                    del self._origins[prefix]
+
+        changes = self._edge_changes(origin, old, lsa)
+        nodes = self.tree.update(changes) if changes else set()
+        self._update_routes(nodes, prefixes, time)
+
+    def _edge_changes(
+        self,
+        origin: int,
+        old: Optional[LinkStateAdvertisement],
+        new: Optional[LinkStateAdvertisement],
+    ) -> List[EdgeChange]:
+        """Enlaces cuyo costo cambió al reemplazar el anuncio de un
+        router."""
+
+        old_links = old.links if old is not None else {}
+        new_links = new.links if new is not None else {}
+        changes = []
+        for other in set(old_links) | set(new_links):
+            other_lsa = self.database.get(other)
+            back = other_lsa.links.get(origin) if other_lsa else None
+            if back is None:
+                continue
+            before, after = old_links.get(other), new_links.get(other)
+            if before == after:
+                continue
+            changes.append((origin, other, before, after))
+            if (before is None) != (after is None):
+                changes.append(
+                    (
+                        other,
+                        origin,
+                        None if before is None else back,
+                        None if after is None else back,
+                    )
+                )
+        return changes
+
+    def _out_edges(self, node: int) -> List[Tuple[int, int]]:
+        lsa = self.database.get(node)
+        if lsa is None:
+            return []
+        return [
+            (other, cost)
+            for other, cost in lsa.links.items()
+            if self._announces(other, node)
+        ]
+
+    def _in_edges(self, node: int) -> List[Tuple[int, int]]:
+        lsa = self.database.get(node)
+        if lsa is None:
+            return []
+        return [
+            (other, self.database[other].links[node])
+            for other in lsa.links
+            if self._announces(other, node)
+        ]
+
+    def _announces(self, router_id: int, other: int) -> bool:
+        lsa = self.database.get(router_id)
+        return lsa is not None and other in lsa.links
+
+    # Rutas
+
+    def _update_routes(
+        self, nodes: Set[int], prefixes: Set[Prefix], time: int
+    ) -> None:
+        """Recalcula las rutas de las subredes anunciadas por los routers
+        cuyo camino cambió y de las subredes dadas."""
+
+        if self._changed_neighbors:
+            hops = self._changed_neighbors
+            nodes = nodes | {
+                node
+                for node, hop in self.tree.first_hop.items()
+                if hop in hops
+            }
+            self._changed_neighbors = set()
+
+        prefixes = set(prefixes)
+        for node in nodes:
+            lsa = self.database.get(node)
+            if lsa is not None:
+                prefixes.update(lsa.networks)
+        if not prefixes:
+            return
+
+        self.spf_runs += 1
+        for prefix in sorted(prefixes):
+            self._set_route(prefix, self._best_route(prefix), time)
+
+    def _best_route(self, prefix: Prefix) -> Optional[Route]:
+        # device.router importa este módulo
+        from device.router import Route
+
+        network, length = prefix
+        mask = IP.from_int((0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF)
+        if prefix in self._local_networks:
+            port = self._local_networks[prefix]
+            return Route(
+                IP.from_int(network), mask, _NO_GATEWAY, _interface(port)
+            )
+
+        best = None
+        for origin in self._origins.get(prefix, ()):
+            dist = self.tree.dist.get(origin)
+            if dist is None or origin == self.router_id:
+                continue
+            candidate = (dist + self.database[origin].networks[prefix], origin)
+            if best is None or candidate < best:
+                best = candidate
+        if best is None:
+            return None
+
+        neighbor = self._neighbor(self.tree.first_hop[best[1]])
+        if neighbor is None:
+            return None
+        return Route(
+            IP.from_int(network), mask, neighbor.ip, _interface(neighbor.port)
+        )
+
+    def _set_route(
+        self, prefix: Prefix, route: Optional[Route], time: int
+    ) -> None:
+        current = self.routes.get(prefix)
+        if current is None and route is None:
+            return
+        if current is not None and route is not None and current == route:
+            return
+        if current is not None:
+            self.router.remove_route(current)
+            del self.routes[prefix]
+        if route is not None:
+            self.router.add_route(route)
+            self.routes[prefix] = route
+        self.route_changes += 1
+        self.last_route_change = time
+
+    # Envío
+
+    def _send_hello(self, port: str) -> None:
+        data = bytes([_HELLO]) + self.router_id.to_bytes(4, "big")
+        if self._send(data, port):
+            self.hellos_sent += 1
+
+    def _send_lsa(self, lsa: LinkStateAdvertisement, port: str) -> None:
+        if self._send(lsa.encode(), port):
+            self.lsas_sent += 1
+
+    def _send(self, data: bytes, port: str) -> bool:
+        ip = self.router.ips.get(port)
+        if ip is None or port not in self.router.mac_addrs:
+            return False
+        if self.router.ports[port].cable is None:
+            return False
+        packet = IPPacket(
+            ALL_ROUTERS,
+            ip,
+            BitBuffer.from_bytes(data),
+            protocol=LINK_STATE_PROTOCOL,
+        )
+        bit_data = packet.bit_data
+        self.control_bytes += len(bit_data) // 8
+        self.router.send_frame(_BROADCAST_MAC, bit_data, port)
+        return True
+
+
+def _interface(port: str) -> int:
+    return int(port.rsplit("_", 1)[1])
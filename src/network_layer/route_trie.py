@@ -0,0 +1,149 @@
+from typing import Any, Callable, Iterator, List, Tuple
+
+ADDRESS_BITS = 32
+_ADDRESS_MASK = (1 << ADDRESS_BITS) - 1
+
+
+def prefix_length(mask: int) -> int:
+    """Number of leading ones of a mask, or -1 if the mask is not a
+    contiguous prefix.
+
+    Parameters
+    ----------
+    mask : int
+        Raw value of the mask.
+    """
+
+    inverted = ~mask & _ADDRESS_MASK
+    if inverted & (inverted + 1):
+        return -1
+    return ADDRESS_BITS - inverted.bit_length()
+
+
+class _Node:
+    __slots__ = ("children", "values")
+
+    def __init__(self) -> None:
+        self.children = [None, None]
+        self.values = []
+
+
+class PrefixTrie:
+    """Binary trie of values keyed by an address prefix.
+
+    Each prefix keeps its values in insertion order. Inserting, removing
+    and finding the longest matching prefix of an address walk at most
+    ``ADDRESS_BITS`` nodes, no matter how many prefixes are stored.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, prefix: int, length: int, value: Any) -> None:
+        """Add a value after the ones already stored for a prefix.
+
+        Parameters
+        ----------
+        prefix : int
+            Address whose first ``length`` bits form the prefix. The rest
+            of its bits must be zero.
+        length : int
+            Prefix length.
+        value : Any
+            Value to store.
+        """
+
+        node = self._root
+        for i in range(length):
+            bit = (prefix >> (ADDRESS_BITS - 1 - i)) & 1
+            child = node.children[bit]
+            if child is None:
+                child = node.children[bit] = _Node()
+            node = child
+        node.values.append(value)
+        self._size += 1
+
+    def remove(
+        self, prefix: int, length: int, match: Callable[[Any], bool]
+    ) -> bool:
+        """Remove the first value of a prefix for which ``match`` is true.
+
+        Returns
+        -------
+        bool
+            True if a value was removed.
+        """
+
+        path = [self._root]
+        node = self._root
+        for i in range(length):
+            node = node.children[(prefix >> (ADDRESS_BITS - 1 - i)) & 1]
+            if node is None:
+                return False
+            path.append(node)
+
+        for i, value in enumerate(node.values):
+            if match(value):
+                del node.values[i]
+                break
+        else:
+            return False
+        self._size -= 1
+
+        # Prune the branches left without values
+        for i in range(length, 0, -1):
+            node = path[i]
+            if node.values or node.children[0] or node.children[1]:
+                break
+            bit = (prefix >> (ADDRESS_BITS - i)) & 1
+            path[i - 1].children[bit] = None
+        return True
+
+    def longest_match(self, address: int) -> Tuple[int, List[Any]]:
+        """Values of the longest prefix that matches an address.
+
+        Returns
+        -------
+        Tuple[int, List[Any]]
+            Length of the prefix and its values, or ``(-1, [])`` if no
+            prefix matches.
+        """
+
+        node = self._root
+        best_length, best = (0, node.values) if node.values else (-1, [])
+        for i in range(ADDRESS_BITS):
+            node = node.children[(address >> (ADDRESS_BITS - 1 - i)) & 1]
+            if node is None:
+                break
+            if node.values:
+                best_length, best = i + 1, node.values
+        return best_length, best
+
+    def clear(self) -> None:
+        """Remove every value."""
+
+        self._root = _Node()
+        self._size = 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Any]]:
+        """Iterate over ``(prefix, length, value)`` for every stored value."""
+
+        stack = [(self._root, 0, 0)]
+        while stack:
+            node, prefix, length = stack.pop()
+            for value in node.values:
+                yield prefix, length, value
+            for bit in (1, 0):
+                child = node.children[bit]
+                if child is not None:
+                    stack.append(
+                        (
+                            child,
+                            prefix | bit << (ADDRESS_BITS - 1 - length),
+                            length + 1,
+                        )
+                    )
@@ -0,0 +1,237 @@
+from heapq import heappop, heappush
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# (source, target, old cost, new cost). ``None`` means there is no edge.
+EdgeChange = Tuple[int, int, Optional[int], Optional[int]]
+# Function returning the (node, cost) pairs of the edges of a node
+Edges = Callable[[int], Iterable[Tuple[int, int]]]
+
+
+class ShortestPathTree:
+    """Shortest paths from a root node, updated incrementally.
+
+    The graph is not stored: it is read through ``out_edges`` and
+    ``in_edges`` and, after it changes, ``update`` gets the list of edges
+    whose cost changed. Edges that got more expensive or disappeared only
+    invalidate the subtree hanging from them, which is rebuilt from the
+    rest of the tree; edges that got cheaper or appeared start a Dijkstra
+    search that stops at the nodes that do not improve. Costs must be
+    positive.
+
+    Parameters
+    ----------
+    root : int
+        Root node.
+    out_edges : Edges
+        Edges leaving a node.
+    in_edges : Edges
+        Edges reaching a node, as (source, cost) pairs.
+
+    Attributes
+    ----------
+    dist : Dict[int, int]
+        Distance from the root of each reachable node.
+    parent : Dict[int, int]
+        Previous node in the path to each reachable node but the root.
+    first_hop : Dict[int, int]
+        Neighbour of the root that starts the path to each reachable node
+        but the root.
+    visited : int
+        Nodes processed by all the updates, to measure their cost.
+    """
+
+    def __init__(self, root: int, out_edges: Edges, in_edges: Edges) -> None:
+        self.root = root
+        self.out_edges = out_edges
+        self.in_edges = in_edges
+        self.dist: Dict[int, int] = {root: 0}
+        self.parent: Dict[int, int] = {}
+        self.first_hop: Dict[int, int] = {}
+        self.children: Dict[int, Set[int]] = {root: set()}
+        self.visited = 0
+
+    def __contains__(self, node: int) -> bool:
+        return node in self.dist
+
+    def update(self, changes: List[EdgeChange]) -> Set[int]:
+        """Update the tree after some edges changed.
+
+        Parameters
+        ----------
+        changes : List[EdgeChange]
+            Edges whose cost changed. The graph must already have the new
+            costs.
+
+        Returns
+        -------
+        Set[int]
+            Nodes whose distance or first hop changed, including the ones
+            that became unreachable.
+        """
+
+        before: Dict[int, Tuple[Optional[int], Optional[int]]] = {}
+        moved: Set[int] = set()
+        improved: List[Tuple[int, int, int]] = []
+
+        # Edges of the tree that got more expensive or disappeared
+        affected: Set[int] = set()
+        for source, target, old, new in changes:
+            if new is not None and (old is None or new <= old):
+                continue
+            if self.parent.get(target) == source and target not in affected:
+                affected |= self._subtree(target)
+        if affected:
+            self._rebuild(affected, before, moved, improved)
+
+        # Edges that got cheaper or appeared
+        for source, target, old, new in changes:
+            if new is None or source not in self.dist:
+                continue
+            if old is not None and new >= old:
+                continue
+            cost = self.dist[source] + new
+            if cost < self.dist.get(target, cost + 1):
+                heappush(improved, (cost, target, source))
+        self._relax(improved, before, moved)
+
+        self._update_first_hops(moved, before)
+        return self._changed(before)
+
+    def rebuild(self) -> Set[int]:
+        """Compute the whole tree again.
+
+        Returns
+        -------
+        Set[int]
+            Nodes whose distance or first hop changed.
+        """
+
+        before = {
+            node: (dist, self.first_hop.get(node))
+            for node, dist in self.dist.items()
+        }
+        self.dist = {self.root: 0}
+        self.parent = {}
+        self.first_hop = {}
+        self.children = {self.root: set()}
+
+        pending = []
+        for node, cost in self.out_edges(self.root):
+            heappush(pending, (cost, node, self.root))
+        moved: Set[int] = set()
+        self._relax(pending, before, moved)
+        self._update_first_hops(moved, before)
+        return self._changed(before)
+
+    def _changed(self, before: dict) -> Set[int]:
+        return {
+            node
+            for node, (dist, hop) in before.items()
+            if self.dist.get(node) != dist or self.first_hop.get(node) != hop
+        }
+
+    def _subtree(self, node: int) -> Set[int]:
+        nodes = {node}
+        pending = [node]
+        while pending:
+            for child in self.children.get(pending.pop(), ()):
+                nodes.add(child)
+                pending.append(child)
+        return nodes
+
+    def _remember(self, node: int, before: dict) -> None:
+        if node not in before:
+            before[node] = (self.dist.get(node), self.first_hop.get(node))
+
+    def _set_parent(self, node: int, parent: Optional[int]) -> None:
+        old = self.parent.pop(node, None)
+        if old is not None:
+            self.children[old].discard(node)
+        if parent is not None:
+            self.parent[node] = parent
+            self.children.setdefault(parent, set()).add(node)
+
+    def _rebuild(
+        self,
+        affected: Set[int],
+        before: dict,
+        moved: Set[int],
+        improved: List[Tuple[int, int, int]],
+    ) -> None:
+        """Find new paths to the nodes of invalidated subtrees."""
+
+        for node in affected:
+            self._remember(node, before)
+            self._set_parent(node, None)
+            del self.dist[node]
+
+        # Best path from the rest of the tree to each node
+        pending: List[Tuple[int, int, int]] = []
+        for node in affected:
+            best = None
+            for source, cost in self.in_edges(node):
+                if source in self.dist:
+                    candidate = (self.dist[source] + cost, source)
+                    if best is None or candidate < best:
+                        best = candidate
+            if best is not None:
+                heappush(pending, (best[0], node, best[1]))
+
+        while pending:
+            dist, node, parent = heappop(pending)
+            if node in self.dist:
+                continue
+            self.visited += 1
+            self.dist[node] = dist
+            self._set_parent(node, parent)
+            moved.add(node)
+            for target, cost in self.out_edges(node):
+                if target in affected and target not in self.dist:
+                    heappush(pending, (dist + cost, target, node))
+                elif dist + cost < self.dist.get(target, dist + cost + 1):
+                    # Only possible when other edges got cheaper
+                    heappush(improved, (dist + cost, target, node))
+
+    def _relax(
+        self,
+        pending: List[Tuple[int, int, int]],
+        before: dict,
+        moved: Set[int],
+    ) -> None:
+        """Dijkstra search from the nodes whose distance improved."""
+
+        while pending:
+            dist, node, parent = heappop(pending)
+            if dist >= self.dist.get(node, dist + 1):
+                continue
+            self.visited += 1
+            self._remember(node, before)
+            self.dist[node] = dist
+            self._set_parent(node, parent)
+            moved.add(node)
+            for target, cost in self.out_edges(node):
+                if dist + cost < self.dist.get(target, dist + cost + 1):
+                    heappush(pending, (dist + cost, target, node))
+
+    def _update_first_hops(self, moved: Set[int], before: dict) -> None:
+        """Propagate the first hop of the nodes whose parent changed to
+        their subtrees."""
+
+        done: Set[int] = set()
+        for node in sorted(moved, key=lambda n: self.dist.get(n, -1)):
+            if node in done or node not in self.dist:
+                continue
+            pending = [node]
+            while pending:
+                current = pending.pop()
+                done.add(current)
+                self._remember(current, before)
+                parent = self.parent[current]
+                self.first_hop[current] = (
+                    current if parent == self.root else self.first_hop[parent]
+                )
+                pending.extend(self.children.get(current, ()))
+
+        for node in before:
+            if node not in self.dist:
+                self.first_hop.pop(node, None)
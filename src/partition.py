@@ -0,0 +1,749 @@
+"""
+Simulación particionada de una red.
+
+Divide los dispositivos de un script en regiones, cortando cables entre
+switches, routers y hosts, y simula cada región en su propio proceso::
+
+    python net_sim.py script.txt --regions 4
+
+Solo se admite el modo de transmisión ``frame``: en él un frame afecta al
+otro extremo de un cable cuando termina de transmitirse, lo que se sabe al
+empezar y ocurre al menos ``signal_time`` ciclos por bit más tarde. Las
+regiones avanzan en ventanas: al terminar cada una se intercambian las
+transmisiones que empezaron en los cables cortados y la siguiente ventana
+no pasa del próximo evento de la red más la duración de la transmisión
+más corta posible (ver ``min_transmission_bits``), por lo que ninguna
+región recibe una transmisión que debía entregarse en un ciclo ya
+simulado. En el modo ``bit`` un bit se lee en el mismo ciclo en que se
+escribe y no hay margen para particionar.
+
+Los cables de un hub no se cortan porque el hub repite las transmisiones y
+las colisiones en el mismo ciclo, ni tampoco los de puertos que el script
+desconecta. Los dispositivos conservan la prioridad que tienen en la
+simulación completa y el fin de la simulación se calcula con el trabajo
+pendiente de toda la red, por lo que los logs y los datos recibidos son
+iguales a los de una sola ``Simulation`` creada con el mismo estado del
+generador de números aleatorios. Para ello ``error_prob`` debe ser ``0``;
+las esperas tras una colisión no dependen de la partición porque cada
+puerto tiene su propio generador (ver ``Simulation.backoff_seed``).
+"""
+
+import contextlib
+import multiprocessing
+import os
+import random
+import traceback
+from collections import deque
+from heapq import heappop, heappush
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+from datalink_layer.frame import HEADER_SIZE
+from instruction_parser import load_instructions
+from instructions import (
+    ConnectIns,
+    CreateHostIns,
+    CreateHubIns,
+    CreateRouterIns,
+    CreateSwitchIns,
+    DisconnectIns,
+    Instruction,
+    SendIns,
+)
+from physical_layer.bit import BitBuffer
+from physical_layer.frame_layer import Transmission
+from physical_layer.port import Port
+from simulation import Simulation
+
+# Atributos de las instrucciones con nombres de dispositivos y de puertos
+_DEVICE_ATTRS = (
+    "hub_name",
+    "host_name",
+    "switch_name",
+    "router_name",
+    "device_name",
+)
+_PORT_ATTRS = ("port1", "port2", "port_name")
+_CREATE_INSTRUCTIONS = (
+    CreateHubIns,
+    CreateHostIns,
+    CreateSwitchIns,
+    CreateRouterIns,
+)
+
+# Transmisión que empezó en un cable cortado: (puerto que la recibe,
+# ciclo en que termina, bits)
+Delivery = Tuple[str, int, BitBuffer]
+
+
+def port_device(port_name: str) -> str:
+    """Nombre del dispositivo de un puerto ``<dispositivo>_<número>``."""
+    return port_name.rsplit("_", 1)[0]
+
+
+def instruction_devices(instruction: Instruction) -> List[str]:
+    """
+    Dispositivos que modifica una instrucción.
+
+    Parameters
+    ----------
+    instruction : Instruction
+        Instrucción de un script.
+    """
+
+    names = [
+        getattr(instruction, attr)
+        for attr in _DEVICE_ATTRS
+        if hasattr(instruction, attr)
+    ]
+    names += [
+        port_device(getattr(instruction, attr))
+        for attr in _PORT_ATTRS
+        if hasattr(instruction, attr)
+    ]
+    return names
+
+
+def _creation_order(instructions: Iterable[Instruction]) -> List[Instruction]:
+    """Instrucciones en el orden en que las ejecuta una simulación."""
+    return sorted(instructions, key=lambda instr: instr.time)
+
+
+def device_ranks(
+    instructions: Iterable[Instruction],
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Prioridad que tiene cada dispositivo de un script en una simulación
+    completa (ver ``Simulation._device_rank``).
+
+    Parameters
+    ----------
+    instructions : Iterable[Instruction]
+        Instrucciones del script.
+    """
+
+    ranks = {}
+    for instr in _creation_order(instructions):
+        if isinstance(instr, _CREATE_INSTRUCTIONS):
+            is_host = isinstance(instr, CreateHostIns)
+            name = instruction_devices(instr)[0]
+            ranks.setdefault(name, (0 if is_host else 1, len(ranks)))
+    return ranks
+
+
+def partition_devices(
+    instructions: Iterable[Instruction], regions: int
+) -> Dict[str, int]:
+    """
+    Divide los dispositivos de un script en regiones conexas de tamaños
+    parecidos.
+
+    Los dispositivos unidos por cables que no se pueden cortar (los de
+    hubs y los de puertos que se desconectan) quedan en la misma región.
+    Esos grupos se recorren a lo ancho desde el primer dispositivo creado
+    y se reparten en orden, por lo que cada región es un trozo contiguo
+    del grafo.
+
+    Parameters
+    ----------
+    instructions : Iterable[Instruction]
+        Instrucciones del script.
+    regions : int
+        Cantidad máxima de regiones.
+
+    Returns
+    -------
+    Dict[str, int]
+        Región de cada dispositivo, numeradas desde ``0``.
+    """
+
+    instructions = _creation_order(instructions)
+    devices = list(device_ranks(instructions))
+    hubs = {
+        instr.hub_name
+        for instr in instructions
+        if isinstance(instr, CreateHubIns)
+    }
+    pinned = {
+        instr.port_name
+        for instr in instructions
+        if isinstance(instr, DisconnectIns)
+    }
+
+    groups = {name: name for name in devices}
+
+    def group(name):
+        while groups[name] != name:
+            groups[name] = groups[groups[name]]
+            name = groups[name]
+        return name
+
+    links = []
+    for instr in instructions:
+        if not isinstance(instr, ConnectIns):
+            continue
+        ends = port_device(instr.port1), port_device(instr.port2)
+        if any(name not in groups for name in ends):
+            continue
+        if hubs.intersection(ends) or pinned & {instr.port1, instr.port2}:
+            groups[group(ends[0])] = group(ends[1])
+        else:
+            links.append(ends)
+
+    members: Dict[str, List[str]] = {}
+    for name in devices:
+        members.setdefault(group(name), []).append(name)
+    neighbours: Dict[str, List[str]] = {g: [] for g in members}
+    for first, second in links:
+        first, second = group(first), group(second)
+        if first != second:
+            neighbours[first].append(second)
+            neighbours[second].append(first)
+
+    # Recorrido a lo ancho de los grupos, componente por componente
+    order = []
+    seen = set()
+    for start in members:
+        if start in seen:
+            continue
+        seen.add(start)
+        pending = deque([start])
+        while pending:
+            current = pending.popleft()
+            order.append(current)
+            for other in neighbours[current]:
+                if other not in seen:
+                    seen.add(other)
+                    pending.append(other)
+
+    size = -(-len(devices) // max(regions, 1))
+    assignment = {}
+    region, filled = 0, 0
+    for current in order:
+        if filled >= size and region < regions - 1:
+            region, filled = region + 1, 0
+        for name in members[current]:
+            assignment[name] = region
+        filled += len(members[current])
+    return assignment
+
+
+class BoundaryLink:
+    """
+    Extremo local de un cable cortado entre dos regiones.
+
+    Las transmisiones que empiezan en el puerto se guardan en el
+    ``outbox`` de la simulación, con el ciclo en que terminan, para
+    entregarlas en la región del otro extremo.
+
+    Parameters
+    ----------
+    simulation : RegionSimulation
+        Simulación de la región.
+    port : Port
+        Puerto local.
+    peer_port : str
+        Nombre del puerto del otro extremo.
+    """
+
+    def __init__(
+        self, simulation: "RegionSimulation", port: Port, peer_port: str
+    ) -> None:
+        self.simulation = simulation
+        self.port1 = port
+        self.port2 = None
+        self.peer_port = peer_port
+        self.signal_time = simulation.config.signal_time
+        self.write_callback = None
+        self.is_quiet = True
+        port.connect(self)
+
+    def transmit(self, port: Port, transmission: Transmission):
+        end = self.simulation.time + len(transmission.bits) * self.signal_time
+        self.simulation.outbox.append((self.peer_port, end, transmission.bits))
+
+    def finish(self, port: Port, transmission: Transmission):
+        if transmission.collided:
+            raise RuntimeError(
+                f"Transmission from {port} to {self.peer_port} was aborted, "
+                "cables between regions can not be disconnected."
+            )
+
+
+class Arrivals:
+    """
+    Entrega en un puerto las transmisiones que llegan por un cable
+    cortado.
+
+    Se programa en la simulación como un dispositivo más, con la
+    prioridad del dispositivo del otro extremo, de modo que cada
+    transmisión se entrega en el mismo momento del ciclo en que la
+    entregaría ese dispositivo en una simulación completa.
+
+    Parameters
+    ----------
+    port : Port
+        Puerto que recibe las transmisiones.
+    """
+
+    is_active = False
+
+    def __init__(self, port: Port) -> None:
+        self.port = port
+        self.simulation_time = 0
+        self.pending = deque()
+
+    def reset(self):
+        pass
+
+    def update(self, time: int):
+        self.simulation_time = time
+        while self.pending and self.pending[0][0] == time:
+            _, bits = self.pending.popleft()
+            self.port.transmission_callback(Transmission(bits), False)
+
+    def next_update(self):
+        if not self.pending:
+            return None
+        return self.pending[0][0] - self.simulation_time
+
+    def skip(self, ticks: int, time: int):
+        if ticks > 0:
+            self.simulation_time = time
+
+
+class RegionSimulation(Simulation):
+    """
+    Simulación de una región de una red particionada.
+
+    Solo crea los dispositivos de la región y ejecuta las instrucciones que
+    los modifican. Los cables hacia otras regiones son ``BoundaryLink`` y
+    no se registran en ``topology``.
+
+    Parameters
+    ----------
+    region : int
+        Número de la región.
+    regions : Dict[str, int]
+        Región de cada dispositivo de la red.
+    ranks : Dict[str, Tuple[int, int]]
+        Prioridad de cada dispositivo en la simulación completa.
+    backoff_seed : int
+        Semilla de las esperas tras una colisión, la misma en todas las
+        regiones.
+    output_path : str, optional
+        Carpeta donde se guardan los logs, por defecto ``output``.
+    config : Config, optional
+        Configuración de la simulación.
+
+    Attributes
+    ----------
+    outbox : List[Delivery]
+        Transmisiones que empezaron en cables cortados desde la última
+        ventana.
+    """
+
+    def __init__(
+        self,
+        region: int,
+        regions: Dict[str, int],
+        ranks: Dict[str, Tuple[int, int]],
+        backoff_seed: int,
+        output_path: str = "output",
+        config: Config = None,
+    ):
+        super().__init__(output_path, config=config)
+        self.backoff_seed = backoff_seed
+        self.region = region
+        self.regions = regions
+        self.global_ranks = ranks
+        self.outbox: List[Delivery] = []
+        self._arrivals: Dict[str, Arrivals] = {}
+        self._last_instruction = None
+        self._disconnects = []
+
+    def _device_rank(self, device):
+        return self.global_ranks[device.name]
+
+    def is_local(self, instruction: Instruction) -> bool:
+        """Indica si una instrucción modifica dispositivos de la región."""
+
+        return any(
+            self.regions.get(name, 0) == self.region
+            for name in instruction_devices(instruction)
+        )
+
+    def connect(self, port_1: str, port_2: str):
+        local = [
+            self.regions.get(port_device(name), 0) == self.region
+            for name in (port_1, port_2)
+        ]
+        if all(local):
+            super().connect(port_1, port_2)
+            return
+
+        port_name, peer_name = (
+            (port_1, port_2) if local[0] else (port_2, port_1)
+        )
+        if port_name not in self.ports:
+            raise ValueError(f"Port {port_name} does not exist.")
+        arrivals = Arrivals(self.ports[port_name])
+        self._arrivals[port_name] = arrivals
+        self._ranks[arrivals] = self.global_ranks[port_device(peer_name)]
+        self._synced[arrivals] = self.time - 1
+        arrivals.simulation_time = self.time - 1
+
+        with self._touching(self._port_devices[port_name]):
+            BoundaryLink(self, self.ports[port_name], peer_name)
+
+    def begin(self, instructions: Iterable[Instruction]):
+        """
+        Programa las instrucciones de la región.
+
+        Parameters
+        ----------
+        instructions : Iterable[Instruction]
+            Instrucciones de todo el script.
+        """
+
+        self.time = 0
+        for instr in instructions:
+            if self.is_local(instr):
+                self.schedule(instr)
+
+    def schedule(self, instruction: Instruction):
+        super().schedule(instruction)
+        if (
+            self._last_instruction is None
+            or instruction.time > self._last_instruction
+        ):
+            self._last_instruction = instruction.time
+        if isinstance(instruction, DisconnectIns):
+            heappush(self._disconnects, instruction.time)
+
+    def deliver(self, deliveries: Iterable[Delivery]):
+        """Programa transmisiones que llegan desde otras regiones."""
+
+        for port_name, time, bits in deliveries:
+            arrivals = self._arrivals[port_name]
+            with self._touching(arrivals):
+                arrivals.pending.append((time, bits))
+
+    def run_until(self, time: int) -> List[List[int]]:
+        """
+        Simula los ciclos anteriores a ``time``.
+
+        Parameters
+        ----------
+        time : int
+            Primer ciclo que no se simula.
+
+        Returns
+        -------
+        List[List[int]]
+            Intervalos ``[inicio, fin)`` de los ciclos en los que la región
+            tenía trabajo pendiente.
+        """
+
+        busy = []
+
+        def mark(start, end):
+            if busy and busy[-1][1] == start:
+                busy[-1][1] = end
+            else:
+                busy.append([start, end])
+
+        while self.time < time:
+            if self._has_pending_work():
+                mark(self.time, self.time + 1)
+            self.update()
+            if self.engine != "event" or self.time >= time:
+                continue
+            next_time = self._next_event_time()
+            target = time if next_time is None else min(next_time, time)
+            if target > self.time:
+                if self._has_pending_work():
+                    mark(self.time, target)
+                self._advance(target - self.time)
+        return busy
+
+    def state(self) -> Tuple[Optional[int], bool, int]:
+        """
+        Estado de la región al comenzar el ciclo actual.
+
+        Returns
+        -------
+        Tuple[Optional[int], bool, int]
+            Próximo evento, si la región tiene trabajo pendiente y el
+            primer ciclo en el que puede dejar de tenerlo: las
+            instrucciones programadas y los dispositivos que están
+            enviando la mantienen ocupada al menos hasta que se ejecuta la
+            última o hasta la próxima actualización de cada dispositivo,
+            salvo que antes se desconecte un puerto.
+        """
+
+        busy_until = self.time
+        if self.instructions:
+            busy_until = self._last_instruction + 1
+        while self._disconnects and self._disconnects[0] < self.time:
+            heappop(self._disconnects)
+        wakes = [self._wake_times.get(device) for device in self._sending]
+        wakes = [wake for wake in wakes if wake is not None]
+        if wakes:
+            wake = max(wakes)
+            if self._disconnects:
+                wake = min(wake, self._disconnects[0])
+            busy_until = max(busy_until, wake + 1)
+        return (
+            self._next_event_time(),
+            self._has_pending_work(),
+            busy_until,
+        )
+
+    def finish(self, time: int):
+        """Termina la simulación en el ciclo ``time`` y guarda los logs."""
+
+        self.time = time
+        self._save_logs()
+
+
+def _run_region(
+    connection,
+    script_path: str,
+    config: Config,
+    output_path: str,
+    region: int,
+    regions: Dict[str, int],
+    ranks: Dict[str, Tuple[int, int]],
+    backoff_seed: int,
+):
+    """
+    Proceso de una región. Recibe ``("run", entregas, hasta)`` o
+    ``("finish", tiempo, None)`` y responde con el estado de la región.
+    """
+
+    stdout_path = Path(output_path, f"region_{region}.txt")
+    with open(stdout_path, "w") as out, contextlib.redirect_stdout(out):
+        try:
+            simulation = RegionSimulation(
+                region, regions, ranks, backoff_seed, output_path, config
+            )
+            simulation.begin(load_instructions(script_path))
+            connection.send((simulation.end_delay,) + simulation.state())
+            while True:
+                command, argument, time = connection.recv()
+                if command == "finish":
+                    simulation.finish(argument)
+                    connection.send(None)
+                    return
+                simulation.deliver(argument)
+                busy = simulation.run_until(time)
+                outbox, simulation.outbox = simulation.outbox, []
+                connection.send((busy, outbox) + simulation.state())
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+
+
+def _receive(connection):
+    message = connection.recv()
+    if isinstance(message, tuple) and message[:1] == ("error",):
+        raise RuntimeError(f"Region process failed:\n{message[1]}")
+    return message
+
+
+def _busy_ticks(intervals: List[List[int]]) -> int:
+    """Cantidad de ciclos cubiertos por la unión de varios intervalos."""
+
+    total, end = 0, None
+    for start, stop in sorted(intervals):
+        if end is not None and start < end:
+            start = end
+        if stop > start:
+            total += stop - start
+            end = stop
+    return total
+
+
+def min_transmission_bits(instructions: Iterable[Instruction]) -> int:
+    """
+    Bits de la transmisión más corta que puede haber en un script: un
+    frame tiene al menos su cabecera, pero ``send`` envía los bits en
+    paquetes de cualquier tamaño.
+    """
+
+    if any(isinstance(instr, SendIns) for instr in instructions):
+        return 1
+    return HEADER_SIZE
+
+
+def check_config(config: Config):
+    """
+    Verifica que una configuración se puede simular por regiones.
+
+    Raises
+    ------
+    ValueError
+        Si no se usa el modo de transmisión ``frame`` o ``error_prob`` no
+        es ``0``.
+    """
+
+    if config.transmission_mode != "frame":
+        raise ValueError(
+            "Partitioned runs need the frame transmission mode, in bit mode "
+            "a written bit can be read in the same tick."
+        )
+    if config.error_prob:
+        raise ValueError(
+            "Partitioned runs need error_prob 0, the errors are drawn from "
+            "a random generator shared by the whole network."
+        )
+
+
+def run_partitioned(
+    script_path: str,
+    regions: Optional[int] = None,
+    output_path: str = "output",
+    config: Config = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta un script dividiendo la red en regiones, cada una en su propio
+    proceso.
+
+    Los logs se guardan en ``output_path`` igual que en una simulación
+    completa y lo que imprime cada región en ``region_<n>.txt``.
+
+    Parameters
+    ----------
+    script_path : str
+        Script con las instrucciones de la simulación.
+    regions : int, optional
+        Cantidad máxima de regiones, por defecto una por núcleo.
+    output_path : str, optional
+        Carpeta de los logs, por defecto ``output``.
+    config : Config, optional
+        Configuración, por defecto se lee ``config.txt``.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Tiempo simulado (``time``), dispositivos de cada región
+        (``devices``), cables cortados (``cut_links``) y ventanas de
+        sincronización (``windows``).
+
+    Raises
+    ------
+    ValueError
+        Si la configuración no se puede simular por regiones (ver
+        ``check_config``).
+    """
+
+    if config is None:
+        config = Config.load()
+    check_config(config)
+    instructions = load_instructions(script_path)
+    assignment = partition_devices(
+        instructions, regions or os.cpu_count() or 1
+    )
+    ranks = device_ranks(instructions)
+    lookahead = config.signal_time * min_transmission_bits(instructions)
+    count = max(assignment.values(), default=0) + 1
+    devices = [0] * count
+    for region in assignment.values():
+        devices[region] += 1
+    # La misma semilla que toma una ``Simulation`` al crearse
+    backoff_seed = random.getrandbits(32)
+    cut_links = sum(
+        1
+        for instr in instructions
+        if isinstance(instr, ConnectIns)
+        and assignment.get(port_device(instr.port1))
+        != assignment.get(port_device(instr.port2))
+    )
+
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    connections, processes = [], []
+    for region in range(count):
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_run_region,
+            args=(
+                child,
+                script_path,
+                config,
+                output_path,
+                region,
+                assignment,
+                ranks,
+                backoff_seed,
+            ),
+        )
+        process.start()
+        connections.append(parent)
+        processes.append(process)
+
+    try:
+        states = [_receive(c) for c in connections]
+        end_delay = states[0][0]
+        nexts = [s[1] for s in states]
+        pending = any(s[2] for s in states)
+        busy_until = max(s[3] for s in states)
+        inboxes: List[List[Delivery]] = [[] for _ in range(count)]
+        time, windows = 0, 0
+
+        while True:
+            # Mismo criterio que ``Simulation.is_running``: un ciclo sin
+            # trabajo pendiente en toda la red consume ``end_delay`` y la
+            # ventana no puede agotarlo antes de su último ciclo
+            if not pending and end_delay == 1:
+                break
+            busy_until = max(busy_until, time + (1 if pending else 0))
+            until = busy_until + end_delay - 1
+            events = [t for t in nexts if t is not None]
+            events += [d[1] for inbox in inboxes for d in inbox]
+            if events:
+                until = min(until, min(events) + lookahead)
+
+            for connection, inbox in zip(connections, inboxes):
+                connection.send(("run", inbox, until))
+            replies = [_receive(c) for c in connections]
+            windows += 1
+
+            busy = [i for reply in replies for i in reply[0]]
+            end_delay -= until - time - _busy_ticks(busy)
+            if end_delay < 1:
+                raise RuntimeError(f"Window up to {until} ran past the end.")
+            inboxes = [[] for _ in range(count)]
+            for reply in replies:
+                for delivery in reply[1]:
+                    if delivery[1] < until:
+                        raise RuntimeError(
+                            f"Transmission to {delivery[0]} ends at "
+                            f"{delivery[1]}, before the window end {until}."
+                        )
+                    inboxes[assignment[port_device(delivery[0])]].append(
+                        delivery
+                    )
+            nexts = [reply[2] for reply in replies]
+            pending = any(reply[3] for reply in replies)
+            busy_until = max(reply[4] for reply in replies)
+            time = until
+
+        for connection in connections:
+            connection.send(("finish", time, None))
+        for connection in connections:
+            _receive(connection)
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    return {
+        "time": time,
+        "devices": devices,
+        "cut_links": cut_links,
+        "windows": windows,
+    }
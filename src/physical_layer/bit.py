@@ -17,3 +17,124 @@ class VoltageDecodification(enum.Enum):
         if self.value == 2:
             return "Coll"
         return str(self.value)
+
+
+class BitBuffer:
+    """
+    Immutable sequence of bits packed in an int.
+
+    The first bit of the sequence is the most significant bit of ``value``.
+    Indexing returns a single bit as a ``VoltageDecodification`` (what the
+    physical layer puts on a wire) and slicing returns a new ``BitBuffer``
+    with the same clamping rules as list slicing.
+
+    Parameters
+    ----------
+    value : int, optional
+        Packed bits, by default 0.
+    length : int, optional
+        Number of bits, by default 0.
+    """
+
+    __slots__ = ("value", "length")
+
+    def __init__(self, value: int = 0, length: int = 0) -> None:
+        if length < 0 or value < 0 or value >> length:
+            raise ValueError(f"{value} does not fit in {length} bits")
+        self.value = value
+        self.length = length
+
+    @staticmethod
+    def from_bits(bits) -> "BitBuffer":
+        """Build a buffer from an iterable of bits (ints or VD)."""
+        value, length = 0, 0
+        for bit in bits:
+            value = value << 1 | int(getattr(bit, "value", bit))
+            length += 1
+        return BitBuffer(value, length)
+
+    @staticmethod
+    def from_str(bits: str) -> "BitBuffer":
+        """Build a buffer from a string of ``0`` and ``1``."""
+        return BitBuffer(int(bits, 2) if bits else 0, len(bits))
+
+    @staticmethod
+    def from_int(number: int, size: int) -> "BitBuffer":
+        """Build a buffer with the last ``size`` bits of ``number``."""
+        return BitBuffer(number & ((1 << size) - 1), size)
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "BitBuffer":
+        """Build a buffer from the bits of ``data``."""
+        return BitBuffer(int.from_bytes(data, "big"), 8 * len(data))
+
+    def to_bytes(self) -> bytes:
+        """Bytes of the buffer, padded with zeros at the end."""
+        rest = -self.length % 8
+        return (self.value << rest).to_bytes((self.length + rest) // 8, "big")
+
+    def count(self) -> int:
+        """Number of bits set to one."""
+        return bin(self.value).count("1")
+
+    def flip(self, index: int) -> "BitBuffer":
+        """Copy of the buffer with the bit at ``index`` inverted."""
+        index = self._index(index)
+        return BitBuffer(
+            self.value ^ (1 << (self.length - 1 - index)), self.length
+        )
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("BitBuffer index out of range")
+        return index
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                raise ValueError("BitBuffer slices do not support steps")
+            if stop <= start:
+                return BitBuffer()
+            size = stop - start
+            value = self.value >> (self.length - stop) & ((1 << size) - 1)
+            return BitBuffer(value, size)
+
+        index = self._index(key)
+        if self.value >> (self.length - 1 - index) & 1:
+            return VoltageDecodification.ONE
+        return VoltageDecodification.ZERO
+
+    def __add__(self, other: "BitBuffer") -> "BitBuffer":
+        if not isinstance(other, BitBuffer):
+            return NotImplemented
+        return BitBuffer(
+            self.value << other.length | other.value,
+            self.length + other.length,
+        )
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitBuffer):
+            return NotImplemented
+        return self.value == other.value and self.length == other.length
+
+    def __hash__(self) -> int:
+        return hash((self.value, self.length))
+
+    def __str__(self) -> str:
+        return f"{self.value:0{self.length}b}" if self.length else ""
+
+    def __repr__(self) -> str:
+        return f"BitBuffer('{self}')"
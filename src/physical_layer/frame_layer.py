@@ -0,0 +1,228 @@
+from typing import List
+from random import Random
+
+from config import Config, DEFAULT_CONFIG
+from .bit import BitBuffer
+from .port import Port
+
+
+class Transmission:
+    """A whole package travelling through a wire.
+
+    Parameters
+    ----------
+    bits : BitBuffer
+        Transmitted bits.
+    source : Transmission, optional
+        Transmission this one repeats, when sent by a hub.
+    """
+
+    def __init__(self, bits: BitBuffer, source=None) -> None:
+        self.bits = bits
+        self.source = source
+        self.collided = False
+        self.target = None
+
+    def collide(self):
+        """Mark the transmission as collided and tell the receiving port."""
+
+        if self.collided:
+            return
+        self.collided = True
+        if self.target is not None and self.target.transmission_callback:
+            self.target.transmission_callback(self, True)
+
+
+class FramePhysicalLayer:
+    """Physical layer for the ``frame`` transmission mode.
+
+    Instead of putting one bit on the wire every ``SIGNAL_TIME`` ticks, a
+    whole package occupies the wire for ``len(package) * SIGNAL_TIME`` ticks
+    and is delivered to the other end when it finishes. Transmissions that
+    overlap on the same wire collide and are dropped. A layer that sees a
+    collision on its incoming wire while sending aborts and retries after a
+    random backoff, like ``PhysicalLayer`` does. The backoff is drawn from
+    a generator of the layer, seeded with the port name (see ``seed``), so
+    it does not depend on the order in which the rest of the network draws
+    random numbers.
+
+    Receive callbacks are called with the bits of each package.
+    """
+
+    def __init__(self, port: Port, config: Config = DEFAULT_CONFIG) -> None:
+        self.port = port
+        self.signal_time = config.signal_time
+        self.port.transmission_callback = self.transmission_received
+
+        self.data = []
+        self.package = None
+        self.transmission = None
+        self.cable = None
+        self.remaining = 0
+        self.time_to_send = 0
+        self.max_time_to_send = self.signal_time
+        self.collision_detected = False
+        self.received = []
+        self.random = Random(port.name)
+        (
+            self.on_send_callbacks,
+            self.on_receive_callbacks,
+            self.on_collision_callbacks,
+        ) = ([], [], [])
+
+    @property
+    def is_sending(self):
+        return self.transmission is not None
+
+    @property
+    def is_active(self):
+        return (
+            self.is_sending or self.time_to_send > 0
+        ) and self.port.cable is not None
+
+    @property
+    def name(self):
+        return self.port.name
+
+    def send(self, data: List[BitBuffer]):
+        """Add new data to be sent"""
+        self.data += data
+
+    def update(self):
+        """
+        Update the state of the component.
+
+        """
+
+        if self.port is None or self.port.cable is None:
+            return
+
+        if self.transmission is not None and self.cable is not self.port.cable:
+            # The port was plugged into another cable, send it again there
+            self.abort()
+
+        received, self.received = self.received, []
+        for bits in received:
+            for callback in self.on_receive_callbacks:
+                callback(bits)
+
+        if self.collision_detected:
+            self.collision_detected = False
+            if self.transmission is not None:
+                self.abort()
+                self.wait_for_network_availability()
+                for callback in self.on_collision_callbacks:
+                    callback()
+
+        if self.time_to_send:
+            self.time_to_send -= 1
+            if self.time_to_send:
+                return
+
+        if self.transmission is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.cable.finish(self.port, self.transmission)
+                self.transmission = None
+                self.cable = None
+                for callback in self.on_send_callbacks:
+                    callback(self.package)
+                self.package = None
+            return
+
+        if self.package is None:
+            if not self.data:
+                return
+            self.package = self.data.pop(0)
+            self.max_time_to_send = self.signal_time
+
+        self.transmission = Transmission(self.package)
+        self.remaining = len(self.package) * self.signal_time
+        self.cable = self.port.cable
+        self.cable.transmit(self.port, self.transmission)
+
+    def next_update(self):
+        """
+        Number of updates until the next one that does more than advance
+        counters, or None if the layer stays idle.
+        """
+
+        if self.port is None or self.port.cable is None:
+            return None
+        if self.received or self.collision_detected:
+            return 1
+        if self.transmission is not None and self.cable is not self.port.cable:
+            return 1
+        if self.time_to_send:
+            return self.time_to_send
+        if self.transmission is not None:
+            return self.remaining
+        if self.package is not None or self.data:
+            return 1
+        return None
+
+    def skip(self, ticks: int):
+        """Apply ``ticks`` consecutive trivial updates at once."""
+
+        if ticks <= 0 or self.port is None or self.port.cable is None:
+            return
+        if self.time_to_send:
+            self.time_to_send -= ticks
+        elif self.transmission is not None:
+            self.remaining -= ticks
+
+    def transmission_received(self, transmission: Transmission, started):
+        """
+        Called by the wire when a transmission towards this layer starts or
+        finishes, or when the wire is disconnected while this layer sends.
+        """
+
+        if transmission is self.transmission:
+            # The wire was disconnected, send the package again on the next
+            self.transmission = None
+            self.cable = None
+            self.remaining = 0
+        elif started:
+            if transmission.collided and self.transmission is not None:
+                self.collision_detected = True
+        elif not transmission.collided:
+            self.received.append(transmission.bits)
+
+    def abort(self):
+        """Stop the current transmission, which the receiver will drop."""
+
+        self.transmission.collided = True
+        self.cable.finish(self.port, self.transmission)
+        self.transmission = None
+        self.cable = None
+        self.remaining = 0
+
+    def wait_for_network_availability(self):
+        """
+        Wait for the network to be available
+        """
+
+        self.time_to_send = (
+            self.random.randint(1, self.max_time_to_send) * self.signal_time
+        )
+        self.max_time_to_send *= 2
+
+    def seed(self, seed: int):
+        """
+        Seed the backoff generator with ``seed`` and the port name.
+        """
+
+        self.random.seed(f"{seed}:{self.port.name}")
+
+    def disconnect(self):
+        """
+        Disconnects the physical layer from the port
+        """
+
+        if self.transmission is not None:
+            self.abort()
+        self.port.disconnect()
+        self.max_time_to_send = self.signal_time
+        self.time_to_send = 0
+        self.collision_detected = False
+        self.received = []
@@ -1,8 +1,8 @@
 from typing import List
 from random import randint
 
-from constants import SIGNAL_TIME
-from .bit import VoltageDecodification as VD
+from config import Config, DEFAULT_CONFIG
+from .bit import BitBuffer, VoltageDecodification as VD
 from .port import Port
 
 
@@ -11,8 +11,9 @@ class PhysicalLayer:
     at physical layer level
     """
 
-    def __init__(self, port: Port) -> None:
+    def __init__(self, port: Port, config: Config = DEFAULT_CONFIG) -> None:
         self.port = port
+        self.signal_time = config.signal_time
         # Register write callback for detect collisions
         self.port.write_callback = self.port_was_written
 
@@ -21,7 +22,7 @@ class PhysicalLayer:
         self.package_index = 0
         self.time_to_send = 0
         self.read_time = 0
-        self.max_time_to_send = SIGNAL_TIME
+        self.max_time_to_send = self.signal_time
         self.send_time = 0
         self.is_sending = False
         self.time_connected = 0
@@ -49,7 +50,7 @@ class PhysicalLayer:
         if not self.current_package:
             if self.data:
                 self.current_package = self.data.pop(0)
-                self.max_time_to_send = SIGNAL_TIME
+                self.max_time_to_send = self.signal_time
                 self.package_index = 0
                 self.send_time = 0
                 self.is_sending = True
@@ -58,7 +59,7 @@ class PhysicalLayer:
                 self.is_sending = False
                 self.port.write(VD.NULL)
 
-    def send(self, data: List[List[VD]]):
+    def send(self, data: List[BitBuffer]):
         """Add new data to be sent"""
         self.data += data
 
@@ -86,7 +87,7 @@ class PhysicalLayer:
             elif self.received_bit != VD.NULL:
                 for callback in self.on_receive_callbacks:
                     callback(self.received_bit)
-            self.read_time = SIGNAL_TIME
+            self.read_time = self.signal_time
 
         self.load_package()
 
@@ -110,18 +111,68 @@ class PhysicalLayer:
                     self.wait_for_network_availability()
                     return
             self.send_time += 1
-            if self.send_time == SIGNAL_TIME:
+            if self.send_time == self.signal_time:
                 self.package_index += 1
                 if self.package_index == len(self.current_package):
                     self.current_package = []
                 self.send_time = 0
 
+    def next_update(self):
+        """
+        Number of updates until the next one that does more than advance
+        counters, or None if the layer stays idle until it is written to or
+        given new data.
+        """
+
+        if self.port is None or self.port.cable is None:
+            return None
+
+        ticks = []
+        if self.received_bit != VD.NULL and (
+            self.received_bit != VD.COLLISION or self.is_sending
+        ):
+            ticks.append(self.read_time if self.read_time > 0 else 1)
+
+        if not self.current_package:
+            if self.data or self.is_sending:
+                return 1
+            if self.time_to_send:
+                ticks.append(self.time_to_send)
+        elif self.time_to_send:
+            ticks.append(self.time_to_send)
+        elif self.send_time == 0:
+            return 1
+        else:
+            ticks.append(self.signal_time - self.send_time)
+
+        return min(ticks) if ticks else None
+
+    def skip(self, ticks: int):
+        """
+        Apply ``ticks`` consecutive updates at once. Only valid while they
+        are fewer than the value returned by ``next_update``.
+        """
+
+        if ticks <= 0 or self.port is None or self.port.cable is None:
+            return
+
+        self.time_connected += ticks
+        read_time = self.read_time if self.read_time > 0 else 1
+        self.read_time = (read_time - ticks - 1) % self.signal_time + 1
+
+        if self.time_to_send:
+            self.time_to_send -= ticks
+        elif self.current_package:
+            self.send_time += ticks
+
     def wait_for_network_availability(self):
         """
         Wait for the network to be available
         """
 
-        self.time_to_send = randint(1, self.max_time_to_send) * SIGNAL_TIME
+        self.time_to_send = (
+            randint(1, self.max_time_to_send) * self.signal_time
+        )
         self.extend_max_time_to_send()
         self.package_index = 0
         self.send_time = 0
@@ -129,7 +180,7 @@ class PhysicalLayer:
 
     def port_was_written(self):
         if self.read_time == 0:
-            self.read_time = SIGNAL_TIME
+            self.read_time = self.signal_time
 
         self.received_bit = self.port.read()
 
@@ -148,6 +199,6 @@ class PhysicalLayer:
         self.is_sending = False
         self.send_time = 0
         self.sending_bit = None
-        self.max_time_to_send = SIGNAL_TIME
+        self.max_time_to_send = self.signal_time
         self.time_connected = 0
         self.received_bits = []
@@ -10,6 +10,10 @@ class Port:
         self.cable = None
         self.port_name = port_name
         self.write_callback = write_callback
+        # Called with (transmission, started) in ``frame`` transmission mode
+        self.transmission_callback = None
+        # Called after the port is connected or disconnected
+        self.connection_callback = None
 
     @property
     def name(self):
@@ -19,10 +23,14 @@ class Port:
         """Try to connecto to the given wire. If wire is alredy connected,
         an WireConnectionError is raised."""
         self.cable = cable
+        if self.connection_callback is not None:
+            self.connection_callback()
 
     def disconnect(self):
         self.cable.disconnect(self)
         self.cable = None
+        if self.connection_callback is not None:
+            self.connection_callback()
 
     def write(self, value) -> None:
         """Write the value to the wire"""
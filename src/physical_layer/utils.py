@@ -1,14 +1,12 @@
-from typing import List
+from .bit import BitBuffer
 
-from .bit import VoltageDecodification as VD
 
-
-def from_bit_data_to_number(data: List[VD]):
+def from_bit_data_to_number(data: BitBuffer):
     """Convierte los datos de una lista de bits a un número en base decimal.
 
     Parameters
     ----------
-    data : List[int]
+    data : BitBuffer
         Datos a convertir.
 
     Returns
@@ -17,4 +15,4 @@ def from_bit_data_to_number(data: List[VD]):
         Número resultante.
     """
 
-    return int("".join([str(bit) for bit in data]), 2)
+    return data.value
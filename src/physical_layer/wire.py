@@ -1,4 +1,5 @@
 from constants import SIGNAL_TIME
+from config import Config, DEFAULT_CONFIG
 from .bit import VoltageDecodification
 from .exceptions import PortNotConnectedError, TryToWriteOnTransmission
 
@@ -6,15 +7,16 @@ from .exceptions import PortNotConnectedError, TryToWriteOnTransmission
 class Wire:
     """Represents a physical wire"""
 
-    def __init__(self) -> None:
+    def __init__(self, signal_time: int = SIGNAL_TIME) -> None:
         self.value: VoltageDecodification = VoltageDecodification.NULL
         self.time_to_reset = 0
+        self.signal_time = signal_time
 
     def write(self, value: VoltageDecodification):
         if self.time_to_reset != 0:
             value = VoltageDecodification.COLLISION
         self.value = value
-        self.time_to_reset = SIGNAL_TIME
+        self.time_to_reset = self.signal_time
 
     def update(self):
         if self.value == VoltageDecodification.COLLISION:
@@ -24,18 +26,50 @@ class Wire:
         elif self.time_to_reset > 0:
             self.time_to_reset -= 1
 
+    def skip(self, ticks: int):
+        """Apply ``ticks`` consecutive updates at once."""
+        if ticks <= 0:
+            return
+        if (
+            self.value == VoltageDecodification.COLLISION
+            or ticks > self.time_to_reset
+        ):
+            self.value = VoltageDecodification.NULL
+            self.time_to_reset = 0
+        else:
+            self.time_to_reset -= ticks
+
+    @staticmethod
+    def value_after(
+        value: VoltageDecodification, time_to_reset: int, ticks: int
+    ) -> VoltageDecodification:
+        """Value of a wire in the given state after ``ticks`` updates with
+        no writes, the same that ``skip`` would leave."""
+        if ticks <= 0:
+            return value
+        if value == VoltageDecodification.COLLISION or ticks > time_to_reset:
+            return VoltageDecodification.NULL
+        return value
+
     def can_write(self) -> bool:
-        return self.time_to_reset == 0 or self.time_to_reset == SIGNAL_TIME
+        return (
+            self.time_to_reset == 0 or self.time_to_reset == self.signal_time
+        )
 
 
 class Duplex:
     """Represents a duplex wire"""
 
-    def __init__(self, port1, port2) -> None:
-        self.wire1 = Wire()
-        self.wire2 = Wire()
+    def __init__(self, port1, port2, config: Config = DEFAULT_CONFIG) -> None:
+        self.wire1 = Wire(config.signal_time)
+        self.wire2 = Wire(config.signal_time)
         self.port1 = port1
         self.port2 = port2
+        self.write_callback = None
+        # Whole-frame transmissions in progress on each wire, used by the
+        # ``frame`` transmission mode
+        self.transmissions1 = []
+        self.transmissions2 = []
         self.port1.connect(self)
         self.port2.connect(self)
 
@@ -48,7 +82,17 @@ class Duplex:
 
         raise PortNotConnectedError(port)
 
+    @property
+    def is_quiet(self) -> bool:
+        """Indicates if updating the wire would not change it"""
+        return all(
+            w.value == VoltageDecodification.NULL and w.time_to_reset == 0
+            for w in (self.wire1, self.wire2)
+        )
+
     def write(self, port, value: VoltageDecodification):
+        if self.write_callback is not None:
+            self.write_callback()
         if port == self.port1:
             self.wire1.write(value)
             self.port2.write_callback()
@@ -58,6 +102,46 @@ class Duplex:
         else:
             raise PortNotConnectedError(port)
 
+    def wires(self, port):
+        """Wires ``(received, sent)`` as seen from ``port``."""
+        if port == self.port1:
+            return self.wire2, self.wire1
+        if port == self.port2:
+            return self.wire1, self.wire2
+        raise PortNotConnectedError(port)
+
+    def _frame_direction(self, port):
+        if port == self.port1:
+            return self.transmissions1, self.port2
+        if port == self.port2:
+            return self.transmissions2, self.port1
+        raise PortNotConnectedError(port)
+
+    def transmit(self, port, transmission):
+        """
+        Start a whole-frame transmission from ``port``. If another one is
+        already travelling on the same wire both of them collide.
+        """
+        active, peer = self._frame_direction(port)
+        transmission.target = peer
+        if active:
+            transmission.collided = True
+            for other in active:
+                other.collide()
+        active.append(transmission)
+        if peer.transmission_callback is not None:
+            peer.transmission_callback(transmission, True)
+
+    def finish(self, port, transmission):
+        """End a whole-frame transmission started from ``port``."""
+        if self.port1 is None:
+            # The frames in progress ended when the wire was disconnected
+            return
+        active, peer = self._frame_direction(port)
+        active.remove(transmission)
+        if peer.transmission_callback is not None:
+            peer.transmission_callback(transmission, False)
+
     def read(self, port, received=True) -> VoltageDecodification:
         if port == self.port1:
             return self.wire2.value if received else self.wire1.value
@@ -69,13 +153,33 @@ class Duplex:
         self.wire1.update()
         self.wire2.update()
 
+    def skip(self, ticks: int):
+        self.wire1.skip(ticks)
+        self.wire2.skip(ticks)
+
     def disconnect(self, port):
         if port == self.port1:
-            self.port2.cable = None
+            peer = self.port2
         elif port == self.port2:
-            self.port1.cable = None
+            peer = self.port1
         else:
             raise PortNotConnectedError(port)
 
+        # Frames in progress are cut: both ends see them end collided
+        for active, sender, receiver in (
+            (self.transmissions1, self.port1, self.port2),
+            (self.transmissions2, self.port2, self.port1),
+        ):
+            cut, active[:] = list(active), []
+            for transmission in cut:
+                transmission.collided = True
+                for end in (receiver, sender):
+                    if end.transmission_callback is not None:
+                        end.transmission_callback(transmission, False)
+
+        peer.cable = None
+        if peer.connection_callback is not None:
+            peer.connection_callback()
+
         self.port1 = None
         self.port2 = None
@@ -0,0 +1,429 @@
+#! /usr/bin/env python3
+"""
+Traza binaria de los logs por bit de los puertos.
+
+Con ``port_log trace`` en la configuración, los valores de los puertos de
+hubs, switches, routers y hosts se guardan en ``trace.bin`` como registros
+de tamaño fijo ``(tiempo, dispositivo, puerto, recibido, enviado)`` en lugar
+de formatear una tabla de texto en cada bit. Los nombres de los
+dispositivos y sus puertos se guardan en ``trace_devices.txt``.
+
+Las tablas de texto se generan bajo demanda con::
+
+    python port_trace.py [dispositivos] [--path output] [--start T0]
+        [--end T1]
+"""
+
+import argparse
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from device import Hub
+from log_sink import (
+    CaptureFilter,
+    FileLogSink,
+    format_port_row,
+    format_table_end,
+    format_table_start,
+    port_table_header,
+)
+from physical_layer.bit import VoltageDecodification as VD
+
+TRACE_FILE_NAME = "trace.bin"
+DEVICES_FILE_NAME = "trace_devices.txt"
+
+_MAGIC = b"NSTRACE1"
+# tiempo, dispositivo, puerto, bit recibido, bit enviado
+_RECORD = struct.Struct("<IHHbb")
+_TIME = struct.Struct("<I")
+# Puerto de los registros de filas sin puertos
+_NO_PORT = 0xFFFF
+_DISCONNECTED = -2
+_VALUES = {vd.value: vd for vd in VD}
+_VALUES[_DISCONNECTED] = None
+_CHUNK_RECORDS = 4096
+
+
+def _code(value) -> int:
+    return _DISCONNECTED if value is None else value.value
+
+
+class TraceLogSink(FileLogSink):
+    """
+    Destino de logs que guarda los logs por bit de los puertos en una traza
+    binaria. El resto de los logs se escriben como en ``FileLogSink``.
+
+    Parameters
+    ----------
+    path : str
+        Carpeta donde se guardan los logs y la traza.
+    buffer_size : int, optional
+        Cantidad de líneas de texto por dispositivo que se guardan en
+        memoria antes de escribirlas, por defecto ``1024``.
+    capture : CaptureFilter, optional
+        Filtro de los logs por bit de los puertos.
+    trace_buffer : int, optional
+        Cantidad de bytes de la traza que se guardan en memoria antes de
+        escribirlos, por defecto 1 MB.
+    """
+
+    def __init__(
+        self,
+        path: str = "output",
+        buffer_size: int = 1024,
+        capture: CaptureFilter = None,
+        trace_buffer: int = 1 << 20,
+    ) -> None:
+        super().__init__(path, buffer_size, capture)
+        self.trace_buffer = trace_buffer
+        self._ids: Dict[str, int] = {}
+        self._trace = bytearray()
+        self._trace_file = None
+
+    def write_ports(self, device, time: int, received: list, sent: list):
+        device_id = self._ids.get(device.name)
+        if device_id is None:
+            device_id = self._register(device)
+
+        if not received:
+            self._trace += _RECORD.pack(
+                time, device_id, _NO_PORT, _DISCONNECTED, _DISCONNECTED
+            )
+        for port_id, (bit_re, bit_se) in enumerate(zip(received, sent)):
+            self._trace += _RECORD.pack(
+                time, device_id, port_id, _code(bit_re), _code(bit_se)
+            )
+        if len(self._trace) >= self.trace_buffer:
+            self.flush_trace()
+
+    def _register(self, device) -> int:
+        if self._trace_file is None:
+            Path(self.path).mkdir(parents=True, exist_ok=True)
+            self._trace_file = open(Path(self.path) / TRACE_FILE_NAME, "wb")
+            self._trace_file.write(_MAGIC)
+            open(Path(self.path) / DEVICES_FILE_NAME, "w").close()
+
+        device_id = len(self._ids)
+        self._ids[device.name] = device_id
+        kind = "hub" if isinstance(device, Hub) else "ports"
+        with open(Path(self.path) / DEVICES_FILE_NAME, "a") as file:
+            file.write(f"{device_id} {kind} {device.name} ")
+            file.write(" ".join(device.ports) + "\n")
+        return device_id
+
+    def flush_trace(self):
+        """Escribe en disco los registros pendientes de la traza."""
+
+        if self._trace_file is not None:
+            self._trace_file.write(self._trace)
+        self._trace = bytearray()
+
+    def close(self, device, path: str = None):
+        # Solo se escribe el archivo de texto si el dispositivo tiene logs
+        # que no son de sus puertos
+        if device.name in self._started or device.name in self._buffers:
+            super().close(device, path)
+
+    def finish(self):
+        self.flush_trace()
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+
+    def checkpoint(self, devices) -> dict:
+        state = super().checkpoint(devices)
+        if self._trace_file is not None:
+            self._trace_file.flush()
+            for name in (TRACE_FILE_NAME, DEVICES_FILE_NAME):
+                path = Path(self.path) / name
+                state[str(path)] = path.stat().st_size
+        return state
+
+    def restore(self, state: dict):
+        super().restore(state)
+        if self._ids:
+            self._trace_file = open(Path(self.path) / TRACE_FILE_NAME, "ab")
+
+    def branch(self, state: dict, path: str):
+        super().branch(state, path)
+        if self._ids:
+            self._trace_file = open(Path(self.path) / TRACE_FILE_NAME, "ab")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # El archivo de la traza se vuelve a abrir en ``restore``
+        state["_trace_file"] = None
+        return state
+
+
+class TraceDevice:
+    """
+    Dispositivo registrado en una traza.
+
+    Parameters
+    ----------
+    device_id : int
+        Identificador del dispositivo en la traza.
+    name : str
+        Nombre del dispositivo.
+    ports : List[str]
+        Nombres de los puertos.
+    hub : bool
+        Indica si el dispositivo es un hub.
+    """
+
+    def __init__(
+        self, device_id: int, name: str, ports: List[str], hub: bool
+    ) -> None:
+        self.device_id = device_id
+        self.name = name
+        self.ports = ports
+        self.hub = hub
+
+
+class TraceReader:
+    """
+    Lee una traza binaria de los logs de los puertos.
+
+    Parameters
+    ----------
+    path : str, optional
+        Carpeta donde se guardó la traza, por defecto ``output``.
+    """
+
+    def __init__(self, path: str = "output") -> None:
+        self.path = Path(path)
+        self.devices: Dict[str, TraceDevice] = {}
+        with open(self.path / DEVICES_FILE_NAME, "r") as file:
+            for line in file:
+                device_id, kind, name, *ports = line.split()
+                self.devices[name] = TraceDevice(
+                    int(device_id), name, ports, kind == "hub"
+                )
+
+    def _records(
+        self, start: int = None
+    ) -> Iterator[Tuple[int, int, int, int, int]]:
+        """
+        Recorre los registros de la traza desde el primero de tiempo
+        ``start``, que se busca sin leer los anteriores.
+        """
+
+        with open(self.path / TRACE_FILE_NAME, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{file.name} is not a port trace.")
+            if start is not None:
+                file.seek(self._first_record(file, start))
+            while True:
+                chunk = file.read(_RECORD.size * _CHUNK_RECORDS)
+                if not chunk:
+                    return
+                yield from _RECORD.iter_unpack(chunk)
+
+    @staticmethod
+    def _first_record(file, time: int) -> int:
+        """
+        Posición en el archivo del primer registro de tiempo ``time`` o
+        posterior. Los registros tienen tamaño fijo y se escriben en orden
+        de tiempo, por lo que se busca por bisección.
+        """
+
+        file.seek(0, os.SEEK_END)
+        low, high = 0, (file.tell() - len(_MAGIC)) // _RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            file.seek(len(_MAGIC) + middle * _RECORD.size)
+            if _TIME.unpack(file.read(_TIME.size))[0] < time:
+                low = middle + 1
+            else:
+                high = middle
+        return len(_MAGIC) + low * _RECORD.size
+
+    def device(self, name: str) -> TraceDevice:
+        """
+        Devuelve un dispositivo de la traza.
+
+        Raises
+        ------
+        ValueError
+            Si el dispositivo no tiene registros en la traza, por ejemplo
+            porque no existe o no escribió en sus puertos en el intervalo
+            capturado.
+        """
+
+        device = self.devices.get(name)
+        if device is None:
+            raise ValueError(
+                f"Device {name} has no records in the trace "
+                f"{self.path / TRACE_FILE_NAME}."
+            )
+        return device
+
+    def rows(
+        self, name: str, start: int = None, end: int = None
+    ) -> Iterator[Tuple[int, list, list]]:
+        """
+        Devuelve las filas de la tabla de un dispositivo.
+
+        Parameters
+        ----------
+        name : str
+            Nombre del dispositivo.
+        start : int, optional
+            Primer tiempo a devolver. Por defecto desde el inicio.
+        end : int, optional
+            Último tiempo a devolver. Por defecto hasta el final.
+
+        Returns
+        -------
+        Iterator[Tuple[int, List[VD], List[VD]]]
+            Tiempo y valores recibidos y enviados por cada puerto.
+
+        Raises
+        ------
+        ValueError
+            Si el dispositivo no tiene registros en la traza.
+        """
+
+        for _, time, received, sent in self._rows([name], start, end):
+            yield time, received, sent
+
+    def _rows(
+        self, names: List[str], start: int = None, end: int = None
+    ) -> Iterator[Tuple[str, int, list, list]]:
+        """
+        Filas de varios dispositivos en una sola lectura de la traza, en
+        orden de tiempo.
+        """
+
+        names = {self.device(name).device_id: name for name in names}
+        # Los registros de una fila son consecutivos
+        row = None
+        for time, d_id, port_id, bit_re, bit_se in self._records(start):
+            if port_id in (0, _NO_PORT):
+                if row is not None:
+                    yield row
+                    row = None
+                if end is not None and time > end:
+                    return
+                if d_id not in names:
+                    continue
+                row = (names[d_id], time, [], [])
+                if port_id == _NO_PORT:
+                    continue
+            if row is not None:
+                row[2].append(_VALUES[bit_re])
+                row[3].append(_VALUES[bit_se])
+        if row is not None:
+            yield row
+
+    def render(
+        self, name: str, start: int = None, end: int = None
+    ) -> Iterator[str]:
+        """
+        Genera la tabla de texto de los logs de un dispositivo, igual a la
+        que se escribe con ``port_log text``.
+
+        Parameters
+        ----------
+        name : str
+            Nombre del dispositivo.
+        start : int, optional
+            Primer tiempo de la tabla. Por defecto desde el inicio.
+        end : int, optional
+            Último tiempo de la tabla. Por defecto hasta el final.
+
+        Returns
+        -------
+        Iterator[str]
+            Fragmentos de la tabla.
+
+        Raises
+        ------
+        ValueError
+            Si el dispositivo no tiene registros en la traza.
+        """
+
+        device = self.device(name)
+        header = port_table_header(device.ports)
+        yield format_table_start(header)
+        for i, (time, received, sent) in enumerate(
+            self.rows(name, start, end)
+        ):
+            if i:
+                yield "\n"
+            yield format_port_row(time, received, sent, device.hub)
+        yield format_table_end(header)
+
+    def render_all(
+        self, names: List[str] = None, start: int = None, end: int = None
+    ) -> Dict[str, str]:
+        """
+        Genera las tablas de texto de varios dispositivos leyendo la traza
+        una sola vez (ver ``render``).
+
+        Parameters
+        ----------
+        names : List[str], optional
+            Nombres de los dispositivos. Por defecto todos los de la traza.
+        start : int, optional
+            Primer tiempo de las tablas. Por defecto desde el inicio.
+        end : int, optional
+            Último tiempo de las tablas. Por defecto hasta el final.
+
+        Returns
+        -------
+        Dict[str, str]
+            Tabla de cada dispositivo, en el orden dado.
+
+        Raises
+        ------
+        ValueError
+            Si algún dispositivo no tiene registros en la traza.
+        """
+
+        names = list(self.devices) if names is None else names
+        rows: Dict[str, List[str]] = {name: [] for name in names}
+        for name, time, received, sent in self._rows(names, start, end):
+            rows[name].append(
+                format_port_row(time, received, sent, self.devices[name].hub)
+            )
+
+        tables = {}
+        for name in names:
+            header = port_table_header(self.devices[name].ports)
+            tables[name] = (
+                format_table_start(header)
+                + "\n".join(rows[name])
+                + format_table_end(header)
+            )
+        return tables
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(
+        description="Render the port logs of a binary trace."
+    )
+    parser.add_argument(
+        "devices",
+        nargs="*",
+        help="Devices to render, all of them by default.",
+    )
+    parser.add_argument(
+        "--path", default="output", help="Folder with the trace."
+    )
+    parser.add_argument("--start", type=int, default=None)
+    parser.add_argument("--end", type=int, default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+
+    args = _parse_args()
+
+    reader = TraceReader(args.path)
+    tables = reader.render_all(args.devices or None, args.start, args.end)
+    for table in tables.values():
+        print(table, end="")
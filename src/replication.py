@@ -0,0 +1,356 @@
+"""
+Réplicas de un escenario con distintas semillas.
+
+Los errores de bits en ``Frame.build`` y las esperas tras una colisión son
+aleatorios, por lo que una sola ejecución dice poco. Se ejecuta el mismo
+script con semillas ``seed``, ``seed + 1``, ... en un
+``ProcessPoolExecutor`` y se resume cada métrica con su media y un
+intervalo de confianza de Student::
+
+    python net_sim.py replicate script.txt -n 100 --precision 0.05
+
+Con ``precision`` se deja de lanzar réplicas cuando el intervalo de todas
+las métricas es menor que esa fracción de su media.
+"""
+
+import csv
+import math
+import os
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from config import Config
+from instruction_parser import iter_instructions, load_instructions
+from instructions import PingIns
+from sweep import RESULT_COLUMNS, SweepPoint, format_summary, run_point
+
+REPLICAS_FILE_NAME = "replicas.csv"
+
+# Métricas de cada réplica que se resumen
+METRICS = (
+    "frames",
+    "errors",
+    "error_ratio",
+    "payloads",
+    "ping_success",
+    "sim_time",
+)
+
+# Valores críticos de la distribución t de Student a dos colas por nivel de
+# confianza, para los grados de libertad de ``_T_DEGREES``. Con más de 120
+# se usa el de la normal.
+_T_DEGREES = list(range(1, 31)) + [40, 60, 120]
+_T_TABLE = {
+    0.90: (
+        [6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833]
+        + [1.812, 1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734]
+        + [1.729, 1.725, 1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703]
+        + [1.701, 1.699, 1.697, 1.684, 1.671, 1.658, 1.645]
+    ),
+    0.95: (
+        [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262]
+        + [2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101]
+        + [2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052]
+        + [2.048, 2.045, 2.042, 2.021, 2.000, 1.980, 1.960]
+    ),
+    0.99: (
+        [63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250]
+        + [3.169, 3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878]
+        + [2.861, 2.845, 2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771]
+        + [2.763, 2.756, 2.750, 2.704, 2.660, 2.617, 2.576]
+    ),
+}
+
+
+class Estimate(NamedTuple):
+    """
+    Media de una métrica con su intervalo de confianza.
+
+    Attributes
+    ----------
+    mean : float
+        Media de las réplicas.
+    half_width : float
+        Mitad del ancho del intervalo, ``inf`` con una sola réplica.
+    count : int
+        Cantidad de réplicas.
+    """
+
+    mean: float
+    half_width: float
+    count: int
+
+    @property
+    def low(self) -> float:
+        return self.mean - self.half_width
+
+    @property
+    def high(self) -> float:
+        return self.mean + self.half_width
+
+    def is_precise(self, precision: float) -> bool:
+        """
+        Indica si el intervalo es menor que una fracción de la media.
+
+        Parameters
+        ----------
+        precision : float
+            Fracción de la media, por ejemplo ``0.05``.
+        """
+
+        return self.half_width <= precision * abs(self.mean)
+
+
+def t_critical(degrees: int, confidence: float = 0.95) -> float:
+    """
+    Valor crítico de la distribución t de Student a dos colas.
+
+    Parameters
+    ----------
+    degrees : int
+        Grados de libertad.
+    confidence : float, optional
+        Nivel de confianza: ``0.90``, ``0.95`` (por defecto) o ``0.99``.
+
+    Raises
+    ------
+    ValueError
+        Si el nivel de confianza no está en la tabla.
+    """
+
+    if confidence not in _T_TABLE:
+        raise ValueError(
+            f"Unsupported confidence {confidence}, use one of "
+            f"{', '.join(map(str, _T_TABLE))}"
+        )
+    # Con grados de libertad intermedios se usa la fila menor, más ancha
+    return _T_TABLE[confidence][bisect_right(_T_DEGREES, degrees) - 1]
+
+
+def estimate(values: Iterable[float], confidence: float = 0.95) -> Estimate:
+    """
+    Media e intervalo de confianza de una muestra.
+
+    Parameters
+    ----------
+    values : Iterable[float]
+        Valores de la métrica en cada réplica.
+    confidence : float, optional
+        Nivel de confianza, por defecto ``0.95``.
+    """
+
+    values = list(values)
+    count = len(values)
+    if not count:
+        return Estimate(math.nan, math.inf, 0)
+    mean = sum(values) / count
+    if count == 1:
+        return Estimate(mean, math.inf, 1)
+    variance = sum((v - mean) ** 2 for v in values) / (count - 1)
+    half_width = t_critical(count - 1, confidence) * math.sqrt(
+        variance / count
+    )
+    return Estimate(mean, half_width, count)
+
+
+def replica_metrics(row: Dict[str, Any], pings: int) -> Dict[str, float]:
+    """
+    Métricas de una réplica a partir de su fila de ``run_point``.
+
+    Parameters
+    ----------
+    row : Dict[str, Any]
+        Resultados de la réplica.
+    pings : int
+        Pings que envía el script, ``0`` si no envía ninguno.
+
+    Returns
+    -------
+    Dict[str, float]
+        Valor de cada métrica de ``METRICS``. ``error_ratio`` es la
+        fracción de frames con errores y ``ping_success`` la de pings
+        respondidos; no se incluyen si no hubo frames o pings.
+    """
+
+    metrics = {key: row[key] for key in METRICS if key in row}
+    if row["frames"]:
+        metrics["error_ratio"] = row["errors"] / row["frames"]
+    if pings:
+        metrics["ping_success"] = row["replies"] / pings
+    return metrics
+
+
+def summarize(
+    rows: List[Dict[str, Any]], pings: int, confidence: float = 0.95
+) -> Dict[str, Estimate]:
+    """
+    Estimación de cada métrica a partir de las réplicas terminadas.
+
+    Parameters
+    ----------
+    rows : List[Dict[str, Any]]
+        Resultados de las réplicas.
+    pings : int
+        Pings que envía el script.
+    confidence : float, optional
+        Nivel de confianza, por defecto ``0.95``.
+    """
+
+    metrics = [replica_metrics(row, pings) for row in rows]
+    return {
+        key: estimate([m[key] for m in metrics if key in m], confidence)
+        for key in METRICS
+        if any(key in m for m in metrics)
+    }
+
+
+def run_replicas(
+    script_path: str,
+    replicas: int = 30,
+    output_path: str = "output/replicas",
+    config: Config = None,
+    workers: Optional[int] = None,
+    window: Optional[int] = None,
+    seed: int = 0,
+    precision: Optional[float] = None,
+    min_replicas: int = 5,
+    confidence: float = 0.95,
+    targets: Optional[Iterable[str]] = None,
+) -> Dict[str, Estimate]:
+    """
+    Ejecuta réplicas de un script en paralelo y guarda sus resultados en
+    ``replicas.csv`` dentro de ``output_path``.
+
+    Parameters
+    ----------
+    script_path : str
+        Script con las instrucciones de la simulación.
+    replicas : int, optional
+        Cantidad máxima de réplicas, por defecto ``30``.
+    output_path : str, optional
+        Carpeta de las réplicas, por defecto ``output/replicas``.
+    config : Config, optional
+        Configuración, por defecto se lee ``config.txt``.
+    workers : int, optional
+        Procesos a usar, por defecto uno por núcleo.
+    window : int, optional
+        Lee el script de forma perezosa (ver ``iter_instructions``).
+    seed : int, optional
+        Semilla de la primera réplica, por defecto ``0``. La réplica ``i``
+        usa ``seed + i``.
+    precision : float, optional
+        Mitad del ancho de los intervalos, como fracción de la media, a
+        partir de la cual no se lanzan más réplicas. Las que ya estaban en
+        ejecución se terminan y se incluyen.
+    min_replicas : int, optional
+        Réplicas que se ejecutan antes de comprobar ``precision``, por
+        defecto ``5``.
+    confidence : float, optional
+        Nivel de confianza de los intervalos, por defecto ``0.95``.
+    targets : Iterable[str], optional
+        Métricas que deben alcanzar ``precision``, por defecto todas.
+
+    Returns
+    -------
+    Dict[str, Estimate]
+        Estimación de cada métrica (ver ``replica_metrics``).
+
+    Raises
+    ------
+    ValueError
+        Si una métrica de ``targets`` no existe.
+    """
+
+    # Falla antes de lanzar las réplicas si el nivel no está en la tabla
+    t_critical(1, confidence)
+    targets = set(METRICS if targets is None else targets)
+    if not targets <= set(METRICS):
+        unknown = ", ".join(sorted(targets - set(METRICS)))
+        raise ValueError(f"Unknown metrics: {unknown}")
+    if config is None:
+        config = Config.load()
+    if window is None:
+        instructions = load_instructions(script_path)
+    else:
+        instructions = iter_instructions(script_path, window)
+    pings = sum(
+        instr.repeat for instr in instructions if isinstance(instr, PingIns)
+    )
+    points = [
+        SweepPoint(i, {}, str(Path(output_path, f"{i:03d}")))
+        for i in range(replicas)
+    ]
+    workers = min(workers or os.cpu_count() or 1, replicas)
+
+    rows = []
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        launched = 0
+        while launched < len(points) or pending:
+            done = precision is not None and len(rows) >= min_replicas
+            if done:
+                summary = summarize(rows, pings, confidence)
+                done = all(
+                    e.is_precise(precision)
+                    for key, e in summary.items()
+                    if key in targets
+                )
+            while (
+                not done
+                and launched < len(points)
+                and (len(pending) < workers)
+            ):
+                point = points[launched]
+                pending.add(
+                    pool.submit(
+                        run_point,
+                        script_path,
+                        config,
+                        point,
+                        window,
+                        seed + point.index,
+                    )
+                )
+                launched += 1
+            if not pending:
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = future.result()
+                rows.append(row)
+                print(f"[{len(rows)}/{replicas}] replica {row['index']}")
+    rows.sort(key=lambda row: row["index"])
+
+    with open(Path(output_path, REPLICAS_FILE_NAME), "w", newline="") as file:
+        writer = csv.DictWriter(file, ["index", "seed", *RESULT_COLUMNS])
+        writer.writeheader()
+        writer.writerows({**row, "seed": seed + row["index"]} for row in rows)
+    return summarize(rows, pings, confidence)
+
+
+def format_estimates(estimates: Dict[str, Estimate]) -> str:
+    """
+    Tabla de texto con la estimación de cada métrica.
+
+    Parameters
+    ----------
+    estimates : Dict[str, Estimate]
+        Estimaciones de ``run_replicas``.
+    """
+
+    return format_summary(
+        [
+            {
+                "metric": key,
+                "mean": f"{e.mean:.6g}",
+                "+/-": f"{e.half_width:.3g}",
+                "low": f"{e.low:.6g}",
+                "high": f"{e.high:.6g}",
+                "n": e.count,
+            }
+            for key, e in estimates.items()
+        ]
+    )
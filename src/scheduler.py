@@ -0,0 +1,68 @@
+from heapq import heappop, heappush
+from itertools import count
+
+
+class EventQueue:
+    """
+    Cola de prioridad de eventos ordenados por tiempo.
+
+    Los eventos con el mismo tiempo se extraen según su prioridad y, a
+    igual prioridad, en el orden en que fueron añadidos.
+    """
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._counter = count()
+
+    def push(self, time: int, event, priority=0) -> None:
+        """
+        Añade un evento a la cola.
+
+        Parameters
+        ----------
+        time : int
+            Tiempo en milisegundos en el que ocurre el evento.
+        event : Any
+            Evento a guardar.
+        priority : Any, optional
+            Valor comparable que ordena los eventos de un mismo tiempo,
+            menor primero. Por defecto ``0``.
+        """
+
+        heappush(self._heap, (time, priority, next(self._counter), event))
+
+    def pop(self):
+        """
+        Extrae el próximo evento.
+
+        Returns
+        -------
+        Tuple[int, Any]
+            Tiempo y evento extraído.
+        """
+
+        time, _, _, event = heappop(self._heap)
+        return time, event
+
+    def peek(self):
+        """
+        Devuelve el próximo evento sin extraerlo.
+
+        Returns
+        -------
+        Tuple[int, Any]
+            Tiempo y evento.
+        """
+
+        time, _, _, event = self._heap[0]
+        return time, event
+
+    def peek_time(self):
+        """int : Tiempo del próximo evento o ``None`` si la cola está vacía."""
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
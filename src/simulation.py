@@ -1,45 +1,252 @@
-from random import random, randint
-from typing import List
-
-from physical_layer.bit import VoltageDecodification as VD
-from device import Device, Host, Route, Router
+import io
+import os
+import pickle
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from itertools import count, islice
+from pathlib import Path
+from random import getrandbits, getstate, random, randint, setstate
+from typing import TYPE_CHECKING
+
+from physical_layer.bit import BitBuffer
+from device import Device, Host, PortDevice, Route, Router
 from physical_layer.wire import Duplex
 from physical_layer.port import Port
-from config import check_config, CONFIG
-from constants import SIGNAL_TIME
+from config import Config
 from datalink_layer.error_detection import get_error_detection_data
 from network_layer.ip import IP
 from network_layer.ip_sender import IPPacketSender
+from scheduler import EventQueue
+from log_sink import CaptureFilter, FileLogSink, LogSink
+from port_trace import TraceLogSink
+from topology import Topology
+from topology_builder import AddressPool, TopologyBuilder
+
+if TYPE_CHECKING:
+    from instructions import Instruction
+
+ENGINES = ("tick", "event")
+ROUTING = ("static", "link_state")
+
+# Los puntos de control empiezan con ``CHECKPOINT_MAGIC`` y la versión del
+# formato en dos bytes, seguidos del estado comprimido con ``zlib``
+CHECKPOINT_MAGIC = b"NETSIMCP"
+CHECKPOINT_VERSION = 4
+
+# Prioridades que delimitan la fase de actualización de los dispositivos
+# dentro de un ciclo. Los hosts se actualizan antes que el resto.
+_BEFORE_DEVICES = (-1, -1)
+_AFTER_DEVICES = (2, 0)
 
 
 class Simulation:
-    def __init__(self, output_path: str = "output"):
-        check_config()
-        self.instructions = []
+    """
+    Simulación de una red.
+
+    Parameters
+    ----------
+    output_path : str, optional
+        Carpeta donde se guardan los logs, por defecto ``output``.
+    engine : str, optional
+        Motor de ejecución: ``tick`` actualiza la red una vez por cada
+        milisegundo simulado y ``event`` salta directamente al próximo
+        evento cuando la red está ociosa. Por defecto se usa el valor
+        ``engine`` de la configuración.
+    config : Config, optional
+        Configuración de la simulación. Por defecto se lee ``config.txt``
+        una sola vez al crear la simulación.
+    log_sink : LogSink, optional
+        Destino de los logs de los dispositivos. Por defecto un
+        ``FileLogSink`` que escribe en ``output_path`` durante la simulación
+        y registra los logs por bit de los dispositivos e intervalo
+        indicados por ``capture_devices``, ``capture_start`` y
+        ``capture_end`` en la configuración. Con ``port_log trace`` los
+        logs por bit se guardan en una traza binaria (ver ``port_trace``).
+
+    La simulación mantiene en ``topology`` los dominios de colisión y de
+    broadcast de la red a medida que se conectan y desconectan cables.
+
+    En ambos motores solo se actualizan en cada ciclo los dispositivos que
+    tienen trabajo pendiente y los cables que no están en reposo. Un
+    dispositivo inactivo se pone al día con ``skip`` cuando algo lo modifica
+    (una escritura en uno de sus puertos o una instrucción).
+
+    Con ``checkpoint_interval`` en la configuración se guarda un punto de
+    control (ver ``checkpoint``) cada esa cantidad de milisegundos
+    simulados, del que se puede continuar con ``restore`` y ``resume``.
+    """
+
+    def __init__(
+        self,
+        output_path: str = "output",
+        engine: str = None,
+        log_sink: LogSink = None,
+        config: Config = None,
+    ):
+        self.config = config if config is not None else Config.load()
+        self.instructions = EventQueue()
+        self._instruction_order = count()
+        self._input = iter(())
+        self._next_input = None
+        self._input_read = 0
+        self._next_checkpoint = None
+        self._pause_time = None
         self.devices = {}
         self.hosts = {}
         self.ports = {}
         self.cables = []
-        global SIGNAL_TIME
-        SIGNAL_TIME = CONFIG["signal_time"]
+        self.topology = Topology()
         self.output_path = output_path
-        self.end_delay = 2 * SIGNAL_TIME
+        if log_sink is None:
+            capture = CaptureFilter(
+                self.config.capture_devices,
+                self.config.capture_start,
+                self.config.capture_end,
+            )
+            sink_type = (
+                TraceLogSink
+                if self.config.port_log == "trace"
+                else FileLogSink
+            )
+            log_sink = sink_type(
+                output_path, self.config.log_buffer_size, capture
+            )
+        self.log_sink = log_sink
+        self.end_delay = 2 * self.config.signal_time
         self.inst_index = 0
         self.time = 0
+        self.engine = engine if engine is not None else self.config.engine
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown simulation engine {self.engine}")
+        if self.config.routing not in ROUTING:
+            raise ValueError(f"Unknown routing protocol {self.config.routing}")
+        self.events = EventQueue()
+        self._wake_times = {}
+        self._synced = {}
+        self._ranks = {}
+        self._port_devices = {}
+        self._sending = set()
+        self._active_cables = set()
+        self._current_rank = _BEFORE_DEVICES
+        # Semilla de las esperas tras una colisión en el modo ``frame``,
+        # cada puerto la combina con su nombre
+        self.backoff_seed = (
+            getrandbits(32)
+            if self.config.transmission_mode == "frame"
+            else None
+        )
+        # Dispositivos por reprogramar al terminar ``batch``
+        self._deferred = None
+
+    def add_device(self, device: Device, verbose: bool = True):
+        """
+        Añade un dispositivo a la simulación.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a añadir.
+        verbose : bool, optional
+            Imprime el dispositivo añadido, por defecto ``True``.
+        """
 
-    def add_device(self, device: Device):
-        print(f"Adding device {device.name}")
+        if verbose:
+            print(f"Adding device {device.name}")
         if device.name in self.devices.keys():
             raise ValueError(
                 f"The device name {device.name} is already taken."
             )
 
         self.devices[device.name] = device
+        device.log_sink = self.log_sink
+        device.clock = self.current_time
+        self.topology.add_device(device)
+        is_host = isinstance(device, Host)
+        self._ranks[device] = self._device_rank(device)
+        self._synced[device] = self.time - 1
         for port in device.ports.values():
             self.ports[port.name] = port
+            self._port_devices[port.name] = device
+            self._watch_port(device, port)
 
-        if isinstance(device, Host):
+        if is_host:
             self.hosts[device.name] = device
+        if isinstance(device, PortDevice) and self.backoff_seed is not None:
+            device.seed_backoff(self.backoff_seed)
+        self._reschedule(device)
+
+    def builder(self, pool: AddressPool = None) -> TopologyBuilder:
+        """
+        Devuelve un ``TopologyBuilder`` para crear dispositivos y
+        topologías en bloque en la simulación.
+
+        Parameters
+        ----------
+        pool : AddressPool, optional
+            Direcciones a repartir. Por defecto macs desde ``0001`` y
+            subredes desde ``10.0.0.0``.
+        """
+
+        return TopologyBuilder(self, pool)
+
+    @contextmanager
+    def batch(self):
+        """
+        Agrupa varias modificaciones de la red, como las de
+        ``TopologyBuilder``, y reprograma cada dispositivo modificado una
+        sola vez al terminar en lugar de después de cada una.
+
+        Reprogramar un dispositivo recorre todos sus puertos, por lo que
+        conectar uno a uno los hosts de un switch grande sin agrupar las
+        conexiones tarda un tiempo cuadrático en la cantidad de puertos.
+        """
+
+        if self._deferred is not None:
+            yield
+            return
+        self._deferred = {}
+        try:
+            yield
+        finally:
+            deferred, self._deferred = self._deferred, None
+            for device in deferred:
+                self._reschedule(device)
+
+    def routing_stats(self) -> dict:
+        """
+        Estadísticas del protocolo de estado de enlace en toda la red.
+
+        Returns
+        -------
+        dict
+            Suma de las estadísticas de los routers (ver
+            ``LinkStateRouting.stats``), la cantidad de routers y el tiempo
+            del último cambio de rutas en ``converged_at``. La diferencia
+            entre este y el tiempo de un cambio en la red es el tiempo que
+            tardó la red en converger.
+        """
+
+        totals = {"routers": 0, "converged_at": None}
+        for device in self.devices.values():
+            link_state = getattr(device, "link_state", None)
+            if link_state is None:
+                continue
+            totals["routers"] += 1
+            for key, value in link_state.stats().items():
+                if key == "last_route_change":
+                    if value is not None:
+                        totals["converged_at"] = max(
+                            value, totals["converged_at"] or 0
+                        )
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def current_time(self) -> int:
+        """Ciclo actual de la simulación."""
+        return self.time
 
     def connect(self, port_1: str, port_2: str):
         try:
@@ -51,13 +258,19 @@ class Simulation:
             if port_2 not in self.ports.keys():
                 raise ValueError(f"Port {port_2} does not exist.")
 
-        cable = Duplex(port1, port2)
+        devices = self._port_devices[port_1], self._port_devices[port_2]
+        with self._touching(*devices):
+            cable = Duplex(port1, port2, self.config)
 
+        cable.write_callback = partial(self._active_cables.add, cable)
         self.cables.append(cable)
+        self.topology.connect(port_1, port_2)
 
     def assign_mac_addres(self, device_name, mac, interface):
 
-        self.devices[device_name].mac_addrs[f"{device_name}_{interface}"] = mac
+        with self._touching(self.devices[device_name]):
+            device = self.devices[device_name]
+            device.mac_addrs[f"{device_name}_{interface}"] = mac
 
     def assign_ip_addres(self, device_name, ip: IP, mask: IP, interface: int):
         """
@@ -75,10 +288,11 @@ class Simulation:
         if not isinstance(device, IPPacketSender):
             raise TypeError(f"Can not set ip to {device_name}")
 
-        device.ips[f"{device_name}_{interface}"] = ip
-        device.masks[f"{device_name}_{interface}"] = mask
+        with self._touching(device):
+            device.ips[f"{device_name}_{interface}"] = ip
+            device.masks[f"{device_name}_{interface}"] = mask
 
-    def send_frame(self, host_name: str, mac: List[VD], data: List[VD]):
+    def send_frame(self, host_name: str, mac: BitBuffer, data: BitBuffer):
         """
         Ordena a un host a enviar un frame determinado a una dirección mac
         determinada.
@@ -87,27 +301,22 @@ class Simulation:
         ----------
         host_name : str
             Nombre del host que envía la información.
-        mac : List[int]
+        mac : BitBuffer
             Mac destino.
-        data : List[int]
+        data : BitBuffer
             Frame a enviar.
         """
 
-        size_str = f"{len(data)//8:b}"
-
-        data_size = [VD.ZERO] * 8
-
-        for i in range(1, len(size_str) + 1):
-            data_size[-i] = VD(int(size_str[-i]))
+        data_size = BitBuffer.from_int(len(data) // 8, 8)
 
         e_size, e_data = get_error_detection_data(
-            data, CONFIG["error_detection"]
+            data, self.config.error_detection
         )
 
         # rand = random()
         # if rand < 1e-3:
         #     ind = randint(0, len(data) - 1)
-        #     data[ind] = VD((int(data[ind]) + 1) % 2)
+        #     data = data.flip(ind)
 
         final_data = (
             mac
@@ -120,27 +329,30 @@ class Simulation:
 
         self.send(host_name, final_data, len(final_data))
 
-    def send_ip_package(self, host_name: str, ip_dest: IP, data: List[int]):
+    def send_ip_package(self, host_name: str, ip_dest: IP, data: BitBuffer):
 
         if host_name not in self.hosts.keys():
             raise ValueError(f"Unknown host {host_name}")
 
-        self.hosts[host_name].send_by_ip(ip_dest, data)
+        with self._touching(self.hosts[host_name]):
+            self.hosts[host_name].send_by_ip(ip_dest, data)
 
     def ping_to(self, host_name: str, ip_dest: IP):
 
         if host_name not in self.hosts.keys():
             raise ValueError(f"Unknown host {host_name}")
 
-        self.hosts[host_name].send_ping_to(ip_dest)
+        with self._touching(self.hosts[host_name]):
+            self.hosts[host_name].send_ping_to(ip_dest)
 
-    def send(self, host_name: str, data: List[VD], package_size: int = 8):
+    def send(self, host_name: str, data: BitBuffer, package_size: int = 8):
 
         if host_name not in self.devices.keys():
             raise ValueError(f"Host {host_name} does not exist.")
 
         host = self._get_host_by_name(host_name)
-        host.send(data, package_size=package_size, port=host.port_name(1))
+        with self._touching(host):
+            host.send(data, package_size=package_size, port=host.port_name(1))
 
     def route(
         self, device_name: str, action: str = "reset", route: Route = None
@@ -160,36 +372,303 @@ class Simulation:
         """
 
         router: Router = self.devices[device_name]
-        if action == "add":
-            router.add_route(route)
-        elif action == "remove":
-            router.remove_route(route)
-        else:
-            router.reset_routes()
+        with self._touching(router):
+            if action == "add":
+                router.add_route(route)
+            elif action == "remove":
+                router.remove_route(route)
+            else:
+                router.reset_routes()
 
     def disconnect(self, port_name: str):
         if port_name not in self.ports.keys():
             raise ValueError(f"Port {port_name} does not exist.")
-        self.cables.remove(self.ports[port_name].cable)
-        self._get_port_by_name(port_name).disconnect()
+        cable = self.ports[port_name].cable
+        self.cables.remove(cable)
+        devices = [
+            self._port_devices[port.name]
+            for port in (cable.port1, cable.port2)
+        ]
+        device = self._port_devices[port_name]
+        with self._touching(*devices):
+            if isinstance(device, PortDevice):
+                device.disconnect(port_name)
+            else:
+                self._get_port_by_name(port_name).disconnect()
+        self._active_cables.discard(cable)
+        self.topology.disconnect(port_name)
         print(f"Disconnect {port_name}")
 
-    def start(self, instructions):
+    def start(self, instructions, until: int = None):
         """
         Comienza la simulación dada una lista de instrucciones.
 
         Parameters
         ----------
-        instructions : List[Instruction]
-            Lista de instrucciones a ejecutar en la simulación.
+        instructions : Iterable[Instruction]
+            Instrucciones a ejecutar en la simulación. Si es un iterador
+            (por ejemplo el de ``iter_instructions``) se consume a medida
+            que avanza el tiempo simulado y debe estar ordenado por tiempo;
+            en otro caso todas se programan al comenzar. Pueden programarse
+            más instrucciones durante la ejecución con ``schedule``.
+        until : int, optional
+            Detiene la simulación al llegar a este tiempo, sin guardar los
+            logs, para continuarla con ``resume`` o copiarla con ``fork``.
+            Hasta entonces no termina aunque la red esté inactiva, como si
+            quedaran instrucciones a partir de ``until``.
         """
 
-        self.instructions = instructions
         self.time = 0
-        while self.is_running:
+        if isinstance(instructions, Iterator):
+            self._input = instructions
+            self._read_input()
+        else:
+            for instr in instructions:
+                self.schedule(instr)
+        interval = self.config.checkpoint_interval
+        self._next_checkpoint = interval if interval > 0 else None
+        self._run(until)
+
+    def resume(self, until: int = None):
+        """
+        Continúa una simulación detenida con ``until``, restaurada de un
+        punto de control con ``restore`` o copiada con ``fork``.
+
+        Parameters
+        ----------
+        until : int, optional
+            Detiene de nuevo la simulación al llegar a este tiempo (ver
+            ``start``). Por defecto continúa hasta el final.
+        """
+
+        self._run(until)
+
+    def _run(self, until: int = None):
+        self._pause_time = until
+        while (until is None or self.time < until) and self.is_running:
             self.update()
-        for device in self.devices.values():
-            device.save_log(self.output_path)
+            if self.engine == "event":
+                self._skip_idle_time()
+            if (
+                self._next_checkpoint is not None
+                and self.time >= self._next_checkpoint
+            ):
+                interval = self.config.checkpoint_interval
+                self._next_checkpoint = (self.time // interval + 1) * interval
+                self.checkpoint()
+        self._pause_time = None
+        if until is None:
+            self._save_logs()
+
+    def checkpoint(self, path: str = None):
+        """
+        Guarda el estado completo de la simulación en un archivo.
+
+        Se guardan el tiempo, las instrucciones pendientes, los dispositivos
+        con sus capas, colas y tablas, los cables, el estado del generador
+        de números aleatorios y el tamaño de los logs ya escritos. El
+        archivo se reemplaza al terminar de escribirlo, por lo que una
+        interrupción no deja un punto de control incompleto.
+
+        Parameters
+        ----------
+        path : str, optional
+            Archivo del punto de control. Por defecto ``checkpoint_file``
+            de la configuración dentro de ``output_path``.
+        """
+
+        if path is None:
+            path = Path(self.output_path, self.config.checkpoint_file)
+        path = Path(path)
+        state = {
+            "random": getstate(),
+            "logs": self.log_sink.checkpoint(self.devices.values()),
+        }
+        data = zlib.compress(_dump_checkpoint(self, state))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = path.with_name(path.name + ".part")
+        with open(partial_path, "wb") as file:
+            file.write(CHECKPOINT_MAGIC)
+            file.write(CHECKPOINT_VERSION.to_bytes(2, "big"))
+            file.write(data)
+        os.replace(partial_path, path)
+
+    @classmethod
+    def restore(cls, path: str, instructions=None) -> "Simulation":
+        """
+        Carga una simulación de un punto de control guardado con
+        ``checkpoint``. Los logs escritos después del punto de control se
+        descartan y el generador de números aleatorios vuelve a su estado,
+        por lo que ``resume`` produce la misma salida que la simulación sin
+        interrumpir.
+
+        Parameters
+        ----------
+        path : str
+            Archivo del punto de control.
+        instructions : Iterable[Instruction], optional
+            Instrucciones con las que se comenzó la simulación. Solo son
+            necesarias si se leían de forma perezosa y quedaban
+            instrucciones por leer; se saltan las ya leídas.
+
+        Returns
+        -------
+        Simulation
+            Simulación restaurada.
+
+        Raises
+        ------
+        ValueError
+            Si el archivo no es un punto de control, es de otra versión o
+            faltan las instrucciones.
+        """
+
+        with open(path, "rb") as file:
+            magic = file.read(len(CHECKPOINT_MAGIC))
+            version = int.from_bytes(file.read(2), "big")
+            data = file.read()
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"{path} is not a simulation checkpoint.")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(
+                f"Unsupported checkpoint version {version}, expected "
+                f"{CHECKPOINT_VERSION}."
+            )
+
+        simulation, state = _load_checkpoint(zlib.decompress(data))
+        simulation._reopen_input(instructions)
+        setstate(state["random"])
+        simulation.log_sink.restore(state["logs"])
+        return simulation
+
+    def fork(self, output_path: str, instructions=None) -> "Simulation":
+        """
+        Copia la simulación en su estado actual, por ejemplo detenida con
+        ``until``, para continuar la copia con otras instrucciones sin
+        volver a simular lo anterior.
+
+        La copia es independiente del original: se le pueden programar
+        instrucciones con ``schedule`` y continuar con ``resume``. Escribe
+        sus logs en ``output_path`` a partir de los que el original ya
+        había escrito (ver ``branch``). Ambas usan el generador de números
+        aleatorios del proceso; ``branches.run_branches`` ejecuta cada
+        rama en un proceso que comparte la memoria del original.
+
+        Parameters
+        ----------
+        output_path : str
+            Carpeta de los logs de la copia.
+        instructions : Iterable[Instruction], optional
+            Instrucciones con las que se comenzó la simulación, necesarias
+            si se leen de forma perezosa y quedan por leer (ver
+            ``restore``).
+
+        Returns
+        -------
+        Simulation
+            Copia de la simulación.
+        """
+
+        logs = self.log_sink.checkpoint(self.devices.values())
+        simulation, _ = _load_checkpoint(_dump_checkpoint(self, {}))
+        simulation._reopen_input(instructions)
+        simulation.branch(output_path, logs)
+        return simulation
+
+    def branch(self, output_path: str, logs: dict = None):
+        """
+        Continúa la simulación escribiendo sus logs en otra carpeta, que
+        empieza con una copia de los logs ya escritos.
+
+        Parameters
+        ----------
+        output_path : str
+            Carpeta de los logs.
+        logs : dict, optional
+            Estado de los logs devuelto por ``log_sink.checkpoint``, por
+            defecto el actual. Al continuar una copia se usa el del
+            original tomado antes de copiarlo.
+        """
+
+        if logs is None:
+            logs = self.log_sink.checkpoint(self.devices.values())
+        self.output_path = output_path
+        self.log_sink.branch(logs, output_path)
+
+    def _reopen_input(self, instructions):
+        """
+        Vuelve a abrir la entrada perezosa de una simulación cargada,
+        saltando las instrucciones ya leídas.
+        """
+
+        if self._next_input is None:
+            return
+        if instructions is None:
+            raise ValueError(
+                "The simulation reads its instructions lazily, pass them "
+                "again to load it."
+            )
+        self._input = islice(iter(instructions), self._input_read, None)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # La entrada perezosa no se puede guardar, ``restore`` la recibe de
+        # nuevo y salta las instrucciones ya leídas
+        state["_input"] = iter(())
+        return state
+
+    def reload_config(self) -> Config:
+        """
+        Vuelve a leer el archivo de configuración de la simulación.
+
+        Los dispositivos y cables creados a partir de ese momento usan la
+        nueva configuración; los existentes, el motor y el destino de los
+        logs conservan la anterior.
+
+        Returns
+        -------
+        Config
+            Nueva configuración.
+        """
+
+        self.config = self.config.reload()
+        return self.config
+
+    def schedule(self, instruction: "Instruction"):
+        """
+        Programa una instrucción. Puede usarse antes de comenzar la
+        simulación o durante la misma.
+
+        Las instrucciones de un mismo tiempo se ejecutan después de las
+        líneas del script de ese tiempo, incluso de las que se leen de
+        forma perezosa más tarde, y entre ellas en el orden en que fueron
+        programadas, salvo que la instrucción ya tenga un ``order``
+        asignado.
+
+        Parameters
+        ----------
+        instruction : Instruction
+            Instrucción a programar.
+
+        Raises
+        ------
+        ValueError
+            Si el tiempo de la instrucción ya pasó.
+        """
+
+        if instruction.time < self.time:
+            raise ValueError(
+                f"Can not schedule an instruction at {instruction.time}, "
+                f"current time is {self.time}."
+            )
+        if instruction.order is None:
+            # Después de las líneas del script del mismo tiempo, aunque aún
+            # no se hayan leído
+            instruction.order = (1, next(self._instruction_order))
+        self.instructions.push(
+            instruction.time, instruction, instruction.order
+        )
 
     @property
     def is_running(self):
@@ -197,44 +676,284 @@ class Simulation:
         bool : Indica si la simulación todavía está en ejecución.
         """
 
-        device_sending = any([d.is_active for d in self.devices.values()])
-        running = self.instructions or device_sending
-        if not running:
+        if not self._has_pending_work():
             self.end_delay -= 1
         return self.end_delay > 0
 
+    def _has_pending_work(self):
+        return (
+            bool(self.instructions)
+            or self._next_input is not None
+            or bool(self._sending)
+            or (self._pause_time is not None and self.time < self._pause_time)
+        )
+
+    def _feed_instructions(self):
+        """
+        Programa las instrucciones de la entrada que deben ejecutarse en el
+        ciclo actual.
+        """
+
+        while self._next_input is not None and (
+            self._next_input.time <= self.time
+        ):
+            self.schedule(self._next_input)
+            self._read_input()
+
+    def _read_input(self):
+        """Lee la próxima instrucción de la entrada perezosa."""
+
+        self._next_input = next(self._input, None)
+        if self._next_input is not None:
+            self._input_read += 1
+
     def update(self):
         """
         Ejecuta un ciclo de la simulación actualizando el estado de la
         misma.
 
-        Esta función se ejecuta una vez por cada milisegundo simulado.
+        Esta función se ejecuta una vez por cada milisegundo simulado, pero
+        solo actualiza los dispositivos y cables con trabajo pendiente.
         """
         # print(self.time, self.devices)
-        current_insts = []
-        while self.instructions and self.time == self.instructions[0].time:
-            current_insts.append(self.instructions.pop(0))
-
-        for instr in current_insts:
+        self._feed_instructions()
+        while self.instructions and self.instructions.peek_time() == self.time:
+            _, instr = self.instructions.pop()
             instr.execute(self)
 
-        for device in self.devices.values():
+        # Los dispositivos despertados durante el ciclo con mayor prioridad
+        # que el actual se añaden a la cola y se actualizan en este ciclo
+        while self.events and self.events.peek_time() <= self.time:
+            time, device = self.events.pop()
+            if (
+                self._wake_times.get(device) != time
+                or self._synced[device] == self.time
+            ):
+                continue
+            self._catch_up(device, self.time - 1)
+            self._current_rank = self._ranks[device]
+            self._synced[device] = self.time
             device.reset()
+            device.update(self.time)
+            self._reschedule(device)
+        self._current_rank = _AFTER_DEVICES
+
+        for cable in list(self._active_cables):
+            cable.update()
+            if cable.is_quiet:
+                self._active_cables.discard(cable)
+
+        self.time += 1
+        self._current_rank = _BEFORE_DEVICES
 
-        for host in self.hosts.values():
-            host.update(self.time)
+    def _save_logs(self):
+        """Pone al día a los dispositivos y guarda sus logs."""
 
         for device in self.devices.values():
-            if device not in self.hosts.values():
-                device.update(self.time)
+            self._catch_up(device)
+            device.save_log(self.output_path)
+        self.log_sink.finish()
 
-        for cable in self.cables:
-            cable.update()
+    def _device_rank(self, device: Device):
+        """
+        Prioridad de un dispositivo dentro de cada ciclo: los hosts antes
+        que el resto y, entre ellos, en el orden en que se añadieron.
+        """
 
-        self.time += 1
+        return (0 if isinstance(device, Host) else 1, len(self._ranks))
+
+    def _watch_port(self, device: Device, port: Port):
+        """
+        Pone al día a un dispositivo antes de que se procese una escritura
+        o transmisión en uno de sus puertos y lo reprograma después.
+        """
+
+        def watch(callback):
+            if callback is None:
+                return None
+            return partial(self._watched_callback, device, callback)
+
+        port.write_callback = watch(port.write_callback)
+        port.transmission_callback = watch(port.transmission_callback)
+
+    def _watched_callback(self, device: Device, callback, *args):
+        self._catch_up(device)
+        callback(*args)
+        self._reschedule(device)
+
+    @contextmanager
+    def _touching(self, *devices: Device):
+        """
+        Pone al día a los dispositivos dados antes de modificarlos desde
+        fuera de su actualización y los reprograma después.
+        """
+
+        for device in devices:
+            self._catch_up(device)
+        yield
+        for device in devices:
+            self._reschedule(device)
+
+    def _catch_up(self, device: Device, time: int = None):
+        """
+        Aplica las actualizaciones triviales pendientes de un dispositivo.
+
+        Parameters
+        ----------
+        device : Device
+            Dispositivo a poner al día.
+        time : int, optional
+            Último ciclo a aplicar. Por defecto es el ciclo actual si ya pasó
+            el turno del dispositivo en el mismo, o el anterior si no.
+        """
+
+        if time is None:
+            time = self.time
+            if self._ranks[device] > self._current_rank:
+                time -= 1
+        ticks = time - self._synced[device]
+        if ticks > 0:
+            device.skip(ticks, time)
+            self._synced[device] = time
+
+    def _reschedule(self, device: Device):
+        """
+        Programa el próximo ciclo no trivial de un dispositivo y actualiza
+        el conjunto de dispositivos que están enviando. Dentro de ``batch``
+        solo lo anota para hacerlo al terminar.
+        """
+
+        if self._deferred is not None:
+            self._deferred[device] = None
+            return
+
+        ticks = device.next_update()
+        wake = None if ticks is None else self._synced[device] + ticks
+        if self._wake_times.get(device) != wake:
+            self._wake_times[device] = wake
+            if wake is not None:
+                self.events.push(wake, device, self._ranks[device])
+
+        if device.is_active:
+            self._sending.add(device)
+        else:
+            self._sending.discard(device)
+
+    def _next_event_time(self):
+        """
+        Devuelve el tiempo del próximo evento: una instrucción, el fin de un
+        bit, de una espera por colisión, el log periódico de un hub o el
+        tiempo en que se detiene la simulación.
+
+        Returns
+        -------
+        Union[int, None]
+            Tiempo del próximo evento o ``None`` si no hay ninguno.
+        """
+
+        while self.events:
+            time, device = self.events.peek()
+            if time >= self.time and self._wake_times.get(device) == time:
+                break
+            self.events.pop()
+
+        times = [self.events.peek_time(), self.instructions.peek_time()]
+        if self._next_input is not None:
+            times.append(self._next_input.time)
+        if self._pause_time is not None:
+            times.append(self._pause_time)
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+
+    def _skip_idle_time(self):
+        """
+        Salta los ciclos en los que ningún dispositivo hace algo más que
+        avanzar sus contadores. Los dispositivos se ponen al día cuando se
+        vuelven a usar y los cables activos se avanzan en bloque.
+        """
+
+        next_time = self._next_event_time()
+        ticks = next_time - self.time if next_time is not None else None
+
+        if not self._has_pending_work():
+            # Cada ciclo saltado consume una verificación de ``is_running``
+            if ticks is None or ticks > self.end_delay - 1:
+                ticks = self.end_delay - 1
+            self.end_delay -= ticks
+
+        if not ticks or ticks <= 0:
+            return
+        self._advance(ticks)
+
+    def _advance(self, ticks: int):
+        """Avanza ``ticks`` ciclos en los que solo cambian los cables."""
+
+        for cable in list(self._active_cables):
+            cable.skip(ticks)
+            if cable.is_quiet:
+                self._active_cables.discard(cable)
+        self.time += ticks
 
     def _get_port_by_name(self, port_name) -> Port:
         return self.ports[port_name]
 
     def _get_host_by_name(self, host_name) -> Host:
         return self.devices[host_name]
+
+
+class _CheckpointPickler(pickle.Pickler):
+    """
+    Guarda las referencias a la simulación y a sus dispositivos como
+    identificadores. Su estado se guarda aparte, por lo que la profundidad
+    de la recursión no crece con el tamaño de la red al recorrer puertos y
+    cables.
+    """
+
+    def __init__(self, file, objects: list) -> None:
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._ids = {id(obj): i for i, obj in enumerate(objects)}
+
+    def persistent_id(self, obj):
+        index = self._ids.get(id(obj))
+        return None if index is None else (index, type(obj))
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, file) -> None:
+        super().__init__(file)
+        self.objects = {}
+
+    def persistent_load(self, pid):
+        index, cls = pid
+        if index not in self.objects:
+            self.objects[index] = cls.__new__(cls)
+        return self.objects[index]
+
+
+def _dump_checkpoint(simulation: Simulation, state: dict) -> bytes:
+    objects = [simulation, *simulation.devices.values()]
+    file = io.BytesIO()
+    _CheckpointPickler(file, objects).dump(
+        (
+            [(i, type(obj)) for i, obj in enumerate(objects)],
+            [_object_state(obj) for obj in objects],
+            state,
+        )
+    )
+    return file.getvalue()
+
+
+def _load_checkpoint(data: bytes):
+    unpickler = _CheckpointUnpickler(io.BytesIO(data))
+    pids, states, state = unpickler.load()
+    objects = [unpickler.persistent_load(pid) for pid in pids]
+    for obj, obj_state in zip(objects, states):
+        obj.__dict__.update(obj_state)
+    return objects[0], state
+
+
+def _object_state(obj) -> dict:
+    getstate = getattr(type(obj), "__getstate__", None)
+    if getstate is None or getstate is getattr(object, "__getstate__", None):
+        return obj.__dict__
+    return getstate(obj)
@@ -0,0 +1,292 @@
+"""
+Barrido de parámetros de la configuración.
+
+Ejecuta el mismo script con cada combinación de los valores dados, cada
+una en una ``Simulation`` aislada dentro de un ``ProcessPoolExecutor`` y
+con su propia carpeta de salida, y reúne los resultados en una tabla::
+
+    python net_sim.py sweep script.txt -p signal_time=5,10,20 \\
+        -p error_prob=0.001,0.01 -p error_detection=simple_hash,crc32
+"""
+
+import contextlib
+import csv
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from config import Config, parse_value
+from instruction_parser import iter_instructions, load_instructions
+from simulation import Simulation
+
+SUMMARY_FILE_NAME = "summary.csv"
+
+# Columnas de resultados de cada ejecución
+RESULT_COLUMNS = (
+    "sim_time",
+    "wall_time",
+    "frames",
+    "errors",
+    "payloads",
+    "replies",
+)
+
+
+class SweepPoint(NamedTuple):
+    """
+    Ejecución de un barrido.
+
+    Attributes
+    ----------
+    index : int
+        Posición en el barrido.
+    values : Dict[str, Any]
+        Valores de la configuración que cambian en la ejecución.
+    output_path : str
+        Carpeta de salida de la ejecución.
+    """
+
+    index: int
+    values: Dict[str, Any]
+    output_path: str
+
+
+def parse_grid(params: Iterable[str]) -> Dict[str, List[Any]]:
+    """
+    Lee los valores de cada parámetro del barrido.
+
+    Parameters
+    ----------
+    params : Iterable[str]
+        Parámetros con la forma ``clave=valor1,valor2,...``. Las claves son
+        las del archivo de configuración.
+
+    Returns
+    -------
+    Dict[str, List[Any]]
+        Valores de cada clave.
+
+    Raises
+    ------
+    ValueError
+        Si un parámetro no tiene la forma esperada o su clave no existe.
+    """
+
+    grid = {}
+    for param in params:
+        key, sep, values = param.partition("=")
+        if not sep or not values:
+            raise ValueError(f"Invalid sweep parameter '{param}'")
+        grid[key] = [parse_value(key, v) for v in values.split(",")]
+    return grid
+
+
+def sweep_points(
+    grid: Dict[str, List[Any]], output_path: str
+) -> List[SweepPoint]:
+    """
+    Combinaciones de los valores de un barrido, la última clave varía
+    primero.
+
+    Parameters
+    ----------
+    grid : Dict[str, List[Any]]
+        Valores de cada clave.
+    output_path : str
+        Carpeta en la que se crea la carpeta de cada ejecución.
+    """
+
+    points = []
+    keys = list(grid)
+    for index, combination in enumerate(product(*grid.values())):
+        values = dict(zip(keys, combination))
+        name = "-".join(
+            [f"{index:03d}"] + [f"{k}={v}" for k, v in values.items()]
+        )
+        points.append(SweepPoint(index, values, str(Path(output_path, name))))
+    return points
+
+
+def run_point(
+    script_path: str,
+    config: Config,
+    point: SweepPoint,
+    window: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Ejecuta una simulación de un barrido.
+
+    La salida de la simulación se escribe en ``stdout.txt`` dentro de la
+    carpeta de la ejecución.
+
+    Parameters
+    ----------
+    script_path : str
+        Script con las instrucciones de la simulación.
+    config : Config
+        Configuración base, se reemplazan los valores del punto.
+    point : SweepPoint
+        Ejecución.
+    window : int, optional
+        Lee el script de forma perezosa (ver ``iter_instructions``).
+    seed : int, optional
+        Semilla de los números aleatorios de la simulación.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Valores del punto y resultados de la ejecución: tiempo simulado,
+        segundos de ejecución, frames recibidos por los hosts, los que
+        tenían errores, los datos recibidos y las respuestas a ``ping``.
+    """
+
+    if seed is not None:
+        random.seed(seed)
+    if window is None:
+        instructions = load_instructions(script_path)
+    else:
+        instructions = iter_instructions(script_path, window)
+
+    Path(point.output_path).mkdir(parents=True, exist_ok=True)
+    simulation = Simulation(
+        output_path=point.output_path,
+        config=config._replace(**point.values),
+    )
+    stdout_path = Path(point.output_path, "stdout.txt")
+    start = perf_counter()
+    with open(stdout_path, "w") as out, contextlib.redirect_stdout(out):
+        simulation.start(instructions)
+    wall_time = perf_counter() - start
+    return {
+        "index": point.index,
+        **point.values,
+        **simulation_results(simulation, wall_time),
+    }
+
+
+def simulation_results(
+    simulation: Simulation, wall_time: float
+) -> Dict[str, Any]:
+    """
+    Resultados de una simulación terminada, con las claves de
+    ``RESULT_COLUMNS``.
+
+    Parameters
+    ----------
+    simulation : Simulation
+        Simulación terminada.
+    wall_time : float
+        Segundos de ejecución.
+    """
+
+    hosts = simulation.hosts.values()
+    received = [row for host in hosts for row in host.received_data]
+    return {
+        "sim_time": simulation.time,
+        "wall_time": round(wall_time, 3),
+        "frames": len(received),
+        "errors": sum(1 for row in received if row[-1] == "ERROR"),
+        "payloads": sum(len(host.received_payload) for host in hosts),
+        "replies": sum(
+            1
+            for host in hosts
+            for row in host.received_payload
+            if row[-1] == "echo reply"
+        ),
+    }
+
+
+def run_sweep(
+    script_path: str,
+    grid: Dict[str, List[Any]],
+    output_path: str = "output/sweep",
+    config: Config = None,
+    workers: Optional[int] = None,
+    window: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ejecuta un barrido en paralelo y guarda la tabla de resultados en
+    ``summary.csv`` dentro de ``output_path``.
+
+    Parameters
+    ----------
+    script_path : str
+        Script con las instrucciones de la simulación.
+    grid : Dict[str, List[Any]]
+        Valores de cada clave de la configuración.
+    output_path : str, optional
+        Carpeta de las ejecuciones, por defecto ``output/sweep``.
+    config : Config, optional
+        Configuración base, por defecto se lee ``config.txt``.
+    workers : int, optional
+        Procesos a usar, por defecto uno por núcleo.
+    window : int, optional
+        Lee el script de forma perezosa (ver ``iter_instructions``).
+    seed : int, optional
+        Semilla de los números aleatorios de cada ejecución.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Resultados de cada ejecución (ver ``run_point``) en el orden del
+        barrido.
+    """
+
+    if config is None:
+        config = Config.load()
+    points = sweep_points(grid, output_path)
+    workers = workers or os.cpu_count() or 1
+
+    rows = []
+    Path(output_path).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=min(workers, len(points))) as pool:
+        futures = [
+            pool.submit(run_point, script_path, config, p, window, seed)
+            for p in points
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            print(f"[{done}/{len(points)}] {points[row['index']].output_path}")
+    rows.sort(key=lambda row: row["index"])
+
+    columns = ["index", *grid, *RESULT_COLUMNS]
+    with open(Path(output_path, SUMMARY_FILE_NAME), "w", newline="") as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """
+    Tabla de texto con los resultados de un barrido.
+
+    Parameters
+    ----------
+    rows : List[Dict[str, Any]]
+        Resultados de cada ejecución.
+    """
+
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    cells = [[str(row[c]) for c in columns] for row in rows]
+    widths = [
+        max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)
+    ]
+    lines = [
+        "| " + " | ".join(f"{c: ^{w}}" for c, w in zip(columns, widths)) + " |"
+    ]
+    lines.append("|" + "|".join("-" * (w + 2) for w in widths) + "|")
+    for row in cells:
+        lines.append(
+            "| " + " | ".join(f"{c: >{w}}" for c, w in zip(row, widths)) + " |"
+        )
+    return "\n".join(lines)
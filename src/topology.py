@@ -0,0 +1,220 @@
+from itertools import count
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from device import Device, Hub, Switch
+
+
+class Domain:
+    """
+    Conjunto de puertos unidos por cables y por los dispositivos que
+    repiten lo que reciben en un puerto por los demás.
+
+    Parameters
+    ----------
+    domain_id : int
+        Identificador del dominio, único dentro de un ``DomainMap``.
+    ports : Set[str], optional
+        Nombres de los puertos del dominio.
+    """
+
+    def __init__(self, domain_id: int, ports: Set[str] = None) -> None:
+        self.domain_id = domain_id
+        self.ports = set() if ports is None else ports
+
+    def __len__(self) -> int:
+        return len(self.ports)
+
+    def __contains__(self, port_name: str) -> bool:
+        return port_name in self.ports
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ports)
+
+    def __repr__(self) -> str:
+        return f"Domain({self.domain_id}, {sorted(self.ports)})"
+
+
+class DomainMap:
+    """
+    Particiona los puertos de una red en dominios.
+
+    Dos puertos están en el mismo dominio si un cable los une o si
+    pertenecen a un dispositivo que los une (``joins``), y la relación es
+    transitiva. El dominio de cada puerto se guarda explícitamente, por lo
+    que las consultas son O(1). Al conectar dos dominios los puertos del
+    menor pasan al mayor, y al desconectar un cable solo se recorre el
+    dominio que lo contenía.
+
+    Parameters
+    ----------
+    joins : Callable[[Device], bool]
+        Indica si un dispositivo une todos sus puertos en un dominio.
+    """
+
+    def __init__(self, joins: Callable[[Device], bool]) -> None:
+        self.joins = joins
+        self._ids = count()
+        self._domains: Dict[str, Domain] = {}
+        self._devices: Dict[str, Device] = {}
+        self._peers: Dict[str, str] = {}
+
+    def __getitem__(self, port_name: str) -> Domain:
+        return self._domains[port_name]
+
+    def domains(self) -> List[Domain]:
+        """Dominios distintos de la red."""
+
+        unique = {id(d): d for d in self._domains.values()}
+        return sorted(unique.values(), key=lambda d: d.domain_id)
+
+    def same(self, port_1: str, port_2: str) -> bool:
+        """Indica si dos puertos están en el mismo dominio."""
+
+        return self._domains[port_1] is self._domains[port_2]
+
+    def devices(self, domain: Domain) -> List[Device]:
+        """Dispositivos con algún puerto en un dominio."""
+
+        devices = {}
+        for port_name in domain.ports:
+            device = self._devices[port_name]
+            devices[device.name] = device
+        return list(devices.values())
+
+    def add_device(self, device: Device) -> None:
+        """Añade los puertos de un dispositivo, aún sin conectar."""
+
+        ports = list(device.ports)
+        for port_name in ports:
+            self._devices[port_name] = device
+        if self.joins(device):
+            domain = Domain(next(self._ids), set(ports))
+            for port_name in ports:
+                self._domains[port_name] = domain
+        else:
+            for port_name in ports:
+                self._domains[port_name] = Domain(next(self._ids), {port_name})
+
+    def connect(self, port_1: str, port_2: str) -> None:
+        """Une los dominios de dos puertos conectados por un cable."""
+
+        # Un puerto que ya tenía cable deja de estar unido a su otro extremo
+        for port_name in (port_1, port_2):
+            if port_name in self._peers:
+                self.disconnect(port_name)
+        self._peers[port_1] = port_2
+        self._peers[port_2] = port_1
+        domain_1 = self._domains[port_1]
+        domain_2 = self._domains[port_2]
+        if domain_1 is domain_2:
+            return
+        if len(domain_1) < len(domain_2):
+            domain_1, domain_2 = domain_2, domain_1
+        domain_1.ports |= domain_2.ports
+        for port_name in domain_2.ports:
+            self._domains[port_name] = domain_1
+
+    def disconnect(self, port_name: str) -> None:
+        """
+        Quita el cable de un puerto y separa su dominio si el cable era la
+        única unión entre ambas partes.
+        """
+
+        peer = self._peers.pop(port_name, None)
+        if peer is None:
+            return
+        del self._peers[peer]
+
+        domain = self._domains[port_name]
+        reached = self._reach(port_name, stop=peer)
+        if reached is None:
+            return
+
+        # Los puertos alcanzados forman un dominio nuevo
+        domain.ports -= reached
+        new_domain = Domain(next(self._ids), reached)
+        for name in reached:
+            self._domains[name] = new_domain
+
+    def _reach(self, start: str, stop: str) -> Optional[Set[str]]:
+        """Puertos alcanzables desde ``start``, o ``None`` si se alcanza
+        ``stop``."""
+
+        reached = {start}
+        pending = [start]
+        joined = set()
+        while pending:
+            port_name = pending.pop()
+            neighbours = []
+            peer = self._peers.get(port_name)
+            if peer is not None:
+                neighbours.append(peer)
+            device = self._devices[port_name]
+            if device.name not in joined and self.joins(device):
+                joined.add(device.name)
+                neighbours.extend(device.ports)
+            for name in neighbours:
+                if name == stop:
+                    return None
+                if name not in reached:
+                    reached.add(name)
+                    pending.append(name)
+        return reached
+
+
+def _is_repeater(device: Device) -> bool:
+    return isinstance(device, Hub)
+
+
+def _is_bridge(device: Device) -> bool:
+    return isinstance(device, (Hub, Switch))
+
+
+class Topology:
+    """
+    Grafo de la red mantenido al añadir dispositivos y al conectar o
+    desconectar cables.
+
+    Los dominios de colisión se separan en los puertos de switches,
+    routers y hosts (solo los hubs los unen) y los dominios de broadcast en
+    los puertos de routers y hosts (los hubs y switches los unen).
+
+    Attributes
+    ----------
+    collision : DomainMap
+        Dominios de colisión.
+    broadcast : DomainMap
+        Dominios de broadcast.
+    """
+
+    def __init__(self) -> None:
+        self.collision = DomainMap(_is_repeater)
+        self.broadcast = DomainMap(_is_bridge)
+
+    def add_device(self, device: Device) -> None:
+        self.collision.add_device(device)
+        self.broadcast.add_device(device)
+
+    def connect(self, port_1: str, port_2: str) -> None:
+        self.collision.connect(port_1, port_2)
+        self.broadcast.connect(port_1, port_2)
+
+    def disconnect(self, port_name: str) -> None:
+        self.collision.disconnect(port_name)
+        self.broadcast.disconnect(port_name)
+
+    def collision_domain(self, port_name: str) -> Domain:
+        """Dominio de colisión de un puerto."""
+        return self.collision[port_name]
+
+    def broadcast_domain(self, port_name: str) -> Domain:
+        """Dominio de broadcast de un puerto."""
+        return self.broadcast[port_name]
+
+    def share_collision_domain(self, port_1: str, port_2: str) -> bool:
+        """Indica si las señales de dos puertos pueden colisionar."""
+        return self.collision.same(port_1, port_2)
+
+    def share_broadcast_domain(self, port_1: str, port_2: str) -> bool:
+        """Indica si un broadcast enviado por un puerto llega al otro."""
+        return self.broadcast.same(port_1, port_2)
@@ -0,0 +1,494 @@
+"""
+Construcción programática de redes grandes.
+
+Con ``TopologyBuilder`` se crean en bloque hosts, switches, hubs y routers,
+se les asignan direcciones mac e IP consecutivas y se conectan en
+topologías estándar (estrella, árbol, fat-tree y malla) con sus rutas
+estáticas, sin pasar por las instrucciones ni imprimir cada dispositivo::
+
+    sim = Simulation()
+    builder = sim.builder()
+    lan = builder.star("s", 100)
+    sim.start([PingIns(10, lan.hosts[0].name, lan.hosts[1].ip)])
+"""
+
+from __future__ import annotations
+
+from functools import wraps
+from math import ceil, log2
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Tuple
+
+from device import Host, Hub, Route, Router, Switch
+from network_layer.ip import IP
+from physical_layer.bit import BitBuffer
+
+if TYPE_CHECKING:
+    from simulation import Simulation
+
+_BROADCAST_MAC = 0xFFFF
+_NO_GATEWAY = IP(0, 0, 0, 0)
+
+
+def _batched(method):
+    """Ejecuta un método del constructor dentro de ``Simulation.batch``."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.sim.batch():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _mask(prefix: int) -> IP:
+    return IP.from_int((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF)
+
+
+def _prefix_for(addresses: int) -> int:
+    """Prefijo de la menor subred con ``addresses`` direcciones útiles."""
+    return 32 - max(2, ceil(log2(addresses + 2)))
+
+
+class AddressPool:
+    """
+    Reparte direcciones mac y subredes IP consecutivas.
+
+    Parameters
+    ----------
+    first_mac : int, optional
+        Primera dirección mac a repartir, por defecto ``1``.
+    network : IP, optional
+        Comienzo del rango de subredes de las LAN, por defecto ``10.0.0.0``.
+    link_network : IP, optional
+        Comienzo del rango de subredes ``/30`` de los enlaces entre routers,
+        por defecto ``172.16.0.0``.
+    """
+
+    def __init__(
+        self,
+        first_mac: int = 1,
+        network: IP = IP(10, 0, 0, 0),
+        link_network: IP = IP(172, 16, 0, 0),
+    ) -> None:
+        self._next_mac = first_mac
+        self._next_network = network.raw_value
+        self._next_link = link_network.raw_value
+
+    def mac(self) -> BitBuffer:
+        """Próxima dirección mac libre."""
+
+        if self._next_mac >= _BROADCAST_MAC:
+            raise ValueError("No mac addresses left")
+        mac = BitBuffer.from_int(self._next_mac, 16)
+        self._next_mac += 1
+        return mac
+
+    def subnet(self, prefix: int) -> Tuple[int, IP]:
+        """
+        Reserva la próxima subred de un tamaño dado.
+
+        Parameters
+        ----------
+        prefix : int
+            Largo del prefijo de la subred.
+
+        Returns
+        -------
+        Tuple[int, IP]
+            Dirección de la subred (como entero) y su máscara.
+        """
+
+        size = 1 << (32 - prefix)
+        network = -(-self._next_network // size) * size
+        self._next_network = network + size
+        return network, _mask(prefix)
+
+    def link(self) -> Tuple[int, IP]:
+        """Reserva la próxima subred ``/30`` para un enlace entre routers."""
+
+        network = self._next_link
+        self._next_link += 4
+        return network, _mask(30)
+
+
+class Lan(NamedTuple):
+    """
+    Red local creada por ``TopologyBuilder``.
+
+    Attributes
+    ----------
+    network : IP
+        Dirección de la subred.
+    mask : IP
+        Máscara de la subred.
+    hosts : List[Host]
+        Hosts de la red.
+    switches : List[Switch]
+        Switches de la red, el primero es la raíz.
+    gateway : IP, optional
+        IP del router de la red, si tiene.
+    """
+
+    network: IP
+    mask: IP
+    hosts: List[Host]
+    switches: List[Switch]
+    gateway: Optional[IP] = None
+
+
+class TopologyBuilder:
+    """
+    Crea dispositivos y topologías en bloque en una simulación.
+
+    Los dispositivos se añaden sin imprimir nada y las direcciones se
+    toman de ``pool``. Los nombres de los dispositivos de cada topología
+    comienzan con el nombre dado a la topología.
+
+    Parameters
+    ----------
+    sim : Simulation
+        Simulación en la que se crean los dispositivos.
+    pool : AddressPool, optional
+        Direcciones a repartir. Por defecto macs desde ``0001`` y subredes
+        desde ``10.0.0.0``.
+    """
+
+    def __init__(self, sim: Simulation, pool: AddressPool = None) -> None:
+        self.sim = sim
+        self.pool = AddressPool() if pool is None else pool
+
+    # Dispositivos
+
+    def hosts(self, prefix: str, count: int) -> List[Host]:
+        """Crea ``count`` hosts llamados ``{prefix}0``, ``{prefix}1``..."""
+
+        config = self.sim.config
+        return self._add([Host(f"{prefix}{i}", config) for i in range(count)])
+
+    def switches(self, prefix: str, count: int, ports: int) -> List[Switch]:
+        """Crea ``count`` switches de ``ports`` puertos."""
+
+        config = self.sim.config
+        return self._add(
+            [Switch(f"{prefix}{i}", ports, config) for i in range(count)]
+        )
+
+    def hubs(self, prefix: str, count: int, ports: int) -> List[Hub]:
+        """Crea ``count`` hubs de ``ports`` puertos."""
+
+        config = self.sim.config
+        return self._add(
+            [Hub(f"{prefix}{i}", ports, config) for i in range(count)]
+        )
+
+    def routers(self, prefix: str, count: int, ports: int) -> List[Router]:
+        """Crea ``count`` routers de ``ports`` puertos."""
+
+        config = self.sim.config
+        return self._add(
+            [Router(f"{prefix}{i}", ports, config) for i in range(count)]
+        )
+
+    def _add(self, devices: list) -> list:
+        for device in devices:
+            self.sim.add_device(device, verbose=False)
+        return devices
+
+    def link(self, device_1, port_1: int, device_2, port_2: int) -> None:
+        """Conecta el puerto ``port_1`` de un dispositivo con el ``port_2``
+        de otro."""
+
+        self.sim.connect(
+            device_1.port_name(port_1), device_2.port_name(port_2)
+        )
+
+    # Direcciones
+
+    def address_host(
+        self,
+        host: Host,
+        ip: IP,
+        mask: IP,
+        gateway: IP = None,
+    ) -> None:
+        """
+        Asigna una mac, un IP y las rutas de su subred y por defecto a un
+        host.
+        """
+
+        self.sim.assign_mac_addres(host.name, self.pool.mac(), 1)
+        self.sim.assign_ip_addres(host.name, ip, mask, 1)
+        network = IP.from_int(ip.raw_value & mask.raw_value)
+        self.sim.route(host.name, "add", Route(network, mask, _NO_GATEWAY, 1))
+        if gateway is not None:
+            self.sim.route(
+                host.name, "add", Route(_NO_GATEWAY, _NO_GATEWAY, gateway, 1)
+            )
+
+    def address_router(
+        self, router: Router, interface: int, ip: IP, mask: IP
+    ) -> None:
+        """Asigna una mac y un IP a un puerto de un router y añade la ruta
+        de la subred conectada."""
+
+        self.sim.assign_mac_addres(router.name, self.pool.mac(), interface)
+        self.sim.assign_ip_addres(router.name, ip, mask, interface)
+        network = IP.from_int(ip.raw_value & mask.raw_value)
+        self.sim.route(
+            router.name, "add", Route(network, mask, _NO_GATEWAY, interface)
+        )
+
+    def route(
+        self,
+        router: Router,
+        network: int,
+        mask: IP,
+        gateway: IP,
+        interface: int,
+    ) -> None:
+        """Añade una ruta estática a un router."""
+
+        self.sim.route(
+            router.name,
+            "add",
+            Route(IP.from_int(network), mask, gateway, interface),
+        )
+
+    def router_link(
+        self, router_1: Router, port_1: int, router_2: Router, port_2: int
+    ) -> Tuple[IP, IP]:
+        """
+        Conecta dos routers con una subred ``/30`` propia.
+
+        Returns
+        -------
+        Tuple[IP, IP]
+            IP de cada extremo del enlace.
+        """
+
+        network, mask = self.pool.link()
+        ip_1, ip_2 = IP.from_int(network + 1), IP.from_int(network + 2)
+        self.link(router_1, port_1, router_2, port_2)
+        self.address_router(router_1, port_1, ip_1, mask)
+        self.address_router(router_2, port_2, ip_2, mask)
+        return ip_1, ip_2
+
+    # Topologías
+
+    @_batched
+    def star(
+        self,
+        name: str,
+        hosts: int,
+        router: Router = None,
+        interface: int = None,
+    ) -> Lan:
+        """
+        Crea una LAN de ``hosts`` hosts conectados a un switch.
+
+        Parameters
+        ----------
+        name : str
+            Prefijo de los nombres de los dispositivos.
+        hosts : int
+            Cantidad de hosts.
+        router : Router, optional
+            Router que sirve de puerta de enlace de la LAN. Se conecta al
+            último puerto del switch.
+        interface : int, optional
+            Puerto del router conectado a la LAN.
+        """
+
+        extra = 0 if router is None else 1
+        switch = self.switches(f"{name}-sw", 1, hosts + extra)[0]
+        members = self.hosts(f"{name}-pc", hosts)
+        for i, host in enumerate(members):
+            self.link(host, 1, switch, i + 1)
+        return self._address_lan(
+            members, [switch], router, interface, hosts + 1
+        )
+
+    @_batched
+    def tree(
+        self,
+        name: str,
+        depth: int,
+        fanout: int,
+        router: Router = None,
+        interface: int = None,
+    ) -> Lan:
+        """
+        Crea una LAN con un árbol de switches de profundidad ``depth`` en
+        la que cada switch tiene ``fanout`` hijos y los de la última capa
+        ``fanout`` hosts.
+
+        Parameters
+        ----------
+        name : str
+            Prefijo de los nombres de los dispositivos.
+        depth : int
+            Cantidad de capas de switches.
+        fanout : int
+            Hijos de cada switch.
+        router : Router, optional
+            Router que sirve de puerta de enlace de la LAN. Se conecta al
+            puerto libre del switch raíz.
+        interface : int, optional
+            Puerto del router conectado a la LAN.
+        """
+
+        # El puerto 1 de cada switch va hacia la raíz
+        switches = []
+        level = self.switches(f"{name}-sw0-", 1, fanout + 1)
+        switches += level
+        for d in range(1, depth):
+            children = self.switches(
+                f"{name}-sw{d}-", len(level) * fanout, fanout + 1
+            )
+            for i, child in enumerate(children):
+                self.link(child, 1, level[i // fanout], i % fanout + 2)
+            switches += children
+            level = children
+
+        members = self.hosts(f"{name}-pc", len(level) * fanout)
+        for i, host in enumerate(members):
+            self.link(host, 1, level[i // fanout], i % fanout + 2)
+        return self._address_lan(members, switches, router, interface, 1)
+
+    def _address_lan(
+        self,
+        hosts: List[Host],
+        switches: List[Switch],
+        router: Optional[Router],
+        interface: Optional[int],
+        switch_port: int,
+    ) -> Lan:
+        network, mask = self.pool.subnet(_prefix_for(len(hosts) + 1))
+        gateway = None
+        if router is not None:
+            gateway = IP.from_int(network + 1)
+            self.link(router, interface, switches[0], switch_port)
+            self.address_router(router, interface, gateway, mask)
+        for i, host in enumerate(hosts):
+            self.address_host(
+                host, IP.from_int(network + i + 2), mask, gateway
+            )
+        return Lan(IP.from_int(network), mask, hosts, switches, gateway)
+
+    @_batched
+    def mesh(self, name: str, routers: int, hosts: int = 1) -> List[Lan]:
+        """
+        Crea ``routers`` routers conectados todos con todos, cada uno con
+        una LAN en estrella de ``hosts`` hosts, y las rutas entre ellas.
+
+        Returns
+        -------
+        List[Lan]
+            LAN de cada router.
+        """
+
+        # El puerto 1 de cada router va a su LAN y el resto a los demás
+        nodes = self.routers(f"{name}-r", routers, routers)
+        lans = [
+            self.star(f"{name}-{i}", hosts, router, 1)
+            for i, router in enumerate(nodes)
+        ]
+        for i in range(routers):
+            for j in range(i + 1, routers):
+                # El router i usa el puerto j + 1 (saltando el propio) y
+                # viceversa
+                ip_i, ip_j = self.router_link(nodes[i], j + 1, nodes[j], i + 2)
+                self.route(
+                    nodes[i],
+                    lans[j].network.raw_value,
+                    lans[j].mask,
+                    ip_j,
+                    j + 1,
+                )
+                self.route(
+                    nodes[j],
+                    lans[i].network.raw_value,
+                    lans[i].mask,
+                    ip_i,
+                    i + 2,
+                )
+        return lans
+
+    @_batched
+    def fat_tree(self, name: str, k: int) -> List[Host]:
+        """
+        Crea un fat-tree de capa 3 de ``k`` pods: ``(k/2)^2`` routers de
+        núcleo, ``k/2`` routers de agregación y ``k/2`` de borde por pod, y
+        ``k/2`` hosts por router de borde, ``k^3/4`` en total.
+
+        Cada host tiene su propia subred con su router de borde y las
+        subredes de cada pod forman un bloque, por lo que cada router tiene
+        una ruta por bloque de destino. Entre cada par de hosts se usa un
+        solo camino: el borde ``e`` sube por la agregación ``e % (k/2)`` y
+        la agregación del pod ``p`` por su núcleo ``p % (k/2)``.
+
+        Returns
+        -------
+        List[Host]
+            Hosts del fat-tree.
+        """
+
+        if k < 2 or k % 2:
+            raise ValueError("The fat-tree arity must be even")
+        half = k // 2
+        cores = self.routers(f"{name}-core", half * half, k)
+        hosts = []
+        for p in range(k):
+            edges = self.routers(f"{name}-p{p}-edge", half, k)
+            aggs = self.routers(f"{name}-p{p}-agg", half, k)
+
+            # Bloques de las subredes /30 de los hosts de cada borde y del
+            # pod
+            edge_prefix = _prefix_for(4 * half - 2)
+            edge_mask = _mask(edge_prefix)
+            edge_size = 1 << (32 - edge_prefix)
+            pod_network, pod_mask = self.pool.subnet(
+                _prefix_for(half * edge_size - 2)
+            )
+            host_mask = _mask(30)
+
+            # Puertos de los bordes: 1..half hosts, half+1..k agregaciones
+            for e, edge in enumerate(edges):
+                edge_network = pod_network + e * edge_size
+                members = self.hosts(f"{name}-p{p}-e{e}-pc", half)
+                for h, host in enumerate(members):
+                    network = edge_network + 4 * h
+                    self.link(host, 1, edge, h + 1)
+                    self.address_router(
+                        edge, h + 1, IP.from_int(network + 1), host_mask
+                    )
+                    self.address_host(
+                        host,
+                        IP.from_int(network + 2),
+                        host_mask,
+                        IP.from_int(network + 1),
+                    )
+                hosts += members
+
+                # Puertos de las agregaciones: 1..half bordes,
+                # half+1..k núcleos
+                for a, agg in enumerate(aggs):
+                    edge_ip, agg_ip = self.router_link(
+                        edge, half + a + 1, agg, e + 1
+                    )
+                    self.route(agg, edge_network, edge_mask, edge_ip, e + 1)
+                    if a == e % half:
+                        self.route(edge, 0, _NO_GATEWAY, agg_ip, half + a + 1)
+
+            # Los núcleos a*half..a*half+half-1 se conectan a la agregación a
+            # de cada pod por su puerto p + 1
+            for a, agg in enumerate(aggs):
+                for c in range(half):
+                    core = cores[a * half + c]
+                    agg_ip, core_ip = self.router_link(
+                        agg, half + c + 1, core, p + 1
+                    )
+                    self.route(core, pod_network, pod_mask, agg_ip, p + 1)
+                    if c == p % half:
+                        self.route(agg, 0, _NO_GATEWAY, core_ip, half + c + 1)
+        return hosts
@@ -1,23 +1,17 @@
 from math import ceil
-from typing import List
-from physical_layer.bit import VoltageDecodification as VD
+from physical_layer.bit import BitBuffer
 
 
-def from_number_to_bit_data(number: int, size: int = 8):
-    data = [VD(int(b)) for b in f"{number:b}"]
-    if len(data) > size:
-        return data[-size:]
-    elif len(data) < size:
-        data = [VD(0)] * (size - len(data)) + data
-    return data
+def from_number_to_bit_data(number: int, size: int = 8) -> BitBuffer:
+    return BitBuffer.from_int(number, size)
 
 
-def from_bit_data_to_number(data: List[VD]):
+def from_bit_data_to_number(data: BitBuffer) -> int:
     """Convierte los datos de una lista de bits a un número en base decimal.
 
     Parameters
     ----------
-    data : List[int]
+    data : BitBuffer
         Datos a convertir.
 
     Returns
@@ -26,40 +20,34 @@ def from_bit_data_to_number(data: List[VD]):
         Número resultante.
     """
 
-    return int("".join([str(bit) for bit in data]), 2)
+    return data.value
 
 
 def from_str_to_bin(s: str):
     return "".join([f"{ord(c):08b}" for c in s])
 
 
-def from_str_to_bit_data(s: str):
-    return [VD(int(b)) for b in from_str_to_bin(s)]
+def from_str_to_bit_data(s: str) -> BitBuffer:
+    return BitBuffer.from_str(from_str_to_bin(s))
 
 
-def from_bit_data_to_hex(data: List[int]):
-    number = from_bit_data_to_number(data)
-    hex_data = str(hex(number))[2:].upper()
+def from_bit_data_to_hex(data: BitBuffer):
+    hex_data = f"{data.value:X}"
     if len(hex_data) % 4 != 0:
         rest = 4 - len(hex_data) % 4
         hex_data = "0" * rest + hex_data
     return hex_data
 
 
-def data_size(data):
-    size_str = f"{ceil(len(data)/8):b}"
-    size = [VD(0)] * 8
-
-    for i in range(1, len(size_str) + 1):
-        size[-i] = VD(int(size_str[-i]))
-    return size
+def data_size(data: BitBuffer) -> BitBuffer:
+    return BitBuffer.from_int(ceil(len(data) / 8), 8)
 
 
-def extend_to_byte_divisor(data, at_end=True):
+def extend_to_byte_divisor(data: BitBuffer, at_end=True) -> BitBuffer:
     if len(data) % 8 != 0:
         rest = 8 - len(data) % 8
         if at_end:
-            return data + [VD(0)] * rest
+            return data + BitBuffer(0, rest)
         else:
-            return [VD(0)] * rest + data
+            return BitBuffer(0, rest) + data
     return data
@@ -0,0 +1,77 @@
+from device.router import ForwardingCache, Route, Router
+from physical_layer.bit import BitBuffer
+from network_layer.ip import IP
+
+
+def _entry(route, next_hop):
+    return route, "r_1", next_hop, None, None
+
+
+def test_invalidate_only_the_affected_entries():
+    mask = IP(255, 255, 255, 0)
+    gateway_1, gateway_2 = IP(10, 0, 0, 1), IP(10, 0, 0, 2)
+    route_1 = Route(IP(10, 1, 0, 0), mask, gateway_1, 1)
+    route_2 = Route(IP(10, 2, 0, 0), mask, gateway_2, 2)
+    cache = ForwardingCache(8)
+    cache.put(IP(10, 1, 0, 5), _entry(route_1, gateway_1))
+    cache.put(IP(10, 1, 0, 6), _entry(route_1, gateway_1))
+    cache.put(IP(10, 2, 0, 5), _entry(route_2, gateway_2))
+    cache.put(IP(10, 3, 0, 5), _entry(None, None))
+
+    cache.invalidate_route(Route(IP(10, 1, 0, 0), mask, gateway_1, 1))
+    assert set(cache.entries) == {
+        IP(10, 2, 0, 5).raw_value,
+        IP(10, 3, 0, 5).raw_value,
+    }
+
+    cache.put(IP(10, 1, 0, 5), _entry(route_1, gateway_1))
+    cache.invalidate_next_hop(gateway_2)
+    assert set(cache.entries) == {
+        IP(10, 1, 0, 5).raw_value,
+        IP(10, 3, 0, 5).raw_value,
+    }
+
+    cache.invalidate_prefix(IP(10, 3, 0, 0).raw_value, mask.raw_value)
+    assert set(cache.entries) == {IP(10, 1, 0, 5).raw_value}
+    cache.invalidate_next_hop(gateway_1)
+    assert not cache.entries
+    assert not cache._by_route and not cache._by_next_hop
+
+
+def test_evicted_entries_leave_the_indexes():
+    gateway = IP(10, 0, 0, 1)
+    route = Route(IP(10, 1, 0, 0), IP(255, 255, 255, 0), gateway, 1)
+    cache = ForwardingCache(1)
+    cache.put(IP(10, 1, 0, 5), _entry(route, gateway))
+    cache.put(IP(10, 1, 0, 6), _entry(route, gateway))
+
+    assert cache._by_next_hop == {gateway: {IP(10, 1, 0, 6).raw_value}}
+
+
+def test_invalidate_entries_absent_from_the_cache():
+    gateway = IP(10, 0, 0, 1)
+    route = Route(IP(10, 1, 0, 0), IP(255, 255, 255, 0), gateway, 1)
+    cache = ForwardingCache(8)
+
+    cache.invalidate_route(route)
+    cache.invalidate_next_hop(gateway)
+
+    cache.put(IP(10, 1, 0, 5), _entry(route, gateway))
+    cache.invalidate_route(
+        Route(IP(10, 2, 0, 0), IP(255, 255, 255, 0), gateway, 1)
+    )
+    cache.invalidate_next_hop(IP(10, 0, 0, 2))
+    assert set(cache.entries) == {IP(10, 1, 0, 5).raw_value}
+
+
+def test_router_changes_without_cached_entries():
+    router = Router("r", 2)
+    route = Route(IP(10, 1, 0, 0), IP(255, 255, 255, 0), IP(10, 0, 0, 1), 1)
+    router.add_route(route)
+    router.remove_route(route)
+
+    mac = BitBuffer.from_str("1011101110111011")
+    router.update_ip_table(IP(10, 0, 0, 1), mac)
+    router.update_ip_table(IP(10, 0, 0, 1), mac)
+    router.arp_entry_removed(IP(10, 0, 0, 1))
+    assert not router.forwarding_cache.entries
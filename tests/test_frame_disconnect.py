@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from config import Config
+from instruction_parser import parse_instructions
+from simulation import Simulation
+
+
+def _run(tmp_path, script, engine):
+    random.seed(0)
+    config = Config(transmission_mode="frame", engine=engine)
+    simulation = Simulation(output_path=str(tmp_path), config=config)
+    simulation.start(parse_instructions(script.strip().splitlines()))
+    return simulation
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+def test_disconnect_sender_during_frame(tmp_path, engine):
+    simulation = _run(
+        tmp_path,
+        """
+0 create host h0
+0 create host h1
+0 connect h0_1 h1_1
+0 mac h0:1 aaaa
+0 mac h1:1 bbbb
+10 send_frame h0 bbbb ffffffff
+200 disconnect h0_1
+300 connect h0_1 h1_1
+""",
+        engine,
+    )
+
+    # The cut frame is dropped and sent again after reconnecting
+    received = simulation.hosts["h1"].received_data
+    assert [row[1:] for row in received] == [["00AA", "00FFFFFFFF20"]]
+    assert received[0][0] > 300
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+@pytest.mark.parametrize("port", ["a_1", "x_1"])
+def test_disconnect_hub_sender_during_frame(tmp_path, engine, port):
+    simulation = _run(
+        tmp_path,
+        f"""
+0 create host a
+0 create host b
+0 create host c
+0 create hub x 3
+0 connect a_1 x_1
+0 connect b_1 x_2
+0 connect c_1 x_3
+0 mac a:1 aaaa
+0 mac b:1 bbbb
+0 mac c:1 cccc
+10 send_frame a bbbb ffffffff
+200 disconnect {port}
+2000 send_frame b cccc 12
+5000 send_frame c bbbb 34
+""",
+        engine,
+    )
+
+    # The hub forgets the cut frame and keeps repeating the next ones
+    hosts = simulation.hosts
+    assert [row[1:] for row in hosts["b"].received_data] == [["00CC", "3403"]]
+    assert [row[1:] for row in hosts["c"].received_data] == [["00BB", "1202"]]
@@ -0,0 +1,52 @@
+import random
+from pathlib import Path
+
+from config import Config
+from instruction_parser import load_instructions
+from partition import run_partitioned
+from simulation import Simulation
+
+# The frames of a and b collide at the hub and are sent again after a backoff
+SCRIPT = """
+0 create hub hb 3
+0 create host a
+0 create host b
+0 create switch sw 3
+0 create host c
+0 create host d
+0 connect a_1 hb_1
+0 connect b_1 hb_2
+0 connect hb_3 sw_1
+0 connect c_1 sw_2
+0 connect d_1 sw_3
+0 mac a aaaa
+0 mac b bbbb
+0 mac c cccc
+0 mac d dddd
+10 send_frame a cccc 1234
+10 send_frame b dddd 5678
+10 send_frame c aaaa 9abc
+12 send_frame d bbbb def0
+"""
+
+
+def test_partitioned_collisions_match_sequential(tmp_path):
+    script_path = tmp_path / "script.txt"
+    script_path.write_text(SCRIPT.lstrip())
+    config = Config(transmission_mode="frame", error_prob=0)
+
+    random.seed(1)
+    simulation = Simulation(str(tmp_path / "sequential"), config=config)
+    simulation.start(load_instructions(str(script_path)))
+    random.seed(1)
+    stats = run_partitioned(
+        str(script_path), 3, str(tmp_path / "partitioned"), config
+    )
+
+    assert stats["devices"] == [4, 2]
+    assert stats["time"] == simulation.time
+    for name in ["a", "b", "c", "d"]:
+        log = f"{name}_data.txt"
+        sequential = Path(tmp_path, "sequential", log).read_text()
+        partitioned = Path(tmp_path, "partitioned", log).read_text()
+        assert sequential and sequential == partitioned
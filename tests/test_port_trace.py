@@ -0,0 +1,64 @@
+import pytest
+
+from config import Config
+from instruction_parser import parse_instructions
+from port_trace import TraceReader
+from simulation import Simulation
+
+SCRIPT = """
+0 create host h0
+0 create host h1
+0 connect h0_1 h1_1
+0 mac h0 aaaa
+0 mac h1 bbbb
+10 send_frame h0 bbbb ff
+"""
+
+
+def test_render_device_without_records(tmp_path):
+    config = Config(port_log="trace", capture_devices=("h0",))
+    simulation = Simulation(str(tmp_path), config=config)
+    simulation.start(parse_instructions(SCRIPT.strip().splitlines()))
+
+    reader = TraceReader(str(tmp_path))
+    assert "h0_1" in "".join(reader.render("h0"))
+    with pytest.raises(ValueError, match="h1 has no records"):
+        list(reader.render("h1"))
+
+
+HUB_SCRIPT = """
+0 create hub x 3
+0 create host h0
+0 create host h1
+0 connect h0_1 x_1
+0 connect h1_1 x_2
+0 mac h0 aaaa
+0 mac h1 bbbb
+10 send_frame h0 bbbb ff
+"""
+
+
+def test_render_all_in_one_pass(tmp_path):
+    config = Config(port_log="trace", signal_time=2)
+    simulation = Simulation(str(tmp_path), config=config)
+    simulation.start(parse_instructions(HUB_SCRIPT.strip().splitlines()))
+    reader = TraceReader(str(tmp_path))
+    reads = []
+    records = reader._records
+
+    def counting(start=None):
+        reads.append(start)
+        return records(start)
+
+    reader._records = counting
+    for start, end in [(None, None), (100, 300), (150, None), (10**6, None)]:
+        reads.clear()
+        tables = reader.render_all(["x", "h1"], start, end)
+        assert len(reads) == 1
+        for name in ["x", "h1"]:
+            assert tables[name] == "".join(reader.render(name, start, end))
+
+    rows = list(reader.rows("x", 100, 300))
+    assert rows and all(100 <= row[0] <= 300 for row in rows)
+    times = [row[0] for row in reader.rows("x")]
+    assert [t for t in times if 100 <= t <= 300] == [row[0] for row in rows]
@@ -0,0 +1,35 @@
+import pytest
+
+from config import Config
+from instruction_parser import iter_instructions, parse_instructions
+from instructions import MacIns
+from physical_layer.bit import BitBuffer
+from simulation import Simulation
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+def test_scheduled_after_script_at_same_time(tmp_path, engine):
+    simulation = Simulation(
+        output_path=str(tmp_path), config=Config(engine=engine)
+    )
+    script = ["0 create host h0", "5 mac h0 aaaa"]
+    for instruction in parse_instructions(script):
+        simulation.schedule(instruction)
+    mac = BitBuffer.from_str("1011101110111011")
+    simulation.schedule(MacIns(5, "h0", 1, mac))
+    simulation.resume()
+
+    assert simulation.devices["h0"].mac_addrs["h0_1"] == mac
+
+
+@pytest.mark.parametrize("window", [0, 2])
+def test_scheduled_after_lazy_script_at_same_time(tmp_path, window):
+    script_path = tmp_path / "script.txt"
+    script_path.write_text("0 create host h0\n3 mac h0 cccc\n5 mac h0 aaaa\n")
+    simulation = Simulation(output_path=str(tmp_path), config=Config())
+    mac = BitBuffer.from_str("1011101110111011")
+    # Scheduled before the script line at 5 is read
+    simulation.schedule(MacIns(5, "h0", 1, mac))
+    simulation.start(iter_instructions(str(script_path), window))
+
+    assert simulation.devices["h0"].mac_addrs["h0_1"] == mac
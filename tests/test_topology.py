@@ -0,0 +1,17 @@
+from device import Host, Hub
+from topology import DomainMap
+
+
+def test_connect_replaces_the_previous_peer():
+    domains = DomainMap(lambda device: isinstance(device, Hub))
+    for device in (Hub("x", 2), Host("a"), Host("b")):
+        domains.add_device(device)
+    domains.connect("x_1", "a_1")
+    domains.connect("x_1", "b_1")
+
+    assert domains.same("x_2", "b_1")
+    assert not domains.same("x_2", "a_1")
+
+    # ``a_1`` no longer has a peer, disconnecting it changes nothing
+    domains.disconnect("a_1")
+    assert domains.same("x_2", "b_1")
@@ -0,0 +1,46 @@
+from collections import Counter
+
+import pytest
+
+from config import Config
+from simulation import Simulation
+
+
+def _simulation(tmp_path, engine):
+    config = Config(engine=engine)
+    return Simulation(output_path=str(tmp_path), config=config)
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+def test_star_reschedules_each_device_once(tmp_path, engine):
+    simulation = _simulation(tmp_path, engine)
+    rescheduled = Counter()
+    reschedule = simulation._reschedule
+
+    def counting(device):
+        if simulation._deferred is None:
+            rescheduled[device.name] += 1
+        reschedule(device)
+
+    simulation._reschedule = counting
+    lan = simulation.builder().star("s", 50)
+
+    names = [host.name for host in lan.hosts] + ["s-sw0"]
+    assert sorted(rescheduled) == sorted(names)
+    assert set(rescheduled.values()) == {1}
+
+
+@pytest.mark.parametrize("engine", ["tick", "event"])
+def test_batch_schedules_like_single_changes(tmp_path, engine):
+    batched = _simulation(tmp_path / "batched", engine)
+    batched.builder().star("s", 5)
+    single = _simulation(tmp_path / "single", engine)
+    builder = single.builder()
+    # Without the batch every connection reschedules its devices
+    builder.star.__wrapped__(builder, "s", 5)
+
+    def wake_times(simulation):
+        return {d.name: t for d, t in simulation._wake_times.items()}
+
+    assert wake_times(batched) == wake_times(single)
+    assert batched._sending == set() and single._sending == set()